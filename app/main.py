@@ -1,14 +1,74 @@
-from fastapi import FastAPI, HTTPException, status
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from app.models.schemas import GValueRequest, GValueResponse, HealthResponse
-from app.services.gp_model import gp_predictor
-from app.services.redis_client import RedisService
+from app.models.schemas import (
+    GValueRequest, GValueResponse, GValueBatchRequest, GValueBatchResponse, HealthResponse,
+    ObservationBatch, ReadinessResponse
+)
+from app.services.batcher import G_VALUE_BATCHING, PredictionBatcher
+from app.services.features import features_digest
+from app.services.gp_model import MOCK_MODEL_VERSION, gp_predictor
+from app.services.online_updates import online_updater
+from app.services.training import TRAINING_SOURCES, TrainingJob, training_manager
+from app.services.redis_client import AsyncRedisService
+from typing import Any, Dict, List, Optional
+import asyncio
+import os
 import time
 
+# Maximum warmup prediction latency for the service to report ready
+G_VALUE_READY_LATENCY_MS = float(os.getenv("G_VALUE_READY_LATENCY_MS", "250"))
+
+# Seconds between checks for a model published by another worker (0 disables; set by app.serve)
+G_VALUE_MODEL_SYNC_INTERVAL = float(os.getenv("G_VALUE_MODEL_SYNC_INTERVAL", "0"))
+
+# Whether this process applies observations and runs training. app.serve makes worker 0 the
+# only owner; the other workers queue that work for it in Redis and follow the models it publishes.
+G_VALUE_MODEL_OWNER = os.getenv("G_VALUE_MODEL_OWNER", "true").lower() == "true"
+# Seconds between the owner's checks for work queued by the other workers
+G_VALUE_MODEL_WORK_POLL_INTERVAL = float(os.getenv("G_VALUE_MODEL_WORK_POLL_INTERVAL", "0.5"))
+MODEL_WORK_BATCH = 100
+
+# Coalesces concurrent /predict requests into batched model calls
+prediction_batcher = PredictionBatcher(gp_predictor.predict_batch_versioned)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load or train and warm up the model before serving; release connections on shutdown."""
+    loop = asyncio.get_running_loop()
+    start_time = time.time()
+    # Workers forked by app.serve inherit a model loaded before the fork
+    if not gp_predictor.is_trained and not await loop.run_in_executor(None, gp_predictor.load_checkpoint):
+        await loop.run_in_executor(None, gp_predictor.train_model)
+    if gp_predictor.is_trained:
+        await _publish_model_version()
+        print(
+            f"Model {gp_predictor.model_version} ready in {time.time() - start_time:.2f}s "
+            f"(warmup latency ms: {gp_predictor.warmup_latency_ms})"
+        )
+    await AsyncRedisService.start_invalidation_listener()
+    if G_VALUE_BATCHING:
+        await prediction_batcher.start()
+    if G_VALUE_MODEL_OWNER:
+        await online_updater.start(on_model_updated=_publish_model_version)
+        background_task = asyncio.create_task(_drain_model_work())
+    elif G_VALUE_MODEL_SYNC_INTERVAL > 0:
+        background_task = asyncio.create_task(_follow_published_model())
+    else:
+        background_task = None
+    yield
+    if background_task:
+        background_task.cancel()
+    await prediction_batcher.stop()
+    await online_updater.stop()
+    training_manager.shutdown()
+    await AsyncRedisService.close()
+
 app = FastAPI(
     title="G-Value Service",
     description="Gaussian Process Regression service for G-value predictions",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -20,6 +80,64 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+async def _publish_model_version():
+    """Publish the current model version so clients can address cached predictions."""
+    await AsyncRedisService.set(
+        AsyncRedisService.get_model_version_key(), gp_predictor.model_version, ttl=86400
+    )
+    # Lets subscribers (e.g. the backend's order feed) refresh G-values right away
+    await AsyncRedisService.publish(
+        AsyncRedisService.get_model_updates_channel(), {"model_version": gp_predictor.model_version}
+    )
+
+async def _follow_published_model():
+    """Reload the checkpoint when another worker publishes a new model version."""
+    last_published = gp_predictor.model_version
+    while True:
+        await asyncio.sleep(G_VALUE_MODEL_SYNC_INTERVAL)
+        try:
+            published = await AsyncRedisService.get(AsyncRedisService.get_model_version_key())
+            if not published or published == last_published:
+                continue
+            last_published = published
+            if published != gp_predictor.model_version:
+                await asyncio.wrap_future(training_manager.submit_reload())
+        except Exception as e:
+            print(f"Error following published model version: {e}")
+
+async def _drain_model_work():
+    """Apply observations and training requests queued by workers that do not own the model."""
+    queue_key = AsyncRedisService.get_model_work_queue_key()
+    while True:
+        await asyncio.sleep(G_VALUE_MODEL_WORK_POLL_INTERVAL)
+        try:
+            for work in await AsyncRedisService.pop_many(queue_key, MODEL_WORK_BATCH):
+                if work.get("type") == "observations":
+                    online_updater.add([(item["features"], item["g_value"]) for item in work["observations"]])
+                elif work.get("type") == "train":
+                    _start_training(work.get("source", "current"))
+        except Exception as e:
+            print(f"Error applying queued model work: {e}")
+
+def _start_training(source: str):
+    """Start (or join) a training job on this process, publishing the model once it is swapped in."""
+    loop = asyncio.get_running_loop()
+    
+    def on_complete(job: TrainingJob):
+        # Runs on the training thread once the new model has been swapped in
+        if job.status == "succeeded":
+            asyncio.run_coroutine_threadsafe(_publish_model_version(), loop)
+    
+    return training_manager.start(on_complete=on_complete, source=source)
+
+async def _queue_model_work(work: Dict[str, Any]):
+    """Hand work to the model-owning worker, or fail with 503 if it cannot be queued."""
+    if not await AsyncRedisService.push(AsyncRedisService.get_model_work_queue_key(), [work]):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Could not hand the request to the model-owning worker"
+        )
+
 @app.get("/", response_model=HealthResponse)
 async def root():
     """Root endpoint."""
@@ -30,31 +148,59 @@ async def health_check():
     """Health check endpoint."""
     return HealthResponse(status="healthy", service="g-value-service")
 
+@app.get("/ready", response_model=ReadinessResponse)
+async def readiness_check(response: Response):
+    """Readiness probe: succeeds only once a warm model answers within the latency budget."""
+    warmup_latency_ms = gp_predictor.warmup_latency_ms
+    ready = (
+        gp_predictor.is_trained
+        and bool(warmup_latency_ms)
+        and max(warmup_latency_ms.values()) <= G_VALUE_READY_LATENCY_MS
+    )
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return ReadinessResponse(
+        status="ready" if ready else "not_ready",
+        service="g-value-service",
+        model_version=gp_predictor.model_version,
+        warmup_latency_ms={str(size): latency for size, latency in warmup_latency_ms.items()},
+        latency_budget_ms=G_VALUE_READY_LATENCY_MS
+    )
+
+@app.get("/metrics")
+async def metrics():
+    """Prediction batching histograms."""
+    return {"batcher": prediction_batcher.stats()}
+
 @app.post("/predict", response_model=GValueResponse)
 async def predict_g_value(request: GValueRequest):
     """Predict G-value for a worker-order combination."""
     try:
         start_time = time.time()
         
-        # Check cache first
-        cache_key = RedisService.get_g_value_cache_key(request.worker_id, request.order_id)
-        cached_result = RedisService.get(cache_key)
+        # Check cache first, keyed by feature digest and model version
+        digest = features_digest(request.features)
+        cached_result = await AsyncRedisService.get(
+            AsyncRedisService.get_g_value_cache_key(digest, gp_predictor.model_version)
+        )
         
         if cached_result:
             print(f"Cache hit for {request.worker_id}:{request.order_id}")
             return GValueResponse(**cached_result)
         
-        # Make prediction
-        g_mean, g_var = gp_predictor.predict(request.features)
+        # Make prediction; the model may have been swapped since the lookup, so use the version that made it
+        g_mean, g_var, model_version = await prediction_batcher.predict(request.features)
         
         # Prepare response
         result = {
             "g_mean": g_mean,
-            "g_var": g_var
+            "g_var": g_var,
+            "model_version": model_version or MOCK_MODEL_VERSION
         }
         
-        # Cache the result for 5 minutes
-        RedisService.set(cache_key, result, ttl=300)
+        # Cache the result for 5 minutes, unless it is a mock fallback
+        if model_version is not None:
+            await AsyncRedisService.set(AsyncRedisService.get_g_value_cache_key(digest, model_version), result, ttl=300)
         
         prediction_time = time.time() - start_time
         print(f"Prediction completed in {prediction_time:.3f}s for {request.worker_id}:{request.order_id}")
@@ -68,12 +214,72 @@ async def predict_g_value(request: GValueRequest):
             detail=f"Failed to predict G-value: {str(e)}"
         )
 
-@app.post("/train")
-async def train_model():
-    """Manually trigger model training."""
+@app.post("/predict/batch", response_model=GValueBatchResponse)
+async def predict_g_value_batch(batch: GValueBatchRequest):
+    """Predict G-values for many worker-order combinations in one model pass."""
     try:
-        gp_predictor.train_model()
-        return {"message": "Model training completed successfully"}
+        start_time = time.time()
+        
+        # Resolve cache hits and misses for the whole batch
+        digests = [features_digest(request.features) for request in batch.requests]
+        lookup_version = gp_predictor.model_version
+        results: List[Optional[Dict[str, Any]]] = await AsyncRedisService.get_many(
+            [AsyncRedisService.get_g_value_cache_key(digest, lookup_version) for digest in digests]
+        )
+        misses = [i for i, result in enumerate(results) if not result]
+        
+        # Score the misses together, coalesced with concurrent requests
+        if misses:
+            predictions = await prediction_batcher.predict_many(
+                [batch.requests[i].features for i in misses]
+            )
+            new_results = {}
+            for i, (g_mean, g_var, model_version) in zip(misses, predictions):
+                results[i] = {
+                    "g_mean": g_mean,
+                    "g_var": g_var,
+                    "model_version": model_version or MOCK_MODEL_VERSION
+                }
+                # Keyed by the version that made each prediction; mock fallbacks are not cached
+                if model_version is not None:
+                    new_results[AsyncRedisService.get_g_value_cache_key(digests[i], model_version)] = results[i]
+            
+            # Cache the new results for 5 minutes
+            if new_results:
+                await AsyncRedisService.set_many(new_results, ttl=300)
+        
+        prediction_time = time.time() - start_time
+        print(
+            f"Batch prediction completed in {prediction_time:.3f}s for {len(results)} orders "
+            f"({len(results) - len(misses)} cached)"
+        )
+        
+        return GValueBatchResponse(predictions=[GValueResponse(**result) for result in results])
+        
+    except Exception as e:
+        print(f"Error in batch G-value prediction: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to predict G-values: {str(e)}"
+        )
+
+@app.post("/train", status_code=status.HTTP_202_ACCEPTED)
+async def train_model(
+    source: str = Query(
+        "current", pattern=f"^({'|'.join(TRAINING_SOURCES)})$",
+        description="current: retrain on the data the model is conditioned on (incl. observations); mock: fresh mock data"
+    )
+):
+    """Start model training in the background; concurrent calls join the running job."""
+    if not G_VALUE_MODEL_OWNER:
+        await _queue_model_work({"type": "train", "source": source})
+        return {"message": "Model training requested from the model-owning worker", "job": None}
+    try:
+        job, started = _start_training(source)
+        return {
+            "message": "Model training started" if started else "Model training already in progress",
+            "job": job.to_dict()
+        }
     except Exception as e:
         print(f"Error training model: {e}")
         raise HTTPException(
@@ -81,6 +287,34 @@ async def train_model():
             detail=f"Failed to train model: {str(e)}"
         )
 
+@app.get("/train/status")
+async def training_status():
+    """Get progress, loss and duration of the current or most recent training job."""
+    job = training_manager.status()
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No training job has been started"
+        )
+    return {
+        "job": job,
+        "model_version": gp_predictor.model_version,
+        "online_updates": online_updater.stats()
+    }
+
+@app.post("/observations", status_code=status.HTTP_202_ACCEPTED)
+async def record_observations(batch: ObservationBatch):
+    """Queue observed G-values of completed jobs for an incremental model update."""
+    if not G_VALUE_MODEL_OWNER:
+        await _queue_model_work({"type": "observations", "observations": [
+            observation.model_dump() for observation in batch.observations
+        ]})
+        return {"accepted": len(batch.observations), "pending": None}
+    pending = online_updater.add(
+        [(observation.features, observation.g_value) for observation in batch.observations]
+    )
+    return {"accepted": len(batch.observations), "pending": pending}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=5001)
\ No newline at end of file
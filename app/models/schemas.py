@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Dict, Any, List, Optional
 
 # G-Value Service Schemas
@@ -10,11 +10,32 @@ class GValueRequest(BaseModel):
 class GValueResponse(BaseModel):
     g_mean: float
     g_var: float
+    model_version: Optional[str] = None
+
+class GValueBatchRequest(BaseModel):
+    requests: List[GValueRequest]
+
+class GValueBatchResponse(BaseModel):
+    predictions: List[GValueResponse]
+
+class Observation(BaseModel):
+    features: Dict[str, Any]
+    g_value: float
+
+class ObservationBatch(BaseModel):
+    observations: List[Observation]
 
 class HealthResponse(BaseModel):
     status: str
     service: str
 
+class ReadinessResponse(BaseModel):
+    status: str
+    service: str
+    model_version: str
+    warmup_latency_ms: Dict[str, float]
+    latency_budget_ms: float
+
 # Backend API Schemas
 class User(BaseModel):
     id: str
@@ -34,24 +55,41 @@ class Order(BaseModel):
     pickup: str
     dropoff: str
     eta: int  # in minutes
+    pickup_lat: Optional[float] = None
+    pickup_lng: Optional[float] = None
+    distance_km: Optional[float] = None  # from the worker, when orders are searched by location
     g_mean: float
     g_var: float
     status: str
     worker_id: Optional[str] = None
 
+class CreateOrderRequest(BaseModel):
+    pickup: str
+    dropoff: str
+    eta: int  # in minutes
+    pickup_lat: Optional[float] = Field(None, ge=-90, le=90)
+    pickup_lng: Optional[float] = Field(None, ge=-180, le=180)
+
+class CompleteOrderRequest(BaseModel):
+    g_value: Optional[float] = None  # realized G-value, fed back to the model when known
+
 class CompletedJob(BaseModel):
     id: str
     pickup: str
     dropoff: str
     completed_at: str
     earnings: float
-    g_value: float
+    g_value: Optional[float] = None
 
 class Earnings(BaseModel):
     total_earnings: float
     weekly_earnings: float
-    completed_jobs: List[CompletedJob]
+    completed_jobs_count: int
+    completed_jobs: List[CompletedJob]  # newest first, one page
 
 class ApiResponse(BaseModel):
     data: Any
-    message: Optional[str] = None
\ No newline at end of file
+    message: Optional[str] = None
+
+class PaginatedApiResponse(ApiResponse):
+    next_cursor: Optional[str] = None  # pass back as ?cursor= to fetch the next page
@@ -0,0 +1,154 @@
+"""
+Lightweight G-value prediction replica.
+
+Serves predictions from a NumPy inference artifact exported by
+`python -m app.services.gp_model --export-numpy`, without importing torch or
+gpytorch. Training, online updates and version publishing stay with the full
+service in app.main.
+
+Run with:
+    uvicorn app.replica:app --port 5002
+"""
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Response, status
+from fastapi.middleware.cors import CORSMiddleware
+from app.models.schemas import (
+    GValueRequest, GValueResponse, GValueBatchRequest, GValueBatchResponse, HealthResponse,
+    ReadinessResponse
+)
+from app.services.batcher import G_VALUE_BATCHING, PredictionBatcher
+from app.services.features import features_digest
+from app.services.numpy_predictor import NumpyGPPredictor
+from app.services.redis_client import AsyncRedisService
+from typing import Any, Dict, List, Optional
+import os
+import time
+
+G_VALUE_ARTIFACT_PATH = os.getenv("G_VALUE_ARTIFACT_PATH", os.path.join("models", "g_value_numpy"))
+G_VALUE_ARTIFACT_MMAP = os.getenv("G_VALUE_ARTIFACT_MMAP", "true").lower() == "true"
+G_VALUE_READY_LATENCY_MS = float(os.getenv("G_VALUE_READY_LATENCY_MS", "250"))
+WARMUP_BATCH_SIZES = [
+    int(size) for size in os.getenv("G_VALUE_WARMUP_BATCH_SIZES", "1,8,32").split(",") if size.strip()
+]
+
+predictor: Optional[NumpyGPPredictor] = None
+
+# Coalesces concurrent prediction requests into batched calls
+prediction_batcher = PredictionBatcher(lambda features_list: predictor.predict_batch(features_list))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load and warm up the inference artifact before serving."""
+    global predictor
+    start_time = time.time()
+    try:
+        predictor = NumpyGPPredictor.load(G_VALUE_ARTIFACT_PATH, mmap=G_VALUE_ARTIFACT_MMAP)
+        predictor.warmup(WARMUP_BATCH_SIZES)
+        print(
+            f"Artifact {predictor.model_version} ({predictor.model_type}) ready in "
+            f"{time.time() - start_time:.3f}s (warmup latency ms: {predictor.warmup_latency_ms})"
+        )
+    except Exception as e:
+        # Stay up but report not ready, so the orchestrator keeps traffic away
+        print(f"Error loading inference artifact {G_VALUE_ARTIFACT_PATH}: {e}")
+    await AsyncRedisService.start_invalidation_listener()
+    if G_VALUE_BATCHING:
+        await prediction_batcher.start()
+    yield
+    await prediction_batcher.stop()
+    await AsyncRedisService.close()
+
+app = FastAPI(
+    title="G-Value Replica",
+    description="NumPy-only G-value prediction replica",
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+# Configure CORS
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],  # In production, specify exact origins
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+def _require_predictor() -> NumpyGPPredictor:
+    if predictor is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="No inference artifact loaded"
+        )
+    return predictor
+
+@app.get("/", response_model=HealthResponse)
+async def root():
+    """Root endpoint."""
+    return HealthResponse(status="running", service="g-value-replica")
+
+@app.get("/health", response_model=HealthResponse)
+async def health_check():
+    """Health check endpoint."""
+    return HealthResponse(status="healthy", service="g-value-replica")
+
+@app.get("/ready", response_model=ReadinessResponse)
+async def readiness_check(response: Response):
+    """Readiness probe: succeeds once the artifact answers within the latency budget."""
+    warmup_latency_ms = predictor.warmup_latency_ms if predictor else {}
+    ready = bool(warmup_latency_ms) and max(warmup_latency_ms.values()) <= G_VALUE_READY_LATENCY_MS
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return ReadinessResponse(
+        status="ready" if ready else "not_ready",
+        service="g-value-replica",
+        model_version=predictor.model_version if predictor else "none",
+        warmup_latency_ms={str(size): latency for size, latency in warmup_latency_ms.items()},
+        latency_budget_ms=G_VALUE_READY_LATENCY_MS
+    )
+
+@app.get("/metrics")
+async def metrics():
+    """Prediction batching histograms."""
+    return {"batcher": prediction_batcher.stats()}
+
+@app.post("/predict", response_model=GValueResponse)
+async def predict_g_value(request: GValueRequest):
+    """Predict G-value for a worker-order combination."""
+    return (await predict_g_value_batch(GValueBatchRequest(requests=[request]))).predictions[0]
+
+@app.post("/predict/batch", response_model=GValueBatchResponse)
+async def predict_g_value_batch(batch: GValueBatchRequest):
+    """Predict G-values for many worker-order combinations in one pass."""
+    current = _require_predictor()
+    try:
+        # Same cache keys as the full service, so replicas share its cached predictions
+        model_version = current.model_version
+        cache_keys = [
+            AsyncRedisService.get_g_value_cache_key(features_digest(request.features), model_version)
+            for request in batch.requests
+        ]
+        results: List[Optional[Dict[str, Any]]] = await AsyncRedisService.get_many(cache_keys)
+        misses = [i for i, result in enumerate(results) if not result]
+
+        if misses:
+            predictions = await prediction_batcher.predict_many([batch.requests[i].features for i in misses])
+            for i, (g_mean, g_var) in zip(misses, predictions):
+                results[i] = {"g_mean": g_mean, "g_var": g_var, "model_version": model_version}
+
+            # Cache the new results for 5 minutes
+            await AsyncRedisService.set_many({cache_keys[i]: results[i] for i in misses}, ttl=300)
+
+        return GValueBatchResponse(predictions=[GValueResponse(**result) for result in results])
+
+    except Exception as e:
+        print(f"Error in replica G-value prediction: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to predict G-values: {str(e)}"
+        )
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=5002)
@@ -2,7 +2,9 @@ from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from datetime import timedelta
 from app.models.schemas import LoginRequest, LoginResponse, ApiResponse
-from app.services.auth import authenticate_user, create_access_token, verify_token
+from app.services.auth import (
+    AUTH_REVOCATION_CHECK, authenticate_user, create_access_token, is_token_revoked, revoke_token, verify_token
+)
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 security = HTTPBearer()
@@ -29,15 +31,34 @@ async def login(login_request: LoginRequest):
         message="Login successful"
     )
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get current authenticated user from JWT token."""
     token = credentials.credentials
     payload = verify_token(token)
     email = payload.get("sub")
-    if email is None:
+    if email is None or await is_token_revoked(token):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
     return payload
+
+@router.post("/logout", response_model=ApiResponse)
+async def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict = Depends(get_current_user)
+):
+    """Revoke the current access token."""
+    if not AUTH_REVOCATION_CHECK:
+        # Other replicas would keep accepting the token, so don't report a logout that isn't enforced
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Token revocation is disabled (AUTH_REVOCATION_CHECK=false)"
+        )
+    if not await revoke_token(credentials.credentials, current_user):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Could not revoke token"
+        )
+    return ApiResponse(data=None, message="Logged out successfully")
@@ -1,12 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from datetime import datetime, timedelta
-from app.models.schemas import Earnings, CompletedJob, ApiResponse
+from typing import Any, Dict, List, Optional, Set, Tuple
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+from app.models.schemas import Earnings, CompletedJob, ApiResponse, PaginatedApiResponse
 from app.routers.auth import get_current_user
-from app.services.redis_client import RedisService
-import random
+from app.services.earnings_store import EARNINGS_WINDOW_DAYS, EarningsLedger, JobKey
+from app.services.job_history import JobHistory, job_history_store
+import base64
+import json
+import os
+import time
 
 router = APIRouter(prefix="/earnings", tags=["earnings"])
 
+# Completed jobs returned per page
+EARNINGS_PAGE_SIZE = int(os.getenv("EARNINGS_PAGE_SIZE", "20"))
+EARNINGS_PAGE_MAX_LIMIT = int(os.getenv("EARNINGS_PAGE_MAX_LIMIT", "100"))
+# Give each worker the mock job history the first time their earnings are read
+EARNINGS_SEED_MOCK_JOBS = os.getenv("EARNINGS_SEED_MOCK_JOBS", "true").lower() == "true"
+
+# Errors meaning the earnings ledger cannot be reached; the mock history is served instead
+LEDGER_UNAVAILABLE = (RedisConnectionError, RedisTimeoutError)
+
 # Mock completed jobs data
 MOCK_COMPLETED_JOBS = [
     {
@@ -51,52 +66,179 @@ MOCK_COMPLETED_JOBS = [
     }
 ]
 
-@router.get("/", response_model=ApiResponse)
-async def get_earnings(current_user: dict = Depends(get_current_user)):
-    """Get worker earnings data."""
+# Workers this process has already seeded the ledger for
+_seeded_workers: Set[str] = set()
+
+async def _seed_mock_jobs(worker_id: str):
+    """Seed the worker's ledger with the mock history, at most once per process."""
+    if not EARNINGS_SEED_MOCK_JOBS or worker_id in _seeded_workers:
+        return
+    await EarningsLedger.seed(worker_id, MOCK_COMPLETED_JOBS)
+    _seeded_workers.add(worker_id)
+
+def _mock_jobs_page(limit: int, after: Optional[JobKey] = None) -> Tuple[List[Dict[str, Any]], Optional[JobKey]]:
+    """A page of the mock history, newest first, shaped like EarningsLedger.jobs_page."""
+    keyed = sorted(
+        (((job["completed_at"].timestamp(), job["id"]), job) for job in MOCK_COMPLETED_JOBS),
+        key=lambda item: item[0], reverse=True
+    )
+    if after:
+        keyed = [(key, job) for key, job in keyed if key < after]
+    page = keyed[:limit]
+    jobs = [{**job, "completed_at": job["completed_at"].isoformat()} for _, job in page]
+    return jobs, page[-1][0] if len(keyed) > limit else None
+
+def _mock_summary(window_days: int = EARNINGS_WINDOW_DAYS) -> Dict[str, Any]:
+    """Totals over the mock history, as EarningsLedger.summary reports them."""
+    window_start = datetime.combine(datetime.now().date() - timedelta(days=window_days - 1), datetime.min.time())
+    return {
+        "total_earnings": sum(job["earnings"] for job in MOCK_COMPLETED_JOBS),
+        "weekly_earnings": sum(job["earnings"] for job in MOCK_COMPLETED_JOBS if job["completed_at"] >= window_start),
+        "completed_jobs_count": len(MOCK_COMPLETED_JOBS),
+    }
+
+def _mock_history() -> JobHistory:
+    """The mock history as a columnar JobHistory."""
+    jobs = sorted(MOCK_COMPLETED_JOBS, key=lambda job: job["completed_at"])
+    history = JobHistory()
+    history.append(
+        [job["completed_at"].timestamp() for job in jobs],
+        [job["earnings"] for job in jobs],
+        [job["g_value"] for job in jobs]
+    )
+    return history
+
+def _encode_cursor(key: JobKey) -> str:
+    """Opaque cursor resuming a job list after the given job."""
+    payload = json.dumps({"after": list(key)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str) -> JobKey:
+    """Decode a cursor, rejecting malformed ones."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        completed_at, job_id = payload["after"]
+        return float(completed_at), str(job_id)
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+@router.get("/", response_model=PaginatedApiResponse)
+async def get_earnings(
+    limit: int = Query(EARNINGS_PAGE_SIZE, ge=1, le=EARNINGS_PAGE_MAX_LIMIT, description="Completed jobs per page"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get worker earnings totals and the most recent completed jobs.
+
+    Totals are maintained as jobs complete, so this reads a fixed number of
+    values however long the worker's history is. Older jobs are fetched with
+    GET /earnings/jobs?cursor=next_cursor.
+    """
     try:
         worker_id = current_user.get("user_id", "worker-1")
-        cache_key = f"earnings:{worker_id}"
+        message = "Earnings retrieved successfully"
+        
+        try:
+            await _seed_mock_jobs(worker_id)
+            summary = await EarningsLedger.summary(worker_id)
+            completed_jobs, next_key = await EarningsLedger.jobs_page(worker_id, limit)
+        except LEDGER_UNAVAILABLE as e:
+            print(f"Earnings ledger unavailable, serving mock earnings: {e}")
+            summary = _mock_summary()
+            completed_jobs, next_key = _mock_jobs_page(limit)
+            message = "Earnings retrieved from mock data"
+        
+        earnings_data = Earnings(**summary, completed_jobs=completed_jobs)
         
-        # Check cache first
-        cached_earnings = RedisService.get(cache_key)
-        if cached_earnings:
-            return ApiResponse(data=cached_earnings, message="Earnings retrieved from cache")
+        return PaginatedApiResponse(
+            data=earnings_data,
+            message=message,
+            next_cursor=_encode_cursor(next_key) if next_key else None
+        )
+        
+    except Exception as e:
+        print(f"Error getting earnings: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve earnings"
+        )
+
+@router.get("/jobs", response_model=PaginatedApiResponse)
+async def get_completed_jobs(
+    limit: int = Query(EARNINGS_PAGE_SIZE, ge=1, le=EARNINGS_PAGE_MAX_LIMIT, description="Completed jobs per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get a page of the worker's completed jobs, newest first."""
+    try:
+        worker_id = current_user.get("user_id", "worker-1")
+        after = _decode_cursor(cursor) if cursor else None
+        message = "Completed jobs retrieved successfully"
         
-        # Calculate earnings
-        total_earnings = sum(job["earnings"] for job in MOCK_COMPLETED_JOBS)
+        try:
+            await _seed_mock_jobs(worker_id)
+            completed_jobs, next_key = await EarningsLedger.jobs_page(worker_id, limit, after)
+        except LEDGER_UNAVAILABLE as e:
+            print(f"Earnings ledger unavailable, serving mock jobs: {e}")
+            completed_jobs, next_key = _mock_jobs_page(limit, after)
+            message = "Completed jobs retrieved from mock data"
         
-        # Calculate weekly earnings (last 7 days)
-        week_ago = datetime.now() - timedelta(days=7)
-        weekly_jobs = [job for job in MOCK_COMPLETED_JOBS if job["completed_at"] >= week_ago]
-        weekly_earnings = sum(job["earnings"] for job in weekly_jobs)
+        return PaginatedApiResponse(
+            data=[CompletedJob(**job) for job in completed_jobs],
+            message=message,
+            next_cursor=_encode_cursor(next_key) if next_key else None
+        )
         
-        # Convert datetime objects to strings for JSON serialization
-        completed_jobs = []
-        for job in MOCK_COMPLETED_JOBS:
-            completed_jobs.append({
-                "id": job["id"],
-                "pickup": job["pickup"],
-                "dropoff": job["dropoff"],
-                "completed_at": job["completed_at"].isoformat(),
-                "earnings": job["earnings"],
-                "g_value": job["g_value"]
-            })
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error getting completed jobs: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve completed jobs"
+        )
+
+@router.get("/analytics", response_model=ApiResponse)
+async def get_earnings_analytics(
+    start: Optional[datetime] = Query(None, description="Window start (inclusive); omit for the first job"),
+    end: Optional[datetime] = Query(None, description="Window end (exclusive); omit for now"),
+    bucket_width: float = Query(0.1, gt=0, le=1, description="Width of the g_value buckets; must divide 1 (e.g. 0.1, 0.05, 0.25)"),
+    percentiles: List[float] = Query([50, 90, 99], description="Per-job earnings percentiles to report"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Earnings totals, per-job percentiles and earnings per g_value bucket over a time window."""
+    if any(not 0 <= q <= 100 for q in percentiles):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Percentiles must be between 0 and 100")
+    try:
+        worker_id = current_user.get("user_id", "worker-1")
+        message = "Earnings analytics retrieved successfully"
+        try:
+            await _seed_mock_jobs(worker_id)
+            history = await job_history_store.get(worker_id)
+        except LEDGER_UNAVAILABLE as e:
+            print(f"Earnings ledger unavailable, serving mock analytics: {e}")
+            history = _mock_history()
+            message = "Earnings analytics computed from mock data"
         
-        earnings_data = {
-            "total_earnings": total_earnings,
-            "weekly_earnings": weekly_earnings,
-            "completed_jobs": completed_jobs
+        # Queries run over columnar arrays, so years of history take milliseconds
+        start_time = time.perf_counter()
+        window_start = start.timestamp() if start else None
+        window_end = end.timestamp() if end else None
+        analytics = {
+            "start": start.isoformat() if start else None,
+            "end": end.isoformat() if end else None,
+            **history.range_sum(window_start, window_end),
+            "percentiles": history.percentiles(window_start, window_end, percentiles),
+            "g_value_buckets": history.earnings_by_g_value(window_start, window_end, bucket_width),
         }
+        analytics["query_ms"] = round((time.perf_counter() - start_time) * 1000, 3)
         
-        # Cache for 5 minutes
-        RedisService.set(cache_key, earnings_data, ttl=300)
-        
-        return ApiResponse(data=earnings_data, message="Earnings retrieved successfully")
+        return ApiResponse(data=analytics, message=message)
         
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
-        print(f"Error getting earnings: {e}")
+        print(f"Error getting earnings analytics: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to retrieve earnings"
+            detail="Failed to retrieve earnings analytics"
         )
@@ -1,14 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
-from app.models.schemas import Order, ApiResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from app.models.schemas import (
+    ApiResponse, CompleteOrderRequest, CreateOrderRequest, PaginatedApiResponse
+)
 from app.routers.auth import get_current_user
-from app.services.redis_client import RedisService
+from app.services.earnings_store import EarningsLedger, job_earnings
+from app.services.order_events import order_events
+from app.services.order_store import (
+    ALREADY_TAKEN, NOT_ACCEPTED, NOT_FOUND, NOT_OWNER, ORDER_SEARCH_RADIUS_KM, OrderRepository,
+    OrderStoreUnavailable, haversine_km, order_repository
+)
+from app.services.redis_client import AsyncRedisService
 from app.services.g_value_client import GValueClient
+import asyncio
+import base64
+import bisect
+import json
+import os
 import random
 import string
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
+# Orders scored per G-value fan-out when streaming
+ORDER_STREAM_CHUNK_SIZE = int(os.getenv("ORDER_STREAM_CHUNK_SIZE", "50"))
+ORDER_PAGE_MAX_LIMIT = int(os.getenv("ORDER_PAGE_MAX_LIMIT", "500"))
+
+# Seconds between keep-alive comments on an idle order feed
+ORDER_FEED_HEARTBEAT = float(os.getenv("ORDER_FEED_HEARTBEAT", "15"))
+
+# Orders are listed by (distance from the worker, id); distance is 0 without a location
+SortKey = Tuple[float, str]
+
 # Mock orders data
 MOCK_ORDERS = [
     {
@@ -16,6 +41,8 @@ MOCK_ORDERS = [
         "pickup": "123 Main St, Downtown",
         "dropoff": "456 Oak Ave, Uptown",
         "eta": 15,
+        "pickup_lat": 37.7749,
+        "pickup_lng": -122.4194,
         "status": "available"
     },
     {
@@ -23,6 +50,8 @@ MOCK_ORDERS = [
         "pickup": "789 Pine St, Midtown",
         "dropoff": "321 Elm St, Eastside",
         "eta": 25,
+        "pickup_lat": 37.7858,
+        "pickup_lng": -122.4064,
         "status": "available"
     },
     {
@@ -30,6 +59,8 @@ MOCK_ORDERS = [
         "pickup": "555 Broadway, Westside", 
         "dropoff": "777 Park Ave, Northside",
         "eta": 35,
+        "pickup_lat": 37.7694,
+        "pickup_lng": -122.4862,
         "status": "available"
     },
     {
@@ -37,6 +68,8 @@ MOCK_ORDERS = [
         "pickup": "999 University Blvd, Campus",
         "dropoff": "111 Tech Park, Innovation District",
         "eta": 20,
+        "pickup_lat": 37.8044,
+        "pickup_lng": -122.2712,
         "status": "available"
     },
     {
@@ -44,6 +77,8 @@ MOCK_ORDERS = [
         "pickup": "222 Market Square, Old Town",
         "dropoff": "333 Harbor View, Waterfront",
         "eta": 30,
+        "pickup_lat": 37.808,
+        "pickup_lng": -122.4177,
         "status": "available"
     }
 ]
@@ -52,51 +87,160 @@ def generate_random_order_id() -> str:
     """Generate a random order ID."""
     return ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
 
-@router.get("/", response_model=ApiResponse)
-async def get_orders(current_user: dict = Depends(get_current_user)):
-    """Get all available orders with G-value predictions."""
+def order_features(order: Dict[str, Any]) -> Dict[str, Any]:
+    """G-value model features for an order."""
+    return {
+        "pickup_location": order["pickup"],
+        "dropoff_location": order["dropoff"],
+        "eta": order["eta"],
+        "time_of_day": 14,  # Mock time
+        "day_of_week": 1,   # Mock day
+    }
+
+def _encode_cursor(area: Optional[str], key: SortKey) -> str:
+    """Opaque cursor resuming a listing after the given sort key."""
+    payload = json.dumps({"area": area, "after": list(key)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str, area: Optional[str]) -> SortKey:
+    """Decode a cursor, rejecting malformed ones and those issued for another search area."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        distance, order_id = payload["after"]
+        after = (float(distance), str(order_id))
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if payload.get("area") != area:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor does not match this search")
+    return after
+
+async def _candidate_keys(lat: Optional[float], lng: Optional[float], radius_km: float) -> List[SortKey]:
+    """Sort keys of every available order the worker may see, without loading the orders."""
+    if lat is not None and lng is not None:
+        matches = await order_repository.available_near_ids(lat, lng, radius_km)
+        return sorted((round(distance, 6), order_id) for order_id, distance in matches)
+    return [(0.0, order_id) for order_id in await order_repository.ids_by_status("available")]
+
+async def _score_orders(
+    worker_id: str,
+    keys: List[SortKey],
+    located: bool,
+    chunk_size: Optional[int] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """Load and score orders chunk by chunk, yielding each as soon as its G-value is known."""
+    chunk_size = chunk_size or max(len(keys), 1)
+    for start in range(0, len(keys), chunk_size):
+        chunk = keys[start:start + chunk_size]
+        distances = {order_id: distance for distance, order_id in chunk}
+        # Orders claimed since the keys were read are skipped
+        orders = {
+            order["id"]: order
+            for order in await order_repository.get_many([order_id for _, order_id in chunk])
+            if order["status"] == "available"
+        }
+        orders_features = {order_id: order_features(order) for order_id, order in orders.items()}
+        async for order_id, g_value in GValueClient.iter_g_value_predictions(worker_id, orders_features):
+            order = {
+                **orders[order_id],
+                "g_mean": g_value["g_mean"],
+                "g_var": g_value["g_var"],
+                "worker_id": None
+            }
+            if located:
+                order["distance_km"] = round(distances[order_id], 3)
+            yield order
+
+# Worker id sent with the shared feed re-scoring after model updates
+FEED_RESCORE_WORKER_ID = "order-feed"
+
+async def _rescore_feed_orders(order_ids: List[str]) -> Dict[str, Dict[str, float]]:
+    """Score the orders shown on this process's feeds once for all of them after a model update."""
+    orders = [order for order in await order_repository.get_many(order_ids) if order["status"] == "available"]
+    return {
+        order_id: {"g_mean": g_value["g_mean"], "g_var": g_value["g_var"]}
+        async for order_id, g_value in GValueClient.iter_g_value_predictions(
+            FEED_RESCORE_WORKER_ID, {order["id"]: order_features(order) for order in orders}
+        )
+    }
+
+order_events.set_rescorer(_rescore_feed_orders)
+
+@router.get("/", response_model=PaginatedApiResponse)
+async def get_orders(
+    lat: Optional[float] = Query(None, ge=-90, le=90, description="Worker latitude"),
+    lng: Optional[float] = Query(None, ge=-180, le=180, description="Worker longitude"),
+    radius_km: float = Query(ORDER_SEARCH_RADIUS_KM, gt=0, le=100, description="Search radius around the worker"),
+    limit: Optional[int] = Query(None, ge=1, le=ORDER_PAGE_MAX_LIMIT, description="Page size; omit for every order"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    stream: bool = Query(False, description="Stream orders as NDJSON as soon as they are scored"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get available orders with G-value predictions, limited to those near the worker when a location is given.
+
+    Pages are ordered by distance (then id) and resumed with an opaque cursor.
+    In streaming mode every order is written as one JSON line as soon as its
+    prediction finishes, and the next page's cursor is sent in X-Next-Cursor.
+    """
     try:
         # Get worker_id first
         worker_id = current_user.get("user_id", "worker-1")
+        located = lat is not None and lng is not None
+        area = OrderRepository.area_key(lat, lng, radius_km) if located else None
+        after = _decode_cursor(cursor, area) if cursor else None
+        paginated = limit is not None or cursor is not None
         
-        # Check cache first
-        cache_key = RedisService.get_orders_cache_key(worker_id)
-        cached_orders = RedisService.get(cache_key)
-        
-        if cached_orders:
-            return ApiResponse(data=cached_orders, message="Orders retrieved from cache")
-        
-        # Generate orders with G-value predictions
-        orders_with_g_values = []
-        
-        for order in MOCK_ORDERS:
-            if order["status"] == "available":
-                # Get G-value prediction
-                features = {
-                    "pickup_location": order["pickup"],
-                    "dropoff_location": order["dropoff"],
-                    "eta": order["eta"],
-                    "time_of_day": 14,  # Mock time
-                    "day_of_week": 1,   # Mock day
-                }
-                
-                g_value_result = GValueClient.get_g_value_prediction_sync(
-                    worker_id, order["id"], features
-                )
-                
-                order_with_g_value = {
-                    **order,
-                    "g_mean": g_value_result["g_mean"],
-                    "g_var": g_value_result["g_var"],
-                    "worker_id": None
-                }
-                orders_with_g_values.append(order_with_g_value)
+        # Check cache first for full listings; an entry is only valid for the area it was computed for.
+        # Keys carry the order set version, so any accept/complete/create invalidates them for every worker.
+        cache_key = None
+        if not paginated and not stream:
+            cache_key = AsyncRedisService.get_orders_cache_key(worker_id, await order_repository.version())
+            cached = await AsyncRedisService.get(cache_key)
+            if isinstance(cached, dict) and cached.get("area") == area:
+                return PaginatedApiResponse(data=cached["orders"], message="Orders retrieved from cache")
+        
+        # Only the requested page of candidate orders near the worker is loaded and scored
+        keys = await _candidate_keys(lat, lng, radius_km)
+        start = bisect.bisect_right(keys, after) if after else 0
+        end = start + limit if limit is not None else len(keys)
+        page = keys[start:end]
+        next_cursor = _encode_cursor(area, page[-1]) if page and end < len(keys) else None
         
-        # Cache the results for 2 minutes
-        RedisService.set(cache_key, orders_with_g_values, ttl=120)
+        if stream:
+            async def ndjson() -> AsyncIterator[bytes]:
+                try:
+                    async for order in _score_orders(worker_id, page, located, ORDER_STREAM_CHUNK_SIZE):
+                        yield (json.dumps(order) + "\n").encode("utf-8")
+                except Exception as e:
+                    # Headers are already sent, so the stream just ends early
+                    print(f"Error streaming orders: {e}")
+            
+            headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+            return StreamingResponse(ndjson(), media_type="application/x-ndjson", headers=headers)
         
-        return ApiResponse(data=orders_with_g_values, message="Orders retrieved successfully")
+        # Get G-value predictions for the page concurrently, then restore page order
+        position = {order_id: i for i, (_, order_id) in enumerate(page)}
+        orders_with_g_values = sorted(
+            [order async for order in _score_orders(worker_id, page, located)],
+            key=lambda order: position[order["id"]]
+        )
+        
+        # Cache full listings for 2 minutes
+        if cache_key is not None:
+            await AsyncRedisService.set(cache_key, {"area": area, "orders": orders_with_g_values}, ttl=120)
+        
+        return PaginatedApiResponse(
+            data=orders_with_g_values,
+            message="Orders retrieved successfully",
+            next_cursor=next_cursor
+        )
         
+    except HTTPException:
+        raise
+    except OrderStoreUnavailable:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Order store unavailable, try again"
+        )
     except Exception as e:
         print(f"Error getting orders: {e}")
         raise HTTPException(
@@ -104,23 +248,162 @@ async def get_orders(current_user: dict = Depends(get_current_user)):
             detail="Failed to retrieve orders"
         )
 
+def _sse(event: str, data: Any) -> bytes:
+    """Encode one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+
+@router.get("/feed")
+async def order_feed(
+    lat: Optional[float] = Query(None, ge=-90, le=90, description="Worker latitude"),
+    lng: Optional[float] = Query(None, ge=-180, le=180, description="Worker longitude"),
+    radius_km: float = Query(ORDER_SEARCH_RADIUS_KM, gt=0, le=100, description="Search radius around the worker"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Server-Sent Events feed of the worker's available orders.
+
+    Starts with a snapshot event holding every scored order, then sends
+    deltas: order_added, order_removed (taken by anyone on any replica) and
+    g_value_refresh (only orders whose prediction changed after a model
+    update; re-scored once per process for all feeds). A resync event means
+    events were lost; reconnect for a new snapshot.
+    """
+    worker_id = current_user.get("user_id", "worker-1")
+    located = lat is not None and lng is not None
+    # Order id -> (distance, g_mean, g_var) of everything the worker currently sees
+    visible: Dict[str, Tuple[float, float, float]] = {}
+    # Subscribe before taking the snapshot so no change falls in between
+    queue = order_events.subscribe(visible)
+    
+    async def events() -> AsyncIterator[bytes]:
+        def track(order: Dict[str, Any]):
+            visible[order["id"]] = (order.get("distance_km", 0.0), order["g_mean"], order["g_var"])
+        
+        try:
+            keys = await _candidate_keys(lat, lng, radius_km)
+            position = {order_id: i for i, (_, order_id) in enumerate(keys)}
+            snapshot = sorted(
+                [order async for order in _score_orders(worker_id, keys, located)],
+                key=lambda order: position[order["id"]]
+            )
+            for order in snapshot:
+                track(order)
+            yield _sse("snapshot", {"orders": snapshot})
+            
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=ORDER_FEED_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if event is None:
+                    yield _sse("resync", {})
+                    break
+                
+                if event["type"] == "order_added":
+                    order = event["order"]
+                    if order["id"] in visible:
+                        continue
+                    distance = 0.0
+                    if located:
+                        if order.get("pickup_lat") is None or order.get("pickup_lng") is None:
+                            continue
+                        distance = haversine_km(lat, lng, order["pickup_lat"], order["pickup_lng"])
+                        if distance > radius_km:
+                            continue
+                    async for scored in _score_orders(worker_id, [(distance, order["id"])], located):
+                        track(scored)
+                        yield _sse("order_added", scored)
+                
+                elif event["type"] == "order_removed":
+                    if visible.pop(event["order_id"], None) is not None:
+                        yield _sse("order_removed", {"order_id": event["order_id"], "status": event["status"]})
+                
+                elif event["type"] == "model_updated" and visible:
+                    # Scores were computed once for every feed; just diff them against what this one shows
+                    changed = []
+                    for order_id, g_value in event["scores"].items():
+                        shown = visible.get(order_id)
+                        if shown is not None and shown[1:] != (g_value["g_mean"], g_value["g_var"]):
+                            visible[order_id] = (shown[0], g_value["g_mean"], g_value["g_var"])
+                            changed.append({"id": order_id, **g_value})
+                    if changed:
+                        yield _sse("g_value_refresh", {"model_version": event["model_version"], "orders": changed})
+        except Exception as e:
+            print(f"Error in order feed: {e}")
+        finally:
+            order_events.unsubscribe(queue)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/", response_model=ApiResponse, status_code=status.HTTP_201_CREATED)
+async def create_order(order_request: CreateOrderRequest, current_user: dict = Depends(get_current_user)):
+    """Create an available order and announce it to connected workers."""
+    try:
+        order = await order_repository.add({
+            "id": generate_random_order_id(),
+            **order_request.model_dump(),
+            "status": "available",
+            "worker_id": None
+        })
+        await order_events.publish_order_added(order)
+        
+        return ApiResponse(data=order, message="Order created successfully")
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    except OrderStoreUnavailable:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Order store unavailable, try again"
+        )
+    except Exception as e:
+        print(f"Error creating order: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to create order"
+        )
+
 @router.post("/accept/{order_id}", response_model=ApiResponse)
 async def accept_order(order_id: str, current_user: dict = Depends(get_current_user)):
     """Accept an order."""
     try:
         worker_id = current_user.get("user_id", "worker-1")
         
-        # In a real app, this would update the database
-        # For now, we'll just invalidate the cache
-        cache_key = RedisService.get_orders_cache_key(worker_id)
-        RedisService.delete(cache_key)
+        # Claimed atomically, so concurrent accepts of one order have exactly one winner.
+        # Claims never fall back to local state; if Redis fails this is a 503 and the
+        # worker can retry (re-claiming an order it already holds succeeds).
+        outcome, order = await order_repository.claim(order_id, worker_id)
+        if outcome == NOT_FOUND:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Order not found"
+            )
+        if outcome == ALREADY_TAKEN:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Order already taken"
+            )
+        await order_events.publish_order_removed(order_id, "accepted", worker_id)
         
-        # Mock response
         return ApiResponse(
             data={"order_id": order_id, "status": "accepted", "worker_id": worker_id},
             message="Order accepted successfully"
         )
         
+    except HTTPException:
+        raise
+    except OrderStoreUnavailable:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Order store unavailable, try again"
+        )
     except Exception as e:
         print(f"Error accepting order: {e}")
         raise HTTPException(
@@ -129,22 +412,63 @@ async def accept_order(order_id: str, current_user: dict = Depends(get_current_u
         )
 
 @router.post("/complete/{order_id}", response_model=ApiResponse)
-async def complete_order(order_id: str, current_user: dict = Depends(get_current_user)):
-    """Mark an order as complete."""
+async def complete_order(
+    order_id: str,
+    completion: Optional[CompleteOrderRequest] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Mark an order as complete, feeding its realized G-value back to the model."""
     try:
         worker_id = current_user.get("user_id", "worker-1")
         
-        # In a real app, this would update the database
-        # For now, we'll just invalidate the cache
-        cache_key = RedisService.get_orders_cache_key(worker_id)
-        RedisService.delete(cache_key)
+        # Only the worker holding an accepted order can complete it, and only once,
+        # so earnings and observations below are recorded exactly once per job
+        outcome, order = await order_repository.complete(order_id, worker_id)
+        if outcome == NOT_FOUND:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Order not found"
+            )
+        if outcome == NOT_ACCEPTED:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Order is {order['status']}, not accepted"
+            )
+        if outcome == NOT_OWNER:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Order is accepted by another worker"
+            )
+        await order_events.publish_order_removed(order_id, "completed", worker_id)
+        
+        # Fold the job into the worker's running earnings totals
+        await EarningsLedger.record_job(worker_id, {
+            "id": order_id,
+            "pickup": order["pickup"],
+            "dropoff": order["dropoff"],
+            "completed_at": datetime.now(),
+            "earnings": job_earnings(order),
+            "g_value": completion.g_value if completion else None
+        })
+        
+        # Incrementally update the model with the observed outcome
+        if completion and completion.g_value is not None:
+            await GValueClient.record_observations(
+                [{"features": order_features(order), "g_value": completion.g_value}]
+            )
         
-        # Mock response
         return ApiResponse(
             data={"order_id": order_id, "status": "completed", "worker_id": worker_id},
             message="Order completed successfully"
         )
         
+    except HTTPException:
+        raise
+    except OrderStoreUnavailable:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Order store unavailable, try again"
+        )
     except Exception as e:
         print(f"Error completing order: {e}")
         raise HTTPException(
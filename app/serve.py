@@ -0,0 +1,125 @@
+"""
+Production entry point for the G-value service.
+
+Loads (or trains) the model once, then forks worker processes that all accept
+on one shared listening socket. Workers inherit the model copy-on-write, so
+adding workers adds CPU without adding a copy of the weights, and each worker
+pins torch to its share of the cores. Worker 0 owns the model: it alone
+applies observations, trains and writes the checkpoint. The other workers
+queue that work for it through Redis and reload the models it publishes.
+
+Run with:
+    python -m app.serve --workers 4 --port 5001
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+G_VALUE_WORKERS = int(os.getenv("G_VALUE_WORKERS", str(os.cpu_count() or 1)))
+# Torch intra-op threads per worker; 0 divides the cores evenly between workers
+G_VALUE_TORCH_THREADS = int(os.getenv("G_VALUE_TORCH_THREADS", "0"))
+
+def _bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def _run_worker(sock: socket.socket, worker_index: int, torch_threads: int, log_level: str):
+    """Serve the app on the shared socket; runs in a forked child and never returns."""
+    import torch
+    import uvicorn
+    import app.main as service
+
+    torch.set_num_threads(torch_threads)
+    # One owner, so concurrent updates never overwrite each other's checkpoint
+    service.G_VALUE_MODEL_OWNER = worker_index == 0
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    role = "model owner" if service.G_VALUE_MODEL_OWNER else "follower"
+    print(f"Worker {worker_index} (pid {os.getpid()}, {role}) serving with {torch_threads} torch thread(s)")
+
+    server = uvicorn.Server(uvicorn.Config(service.app, log_level=log_level))
+    try:
+        server.run(sockets=[sock])
+    finally:
+        os._exit(0)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the G-value service with pre-forked workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--workers", type=int, default=G_VALUE_WORKERS, help="Worker processes")
+    parser.add_argument("--torch-threads", type=int, default=G_VALUE_TORCH_THREADS, help="Torch threads per worker")
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    workers = max(args.workers, 1)
+    torch_threads = args.torch_threads or max((os.cpu_count() or 1) // workers, 1)
+    if workers > 1:
+        # Let workers pick up models trained or updated by their siblings
+        os.environ.setdefault("G_VALUE_MODEL_SYNC_INTERVAL", "5")
+
+    # Import the app and load the model before forking so workers share them
+    from app.services.gp_model import gp_predictor
+    import app.main  # noqa: F401
+
+    start_time = time.time()
+    if not gp_predictor.load_checkpoint():
+        gp_predictor.train_model()
+    print(f"Model {gp_predictor.model_version} loaded in {time.time() - start_time:.2f}s, forking {workers} worker(s)")
+
+    sock = _bind_socket(args.host, args.port, args.backlog)
+    # Keep the garbage collector from touching (and so copying) pages inherited from the parent
+    gc.collect()
+    gc.freeze()
+
+    children = {}
+
+    def spawn(worker_index: int):
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(sock, worker_index, torch_threads, args.log_level)
+        children[pid] = worker_index
+
+    for worker_index in range(workers):
+        spawn(worker_index)
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    # Supervise: restart workers that die unexpectedly until asked to stop
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        worker_index = children.pop(pid, None)
+        if worker_index is not None and not stopping:
+            print(f"Worker {worker_index} (pid {pid}) exited with status {status}, restarting")
+            time.sleep(1)
+            spawn(worker_index)
+    sock.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
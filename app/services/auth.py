@@ -1,15 +1,34 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
+from app.services.local_cache import LocalCache
+from app.services.redis_client import AsyncRedisService
+import hashlib
+import json
 import os
+import time
 
 # Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Verified token payloads are cached until the token expires, so repeat requests skip jwt.decode
+AUTH_TOKEN_CACHE_ENABLED = os.getenv("AUTH_TOKEN_CACHE_ENABLED", "true").lower() == "true"
+AUTH_TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_TOKEN_CACHE_MAX_ENTRIES", "10000"))
+# Check every request against tokens revoked through Redis (e.g. on logout)
+AUTH_REVOCATION_CHECK = os.getenv("AUTH_REVOCATION_CHECK", "false").lower() == "true"
+
+token_cache: Optional[LocalCache] = (
+    LocalCache(max_entries=AUTH_TOKEN_CACHE_MAX_ENTRIES) if AUTH_TOKEN_CACHE_ENABLED else None
+)
+revocation_stats = {"checks": 0, "revoked": 0, "errors": 0}
+# Tokens revoked through this replica: digest -> expiry timestamp. Checked on every
+# request, and unlike the payload cache never evicted before the token expires.
+_revoked_here: Dict[str, float] = {}
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -31,17 +50,91 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def token_digest(token: str) -> str:
+    """Digest identifying a token without keeping the token itself."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
 def verify_token(token: str) -> dict:
-    """Verify and decode a JWT token."""
+    """Verify and decode a JWT token, reusing the payload of a token verified before."""
+    digest = token_digest(token) if token_cache is not None else None
+    if digest is not None:
+        cached = token_cache.get(digest)
+        if cached is not None:
+            return json.loads(cached)
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _credentials_exception()
+    if digest is not None and "exp" in payload:
+        # Entries expire with the token; a non-positive TTL is not cached
+        token_cache.set(digest, json.dumps(payload), payload["exp"] - time.time())
+    return payload
+
+def _revoked_locally(digest: str) -> bool:
+    expires_at = _revoked_here.get(digest)
+    if expires_at is None:
+        return False
+    if expires_at <= time.time():
+        _revoked_here.pop(digest, None)
+        return False
+    return True
+
+async def is_token_revoked(token: str) -> bool:
+    """Whether a token was revoked on this replica or, with AUTH_REVOCATION_CHECK, on any replica.
+
+    The Redis lookup fails open if Redis is unavailable.
+    """
+    digest = token_digest(token)
+    if _revoked_locally(digest):
+        return True
+    if not AUTH_REVOCATION_CHECK:
+        return False
+    revocation_stats["checks"] += 1
+    try:
+        revoked = await AsyncRedisService.exists(AsyncRedisService.get_revoked_token_key(digest))
+    except Exception as e:
+        revocation_stats["errors"] += 1
+        print(f"Token revocation check error: {e}")
+        return False
+    if revoked:
+        revocation_stats["revoked"] += 1
+    return revoked
+
+async def revoke_token(token: str, payload: Dict[str, Any]) -> bool:
+    """Revoke a token everywhere until it would have expired anyway; returns False if Redis could not record it.
+
+    The token is rejected by this replica immediately either way.
+    """
+    digest = token_digest(token)
+    if token_cache is not None:
+        token_cache.delete(digest)
+    now = time.time()
+    expires_at = payload.get("exp", now)
+    ttl = int(expires_at - now) + 1
+    if ttl <= 0:
+        return True
+    for expired in [key for key, until in _revoked_here.items() if until <= now]:
+        del _revoked_here[expired]
+    _revoked_here[digest] = expires_at
+    try:
+        await AsyncRedisService.set_raw(AsyncRedisService.get_revoked_token_key(digest), "1", ttl=ttl)
+        return True
+    except Exception as e:
+        print(f"Token revocation error: {e}")
+        return False
+
+def get_token_cache_stats() -> Dict[str, Any]:
+    """Verified token cache counters and revocation checks."""
+    stats: Dict[str, Any] = {"enabled": False} if token_cache is None else {"enabled": True, **token_cache.stats()}
+    stats["revocation"] = {"enabled": AUTH_REVOCATION_CHECK, "revoked_here": len(_revoked_here), **revocation_stats}
+    return stats
 
 # Mock user database for prototype
 MOCK_USERS = {
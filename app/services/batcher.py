@@ -0,0 +1,167 @@
+import asyncio
+import bisect
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Micro-batching configuration
+G_VALUE_BATCHING = os.getenv("G_VALUE_BATCHING", "true").lower() == "true"
+G_VALUE_BATCH_MAX_SIZE = int(os.getenv("G_VALUE_BATCH_MAX_SIZE", "32"))
+G_VALUE_BATCH_MAX_WAIT_MS = float(os.getenv("G_VALUE_BATCH_MAX_WAIT_MS", "2.0"))
+
+Prediction = Tuple[Any, ...]  # one order's result from predict_batch, e.g. (g_mean, g_var)
+
+class Histogram:
+    """Fixed-bucket histogram; bucket i counts observations <= bounds[i], the last counts the rest."""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return counts per upper bound plus count, mean and max."""
+        labels = [str(bound) for bound in self.bounds] + ["+Inf"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+        }
+
+class PredictionBatcher:
+    """Coalesces concurrent prediction requests into batched model calls.
+
+    Requests queue up while the previous batch is being evaluated. A batch is
+    dispatched once it holds max_batch_size requests or its oldest request has
+    waited max_wait_ms, whichever comes first, and is evaluated off the event
+    loop with a single predict_batch call.
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[List[Dict[str, Any]]], List[Prediction]],
+        max_batch_size: int = G_VALUE_BATCH_MAX_SIZE,
+        max_wait_ms: float = G_VALUE_BATCH_MAX_WAIT_MS
+    ):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max(max_batch_size, 1)
+        self.max_wait_ms = max_wait_ms
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.batch_sizes = Histogram([1, 2, 4, 8, 16, 32, 64, 128])
+        self.queue_wait_ms = Histogram([0.5, 1, 2, 5, 10, 25, 50, 100])
+        self.compute_ms = Histogram([1, 2, 5, 10, 25, 50, 100, 250])
+        self.batches = 0
+        self.requests = 0
+
+    async def start(self):
+        """Start the dispatch loop on the running event loop."""
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop dispatching; requests still queued are failed."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._queue is not None and not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Prediction batcher stopped"))
+
+    async def predict(self, features: Dict[str, Any]) -> Prediction:
+        """Predict one order, sharing a model call with concurrent requests."""
+        return (await self.predict_many([features]))[0]
+
+    async def predict_many(self, features_list: List[Dict[str, Any]]) -> List[Prediction]:
+        """Predict several orders; they may be split across or merged into batches."""
+        if not features_list:
+            return []
+        if self._task is None:
+            # Not started (e.g. scripts): evaluate directly
+            return await asyncio.get_running_loop().run_in_executor(None, self.predict_batch, features_list)
+
+        loop = asyncio.get_running_loop()
+        now = time.perf_counter()
+        futures = []
+        for features in features_list:
+            future = loop.create_future()
+            self._queue.put_nowait((features, future, now))
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return batching configuration and batch size, queue wait and compute histograms."""
+        return {
+            "enabled": self._task is not None,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "requests": self.requests,
+            "batches": self.batches,
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+            "compute_ms": self.compute_ms.snapshot(),
+        }
+
+    async def _collect(self) -> List[Tuple[Dict[str, Any], asyncio.Future, float]]:
+        """Wait for the next request, then gather more until the batch is full or its deadline passes."""
+        batch = [await self._queue.get()]
+        deadline = batch[0][2] + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Requests cancelled while queued (e.g. client timeouts) are dropped
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                continue
+
+            dispatched_at = time.perf_counter()
+            for _, _, enqueued_at in batch:
+                self.queue_wait_ms.observe((dispatched_at - enqueued_at) * 1000)
+            self.batch_sizes.observe(len(batch))
+            self.batches += 1
+            self.requests += len(batch)
+
+            try:
+                results = await loop.run_in_executor(
+                    None, self.predict_batch, [features for features, _, _ in batch]
+                )
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.compute_ms.observe((time.perf_counter() - dispatched_at) * 1000)
+
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
@@ -0,0 +1,152 @@
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.services.redis_client import AsyncRedisService, CacheKeys
+
+# Pay for a completed job: a base fare plus a rate per minute of ETA
+EARNINGS_BASE_FARE = float(os.getenv("EARNINGS_BASE_FARE", "5.0"))
+EARNINGS_PER_MINUTE = float(os.getenv("EARNINGS_PER_MINUTE", "1.0"))
+# Days of daily buckets summed into the rolling earnings window
+EARNINGS_WINDOW_DAYS = int(os.getenv("EARNINGS_WINDOW_DAYS", "7"))
+
+# Records a completed job once: adds it to the job list and folds its pay into
+# the running totals and its day's bucket. Returns 0 if it was already recorded.
+RECORD_JOB_SCRIPT = """
+local totals_key, daily_key, jobs_key, details_key = unpack(KEYS)
+local job_id, completed_at, day, cents, details = unpack(ARGV)
+if redis.call('ZADD', jobs_key, 'NX', completed_at, job_id) == 0 then
+    return 0
+end
+redis.call('HSET', details_key, job_id, details)
+redis.call('HINCRBY', totals_key, 'earnings_cents', cents)
+redis.call('HINCRBY', totals_key, 'jobs', 1)
+redis.call('HINCRBY', daily_key, day, cents)
+return 1
+"""
+
+JobKey = Tuple[float, str]  # (completed_at timestamp, job id), newest first
+
+def job_earnings(order: Dict[str, Any]) -> float:
+    """Pay for completing an order."""
+    return round(EARNINGS_BASE_FARE + EARNINGS_PER_MINUTE * float(order.get("eta") or 0), 2)
+
+def _cents(amount: float) -> int:
+    return int(round(amount * 100))
+
+class EarningsLedger:
+    """Per-worker earnings kept up to date as jobs complete.
+
+    For each worker Redis holds running totals (integer cents and job count)
+    in a hash, a hash of per-day sums, a sorted set of job ids scored by
+    completion time and a hash of job details. Reading a summary costs one
+    round trip regardless of history length; job lists are fetched a page at
+    a time.
+    """
+
+    @staticmethod
+    async def record_job(worker_id: str, job: Dict[str, Any]) -> bool:
+        """Record a completed job ({id, pickup, dropoff, completed_at, earnings, g_value}); returns False if already recorded or on error."""
+        completed_at = job["completed_at"]
+        if isinstance(completed_at, datetime):
+            job = {**job, "completed_at": completed_at.isoformat()}
+        else:
+            completed_at = datetime.fromisoformat(completed_at)
+        try:
+            recorded = await _record_job_script(
+                keys=[
+                    CacheKeys.get_earnings_totals_key(worker_id),
+                    CacheKeys.get_earnings_daily_key(worker_id),
+                    CacheKeys.get_earnings_jobs_key(worker_id),
+                    CacheKeys.get_earnings_job_details_key(worker_id),
+                ],
+                args=[
+                    job["id"],
+                    completed_at.timestamp(),
+                    completed_at.date().isoformat(),
+                    _cents(job["earnings"]),
+                    json.dumps(job),
+                ]
+            )
+            return bool(recorded)
+        except Exception as e:
+            print(f"Error recording job {job['id']} for {worker_id}: {e}")
+            return False
+
+    @staticmethod
+    async def seed(worker_id: str, jobs: Iterable[Dict[str, Any]]) -> bool:
+        """Record initial jobs for a worker once; returns whether this call seeded them."""
+        if not await AsyncRedisService.set_raw(CacheKeys.get_earnings_seeded_key(worker_id), "1", only_if_absent=True):
+            return False
+        for job in jobs:
+            await EarningsLedger.record_job(worker_id, job)
+        return True
+
+    @staticmethod
+    async def summary(worker_id: str, window_days: int = EARNINGS_WINDOW_DAYS) -> Dict[str, Any]:
+        """Total earnings, job count and earnings over the last window_days days (today included)."""
+        today = datetime.now().date()
+        days = [(today - timedelta(days=offset)).isoformat() for offset in range(window_days)]
+        pipeline = AsyncRedisService.pipeline(transaction=False)
+        pipeline.hgetall(CacheKeys.get_earnings_totals_key(worker_id))
+        pipeline.hmget(CacheKeys.get_earnings_daily_key(worker_id), days)
+        totals, daily = await pipeline.execute()
+        return {
+            "total_earnings": int(totals.get("earnings_cents", 0)) / 100,
+            "weekly_earnings": sum(int(cents or 0) for cents in daily) / 100,
+            "completed_jobs_count": int(totals.get("jobs", 0)),
+        }
+
+    @staticmethod
+    async def jobs_page(worker_id: str, limit: int, after: Optional[JobKey] = None) -> Tuple[List[Dict[str, Any]], Optional[JobKey]]:
+        """Up to limit jobs, newest first, after the given key; returns them and the key to resume from."""
+        jobs_key = CacheKeys.get_earnings_jobs_key(worker_id)
+        max_score = after[0] if after else "+inf"
+        keys: List[JobKey] = []
+        offset = 0
+        # Jobs completed at the cursor's exact timestamp come back first and are skipped up to the cursor
+        while len(keys) <= limit:
+            batch = await AsyncRedisService.zrevrangebyscore_with_scores(jobs_key, max_score, "-inf", offset, limit + 1)
+            if not batch:
+                break
+            offset += len(batch)
+            keys.extend(
+                (score, job_id) for job_id, score in batch
+                if not (after and score == after[0] and job_id >= after[1])
+            )
+        page, more = keys[:limit], len(keys) > limit
+        if not page:
+            return [], None
+        details = await AsyncRedisService.hmget(
+            CacheKeys.get_earnings_job_details_key(worker_id), [job_id for _, job_id in page]
+        )
+        jobs = [json.loads(detail) for detail in details if detail]
+        return jobs, page[-1] if more else None
+
+    @staticmethod
+    async def count_jobs(worker_id: str) -> int:
+        """Number of jobs the worker has completed."""
+        return await AsyncRedisService.zcard(CacheKeys.get_earnings_jobs_key(worker_id))
+
+    @staticmethod
+    async def completed_at_rank(worker_id: str, rank: int) -> Optional[float]:
+        """Completion timestamp of the job at a rank in completion order (oldest first)."""
+        entries = await AsyncRedisService.zrange_with_scores(CacheKeys.get_earnings_jobs_key(worker_id), rank, rank)
+        return float(entries[0][1]) if entries else None
+
+    @staticmethod
+    async def jobs_by_rank(worker_id: str, start: int, stop: int) -> List[Dict[str, Any]]:
+        """Jobs ranked start..stop (inclusive) in completion order, oldest first, with completed_at_ts."""
+        entries = await AsyncRedisService.zrange_with_scores(CacheKeys.get_earnings_jobs_key(worker_id), start, stop)
+        if not entries:
+            return []
+        details = await AsyncRedisService.hmget(
+            CacheKeys.get_earnings_job_details_key(worker_id), [job_id for job_id, _ in entries]
+        )
+        return [
+            {**json.loads(detail), "completed_at_ts": float(score)}
+            for (_, score), detail in zip(entries, details) if detail
+        ]
+
+# Loaded into Redis on first use and then run by SHA
+_record_job_script = AsyncRedisService.register_script(RECORD_JOB_SCRIPT)
@@ -0,0 +1,95 @@
+import hashlib
+from typing import Dict, Any, Iterable, List, Mapping, Sequence
+import numpy as np
+
+# Order of the columns in the model's feature matrix
+FEATURE_NAMES = ["pickup_hash", "dropoff_hash", "eta", "time_of_day", "day_of_week", "distance"]
+
+# Raw order fields read by the feature pipeline, with defaults for missing values
+RAW_FEATURE_DEFAULTS = {
+    "pickup_location": "",
+    "dropoff_location": "",
+    "eta": 0,
+    "time_of_day": 12,
+    "day_of_week": 1,
+}
+
+# Normalization constants applied to the raw order features
+FEATURE_SCALES = {
+    "location_buckets": 1000.0,  # pickup/dropoff hash buckets
+    "eta": 60.0,  # minutes to hours
+    "time_of_day": 24.0,  # hour to 0-1
+    "day_of_week": 7.0,  # day to 0-1
+    "distance": 10.0,  # mock distance multiplier
+}
+
+def stable_hash(value: str, buckets: int = 1000) -> int:
+    """Hash a string into [0, buckets) identically in every process.
+
+    Python's built-in hash() is salted per process, so it cannot be used for
+    anything shared between uvicorn workers or stored in Redis.
+    """
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % buckets
+
+def extract_feature_vector(features: Dict[str, Any]) -> List[float]:
+    """Extract and normalize the model's feature vector for one order.
+
+    This is one row of extract_feature_matrix(), so single orders and batches
+    are always encoded the same way.
+    """
+    return extract_feature_matrix(records_to_columns([features]))[0].tolist()
+
+def hash_column(values: Iterable[Any], buckets: int = 1000) -> np.ndarray:
+    """stable_hash() over a column of strings, hashing each distinct value once."""
+    values = values.tolist() if isinstance(values, np.ndarray) else list(values)
+    # dict.fromkeys and map() iterate in C, so only the distinct values pay for hashing
+    lookup = {value: stable_hash(str(value), buckets) for value in dict.fromkeys(values)}
+    return np.fromiter(map(lookup.__getitem__, values), dtype=np.int64, count=len(values))
+
+def records_to_columns(features_list: Iterable[Mapping[str, Any]]) -> Dict[str, List[Any]]:
+    """Transpose per-order feature dicts into the columnar layout used by extract_feature_matrix."""
+    features_list = list(features_list)
+    return {
+        name: [features.get(name, default) for features in features_list]
+        for name, default in RAW_FEATURE_DEFAULTS.items()
+    }
+
+def extract_feature_matrix(columns: Mapping[str, Sequence[Any]]) -> np.ndarray:
+    """Extract and normalize the model's feature matrix for a columnar batch of orders.
+
+    columns maps raw field names to equal-length sequences (lists, arrays or
+    DataFrame columns); missing fields take their defaults. Returns an
+    [N, 6] float64 array in FEATURE_NAMES order.
+    """
+    n_rows = max((len(values) for values in columns.values()), default=0)
+
+    def numeric(name: str) -> np.ndarray:
+        if name not in columns:
+            return np.full(n_rows, RAW_FEATURE_DEFAULTS[name], dtype=np.float64)
+        return np.asarray(columns[name], dtype=np.float64)
+
+    def locations(name: str) -> np.ndarray:
+        if name not in columns:
+            return np.full(n_rows, stable_hash(RAW_FEATURE_DEFAULTS[name], buckets), dtype=np.int64)
+        return hash_column(columns[name], buckets)
+
+    buckets = int(FEATURE_SCALES["location_buckets"])
+    matrix = np.empty((n_rows, len(FEATURE_NAMES)), dtype=np.float64)
+    matrix[:, 0] = locations("pickup_location") / FEATURE_SCALES["location_buckets"]
+    matrix[:, 1] = locations("dropoff_location") / FEATURE_SCALES["location_buckets"]
+    matrix[:, 2] = numeric("eta") / FEATURE_SCALES["eta"]
+    matrix[:, 3] = numeric("time_of_day") / FEATURE_SCALES["time_of_day"]
+    matrix[:, 4] = numeric("day_of_week") / FEATURE_SCALES["day_of_week"]
+    matrix[:, 5] = np.abs(matrix[:, 0] - matrix[:, 1]) * FEATURE_SCALES["distance"]
+    return matrix
+
+def feature_digest(vector: Sequence[float]) -> str:
+    """Canonical digest of a feature vector, used to content-address predictions."""
+    # Fixed precision keeps the digest independent of float formatting quirks
+    canonical = ",".join(f"{float(value):.9g}" for value in vector)
+    return hashlib.sha256(canonical.encode("ascii")).hexdigest()[:32]
+
+def features_digest(features: Dict[str, Any]) -> str:
+    """Canonical digest of an order's raw features."""
+    return feature_digest(extract_feature_vector(features))
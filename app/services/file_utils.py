@@ -0,0 +1,18 @@
+import os
+import tempfile
+from typing import BinaryIO, Callable
+
+def write_atomic(path: str, write: Callable[[BinaryIO], None], prefix: str = ".tmp-"):
+    """Write a file through write(f) so readers see either the old file or the complete new one."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=prefix)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
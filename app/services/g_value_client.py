@@ -1,49 +1,368 @@
 import httpx
 import asyncio
-from typing import Dict, Any
-from app.services.redis_client import RedisService
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from app.services.features import features_digest, stable_hash
+from app.services.redis_client import AsyncRedisService
 import os
 
 G_VALUE_SERVICE_URL = os.getenv("G_VALUE_SERVICE_URL", "http://localhost:5001")
+G_VALUE_MAX_CONCURRENCY = int(os.getenv("G_VALUE_MAX_CONCURRENCY", "10"))
+G_VALUE_LATENCY_BUDGET = float(os.getenv("G_VALUE_LATENCY_BUDGET", "2.0"))  # seconds
+# Cache misses are scored through /predict/batch in chunks of this many orders
+G_VALUE_BATCH_SIZE = int(os.getenv("G_VALUE_BATCH_SIZE", "25"))
+
+# Shared connection pool configuration
+G_VALUE_TIMEOUT = float(os.getenv("G_VALUE_TIMEOUT", "10.0"))  # seconds
+G_VALUE_MAX_CONNECTIONS = int(os.getenv("G_VALUE_MAX_CONNECTIONS", "100"))
+G_VALUE_MAX_KEEPALIVE = int(os.getenv("G_VALUE_MAX_KEEPALIVE", "20"))
+G_VALUE_KEEPALIVE_EXPIRY = float(os.getenv("G_VALUE_KEEPALIVE_EXPIRY", "30.0"))  # seconds
+G_VALUE_HTTP2 = os.getenv("G_VALUE_HTTP2", "false").lower() == "true"
+
+class PoolMetrics:
+    """Request and connection counters for the shared G-value HTTP pool."""
+
+    def __init__(self):
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.new_connections = 0
+        self.reused_connections = 0
+        self.pool_wait_total = 0.0
+        self.pool_wait_max = 0.0
+
+    def request_started(self):
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def request_finished(self):
+        self.in_flight -= 1
+
+    def connection_acquired(self, wait: float, new_connection: bool):
+        self.pool_wait_total += wait
+        self.pool_wait_max = max(self.pool_wait_max, wait)
+        if new_connection:
+            self.new_connections += 1
+        else:
+            self.reused_connections += 1
+
+    def make_trace(self):
+        """Build an httpcore trace hook that records how long a request waited for a connection."""
+        start = time.perf_counter()
+        acquired = False
+
+        async def trace(event_name: str, info: Dict[str, Any]):
+            nonlocal acquired
+            if acquired:
+                return
+            # The first connection-level event marks the end of the pool wait
+            if event_name == "connection.connect_tcp.started":
+                acquired = True
+                self.connection_acquired(time.perf_counter() - start, new_connection=True)
+            elif event_name.endswith(".send_request_headers.started"):
+                acquired = True
+                self.connection_acquired(time.perf_counter() - start, new_connection=False)
+
+        return trace
+
+    def snapshot(self, transport: Optional[httpx.AsyncHTTPTransport] = None) -> Dict[str, Any]:
+        """Return the current pool metrics as a dict."""
+        acquired = self.new_connections + self.reused_connections
+        metrics = {
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "new_connections": self.new_connections,
+            "reused_connections": self.reused_connections,
+            "pool_wait_avg_ms": (self.pool_wait_total / acquired * 1000) if acquired else 0.0,
+            "pool_wait_max_ms": self.pool_wait_max * 1000,
+            "max_connections": G_VALUE_MAX_CONNECTIONS,
+            "max_keepalive_connections": G_VALUE_MAX_KEEPALIVE,
+            "http2": G_VALUE_HTTP2,
+        }
+        # httpcore does not expose pool state through httpx, so read it defensively
+        pool = getattr(transport, "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is not None:
+            metrics["connections_open"] = len(connections)
+            metrics["connections_idle"] = sum(1 for connection in connections if connection.is_idle())
+            metrics["connections_in_use"] = metrics["connections_open"] - metrics["connections_idle"]
+        return metrics
+
+pool_metrics = PoolMetrics()
+
+# Shared client, created and closed by the application lifespan
+_http_transport: Optional[httpx.AsyncHTTPTransport] = None
+_http_client: Optional[httpx.AsyncClient] = None
+
+def _create_http_client(http2: bool = G_VALUE_HTTP2) -> httpx.AsyncClient:
+    """Create a pooled HTTP client for the G-value service."""
+    global _http_transport
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            print("G_VALUE_HTTP2 is set but the h2 package is not installed, falling back to HTTP/1.1")
+            http2 = False
+    limits = httpx.Limits(
+        max_connections=G_VALUE_MAX_CONNECTIONS,
+        max_keepalive_connections=G_VALUE_MAX_KEEPALIVE,
+        keepalive_expiry=G_VALUE_KEEPALIVE_EXPIRY
+    )
+    _http_transport = httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+    return httpx.AsyncClient(
+        base_url=G_VALUE_SERVICE_URL,
+        transport=_http_transport,
+        timeout=G_VALUE_TIMEOUT
+    )
 
 class GValueClient:
+    @staticmethod
+    async def startup():
+        """Create the shared G-value HTTP client."""
+        global _http_client
+        if _http_client is None:
+            _http_client = _create_http_client()
+
+    @staticmethod
+    async def shutdown():
+        """Close the shared G-value HTTP client."""
+        global _http_client, _http_transport
+        if _http_client is not None:
+            await _http_client.aclose()
+            _http_client = None
+            _http_transport = None
+
+    @staticmethod
+    def get_pool_metrics() -> Dict[str, Any]:
+        """Get metrics for the shared G-value HTTP pool."""
+        return pool_metrics.snapshot(_http_transport)
+
+    @staticmethod
+    async def _post(path: str, payload: Dict[str, Any]) -> httpx.Response:
+        """POST to the G-value service through the shared pool."""
+        if _http_client is None:
+            # Outside the application lifespan (e.g. scripts) use a one-off client
+            async with httpx.AsyncClient(base_url=G_VALUE_SERVICE_URL, timeout=G_VALUE_TIMEOUT) as client:
+                return await client.post(path, json=payload)
+
+        pool_metrics.request_started()
+        try:
+            return await _http_client.post(
+                path,
+                json=payload,
+                extensions={"trace": pool_metrics.make_trace()}
+            )
+        finally:
+            pool_metrics.request_finished()
+
+    @staticmethod
+    async def _fetch_prediction(worker_id: str, order_id: str, features: Dict[str, Any]) -> Dict[str, float]:
+        """Call the G-value service for one prediction, bypassing the cache."""
+        response = await GValueClient._post(
+            "/predict",
+            {
+                "worker_id": worker_id,
+                "order_id": order_id,
+                "features": features
+            }
+        )
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    async def _fetch_predictions(
+        worker_id: str, orders_features: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, Dict[str, float]]:
+        """Call the G-value service once for a batch of predictions, bypassing the cache."""
+        order_ids = list(orders_features)
+        response = await GValueClient._post(
+            "/predict/batch",
+            {
+                "requests": [
+                    {"worker_id": worker_id, "order_id": order_id, "features": orders_features[order_id]}
+                    for order_id in order_ids
+                ]
+            }
+        )
+        response.raise_for_status()
+        return dict(zip(order_ids, response.json()["predictions"]))
+
+    @staticmethod
+    async def _get_model_version() -> Optional[str]:
+        """Get the model version the G-value service is currently serving, if published."""
+        return await AsyncRedisService.get(AsyncRedisService.get_model_version_key())
+
     @staticmethod
     async def get_g_value_prediction(worker_id: str, order_id: str, features: Dict[str, Any]) -> Dict[str, float]:
         """Get G-value prediction from the G-value service."""
-        cache_key = RedisService.get_g_value_cache_key(worker_id, order_id)
+        digest = features_digest(features)
         
-        # Check cache first
-        cached_result = RedisService.get(cache_key)
-        if cached_result:
-            return cached_result
+        # Check cache first (predictions are keyed by features and model version)
+        model_version = await GValueClient._get_model_version()
+        if model_version:
+            cached_result = await AsyncRedisService.get(
+                AsyncRedisService.get_g_value_cache_key(digest, model_version)
+            )
+            if cached_result:
+                return cached_result
         
         # If not in cache, call the G-value service
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    f"{G_VALUE_SERVICE_URL}/predict",
-                    json={
-                        "worker_id": worker_id,
-                        "order_id": order_id,
-                        "features": features
-                    }
+            result = await GValueClient._fetch_prediction(worker_id, order_id, features)
+            
+            # Cache the result for 5 minutes under the version that produced it
+            if result.get("model_version"):
+                await AsyncRedisService.set(
+                    AsyncRedisService.get_g_value_cache_key(digest, result["model_version"]),
+                    result,
+                    ttl=300
                 )
-                response.raise_for_status()
-                result = response.json()
-                
-                # Cache the result for 5 minutes
-                RedisService.set(cache_key, result, ttl=300)
-                
-                return result
+            
+            return result
         except Exception as e:
             print(f"G-value service error: {e}")
             # Return mock data if service is unavailable
-            return {
-                "g_mean": 0.5 + (hash(f"{worker_id}{order_id}") % 50) / 100,  # 0.5-1.0
-                "g_var": 0.1 + (hash(f"{order_id}") % 20) / 100  # 0.1-0.3
+            return GValueClient._fallback_prediction(worker_id, order_id)
+
+    @staticmethod
+    async def get_g_value_predictions(
+        worker_id: str,
+        orders_features: Dict[str, Dict[str, Any]],
+        max_concurrency: int = G_VALUE_MAX_CONCURRENCY,
+        latency_budget: float = G_VALUE_LATENCY_BUDGET,
+        batch_size: int = G_VALUE_BATCH_SIZE
+    ) -> Dict[str, Dict[str, float]]:
+        """Get G-value predictions for many orders concurrently within a latency budget."""
+        return {
+            order_id: result
+            async for order_id, result in GValueClient.iter_g_value_predictions(
+                worker_id, orders_features, max_concurrency, latency_budget, batch_size
+            )
+        }
+
+    @staticmethod
+    async def iter_g_value_predictions(
+        worker_id: str,
+        orders_features: Dict[str, Dict[str, Any]],
+        max_concurrency: int = G_VALUE_MAX_CONCURRENCY,
+        latency_budget: float = G_VALUE_LATENCY_BUDGET,
+        batch_size: int = G_VALUE_BATCH_SIZE
+    ) -> AsyncIterator[Tuple[str, Dict[str, float]]]:
+        """Yield (order_id, prediction) pairs as each prediction becomes available.
+
+        Cached predictions come first. Misses are sent to /predict/batch in
+        chunks of batch_size (up to max_concurrency chunks in flight) and each
+        chunk is yielded as it lands; orders still pending when the latency
+        budget runs out get the fallback.
+        """
+        if not orders_features:
+            return
+
+        # Resolve every cached prediction in a single round trip
+        order_ids = list(orders_features)
+        digests = {order_id: features_digest(orders_features[order_id]) for order_id in order_ids}
+        cached = {}
+        model_version = await GValueClient._get_model_version()
+        if model_version:
+            cached_results = await AsyncRedisService.get_many([
+                AsyncRedisService.get_g_value_cache_key(digests[order_id], model_version)
+                for order_id in order_ids
+            ])
+            cached = {
+                order_id: cached_result
+                for order_id, cached_result in zip(order_ids, cached_results)
+                if cached_result
             }
+        for order_id, cached_result in cached.items():
+            yield order_id, cached_result
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def predict(chunk: List[str]) -> Dict[str, Dict[str, float]]:
+            async with semaphore:
+                return await GValueClient._fetch_predictions(
+                    worker_id, {order_id: orders_features[order_id] for order_id in chunk}
+                )
+
+        misses = [order_id for order_id in order_ids if order_id not in cached]
+        if not misses:
+            return
+        batch_size = max(batch_size, 1)
+        tasks = {
+            asyncio.create_task(predict(chunk)): chunk
+            for chunk in (misses[start:start + batch_size] for start in range(0, len(misses), batch_size))
+        }
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + latency_budget
+        pending = set(tasks)
+        fetched = {}
+        try:
+            # Hand out each prediction as it lands, but never wait past the budget
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(deadline - loop.time(), 0), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                for task in done:
+                    if task.exception() is None:
+                        fetched.update(task.result())
+                        for order_id, result in task.result().items():
+                            yield order_id, result
+                    else:
+                        print(f"G-value service error: {task.exception()}")
+                        for order_id in tasks[task]:
+                            yield order_id, GValueClient._fallback_prediction(worker_id, order_id)
+            if pending:
+                late = sum(len(tasks[task]) for task in pending)
+                print(f"G-value budget of {latency_budget:.2f}s exceeded for {late} orders")
+            for task in pending:
+                task.cancel()
+                for order_id in tasks[task]:
+                    yield order_id, GValueClient._fallback_prediction(worker_id, order_id)
+        finally:
+            for task in pending:
+                task.cancel()
+            # Cache the fetched results for 5 minutes in one pipelined write
+            await AsyncRedisService.set_many(
+                {
+                    AsyncRedisService.get_g_value_cache_key(digests[order_id], result["model_version"]): result
+                    for order_id, result in fetched.items()
+                    if result.get("model_version")
+                },
+                ttl=300
+            )
+
+    @staticmethod
+    async def record_observations(observations: List[Dict[str, Any]]) -> bool:
+        """Send observed G-values ({"features", "g_value"}) to the service for online model updates."""
+        try:
+            response = await GValueClient._post("/observations", {"observations": observations})
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            print(f"Error recording G-value observations: {e}")
+            return False
+
+    @staticmethod
+    def _fallback_prediction(worker_id: str, order_id: str) -> Dict[str, float]:
+        """Mock G-value used when the G-value service is unavailable or too slow."""
+        return {
+            "g_mean": 0.5 + stable_hash(f"{worker_id}{order_id}", 50) / 100,  # 0.5-1.0
+            "g_var": 0.1 + stable_hash(f"{order_id}", 20) / 100  # 0.1-0.3
+        }
 
     @staticmethod
     def get_g_value_prediction_sync(worker_id: str, order_id: str, features: Dict[str, Any]) -> Dict[str, float]:
-        """Synchronous wrapper for G-value prediction."""
-        return asyncio.run(GValueClient.get_g_value_prediction(worker_id, order_id, features))
+        """Synchronous wrapper for G-value prediction (for scripts, not async handlers)."""
+        async def predict() -> Dict[str, float]:
+            try:
+                return await GValueClient.get_g_value_prediction(worker_id, order_id, features)
+            finally:
+                # Pooled connections are bound to this short-lived event loop
+                await AsyncRedisService.close()
+
+        return asyncio.run(predict())
@@ -1,151 +1,575 @@
 import torch
 import gpytorch
 import numpy as np
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Callable, List, Optional, Tuple
 import random
+import copy
+import hashlib
+import os
+import time
+from app.services.features import (
+    FEATURE_NAMES, FEATURE_SCALES, extract_feature_matrix, records_to_columns, stable_hash
+)
+from app.services.model_store import save_checkpoint, load_checkpoint
+from app.services.numpy_predictor import save_artifact
+
+# Version reported for predictions made without a trained model
+MOCK_MODEL_VERSION = "mock"
+
+# Checkpoint configuration
+G_VALUE_MODEL_PATH = os.getenv("G_VALUE_MODEL_PATH", os.path.join("models", "g_value_gp.ckpt"))
+G_VALUE_SAVE_CHECKPOINTS = os.getenv("G_VALUE_SAVE_CHECKPOINTS", "true").lower() == "true"
+
+# Torch-free inference artifact served by lightweight replicas (app.replica)
+G_VALUE_ARTIFACT_PATH = os.getenv("G_VALUE_ARTIFACT_PATH", os.path.join("models", "g_value_numpy"))
+
+# Model selection: "exact" GP, or "sparse" variational GP for large training sets
+G_VALUE_MODEL_TYPE = os.getenv("G_VALUE_MODEL_TYPE", "exact").lower()
+MODEL_TYPES = ("exact", "sparse")
+
+# Optimizer steps per training run (kept small for fast startup)
+TRAINING_ITERATIONS = int(os.getenv("G_VALUE_TRAINING_ITERATIONS", "50"))
+TRAINING_SAMPLES = int(os.getenv("G_VALUE_TRAINING_SAMPLES", "100"))
+
+# Sparse variational GP settings
+NUM_INDUCING_POINTS = int(os.getenv("G_VALUE_NUM_INDUCING", "64"))
+SPARSE_BATCH_SIZE = int(os.getenv("G_VALUE_SPARSE_BATCH_SIZE", "256"))
+SPARSE_EPOCHS = int(os.getenv("G_VALUE_SPARSE_EPOCHS", "20"))
+
+# Variational steps per online update of the sparse model
+ONLINE_SPARSE_STEPS = int(os.getenv("G_VALUE_ONLINE_SPARSE_STEPS", "10"))
+
+# Batch sizes exercised before a model starts serving, so its caches are warm
+WARMUP_BATCH_SIZES = [
+    int(size) for size in os.getenv("G_VALUE_WARMUP_BATCH_SIZES", "1,8,32").split(",") if size.strip()
+]
+WARMUP_ROUNDS = int(os.getenv("G_VALUE_WARMUP_ROUNDS", "3"))
+
+class ExactGPModel(gpytorch.models.ExactGP):
+    """Exact GP with a constant mean and a scaled RBF kernel."""
+    
+    def __init__(self, train_x, train_y, likelihood):
+        super(ExactGPModel, self).__init__(train_x, train_y, likelihood)
+        self.mean_module = gpytorch.means.ConstantMean()
+        self.covar_module = gpytorch.kernels.ScaleKernel(
+            gpytorch.kernels.RBFKernel()
+        )
+    
+    def forward(self, x):
+        mean_x = self.mean_module(x)
+        covar_x = self.covar_module(x)
+        return gpytorch.distributions.MultivariateNormal(mean_x, covar_x)
+
+class SparseGPModel(gpytorch.models.ApproximateGP):
+    """Sparse variational GP with learned inducing points; inference cost is independent of N."""
+    
+    def __init__(self, inducing_points):
+        variational_distribution = gpytorch.variational.CholeskyVariationalDistribution(
+            inducing_points.size(0)
+        )
+        variational_strategy = gpytorch.variational.VariationalStrategy(
+            self, inducing_points, variational_distribution, learn_inducing_locations=True
+        )
+        super(SparseGPModel, self).__init__(variational_strategy)
+        self.mean_module = gpytorch.means.ConstantMean()
+        self.covar_module = gpytorch.kernels.ScaleKernel(
+            gpytorch.kernels.RBFKernel()
+        )
+    
+    def forward(self, x):
+        mean_x = self.mean_module(x)
+        covar_x = self.covar_module(x)
+        return gpytorch.distributions.MultivariateNormal(mean_x, covar_x)
+
+class ModelState:
+    """Immutable snapshot of a trained model; swapped in as a whole so readers never see a mix."""
+    
+    __slots__ = ("model", "likelihood", "version", "model_type", "train_x", "train_y", "warmup_latency_ms")
+    
+    def __init__(
+        self,
+        model: gpytorch.models.GP,
+        likelihood: gpytorch.likelihoods.Likelihood,
+        version: str,
+        model_type: str,
+        train_x: torch.Tensor,
+        train_y: torch.Tensor,
+        warmup_latency_ms: Dict[int, float]
+    ):
+        self.model = model
+        self.likelihood = likelihood
+        self.version = version
+        self.model_type = model_type
+        self.train_x = train_x
+        self.train_y = train_y
+        self.warmup_latency_ms = warmup_latency_ms
 
 class GValuePredictor:
     """Gaussian Process model for G-value prediction."""
     
     def __init__(self):
-        self.model = None
-        self.likelihood = None
-        self.is_trained = False
+        self._state: Optional[ModelState] = None
+    
+    @property
+    def model(self) -> Optional[gpytorch.models.GP]:
+        state = self._state
+        return state.model if state else None
+    
+    @property
+    def likelihood(self) -> Optional[gpytorch.likelihoods.Likelihood]:
+        state = self._state
+        return state.likelihood if state else None
+    
+    @property
+    def is_trained(self) -> bool:
+        return self._state is not None
+    
+    @property
+    def model_version(self) -> str:
+        """Content-derived version of the current model, used to key cached predictions."""
+        state = self._state
+        return state.version if state else MOCK_MODEL_VERSION
+    
+    @property
+    def warmup_latency_ms(self) -> Dict[int, float]:
+        """Prediction latency per batch size measured while warming up the current model."""
+        state = self._state
+        return dict(state.warmup_latency_ms) if state else {}
+    
+    @property
+    def model_type(self) -> Optional[str]:
+        state = self._state
+        return state.model_type if state else None
+    
+    def _swap_state(
+        self,
+        model: gpytorch.models.GP,
+        likelihood: gpytorch.likelihoods.Likelihood,
+        version: str,
+        model_type: str,
+        train_x: torch.Tensor,
+        train_y: torch.Tensor
+    ):
+        """Atomically replace the model used for predictions."""
+        # Put the new model in evaluation mode and warm it up before anyone can see it
+        model.eval()
+        likelihood.eval()
+        warmup_latency_ms = self._warmup(model, likelihood)
+        self._state = ModelState(model, likelihood, version, model_type, train_x, train_y, warmup_latency_ms)
+    
+    def _warmup(self, model: gpytorch.models.GP, likelihood: gpytorch.likelihoods.Likelihood) -> Dict[int, float]:
+        """Run predictions at the served batch sizes, returning the settled latency of each in ms."""
+        latencies = {}
+        for batch_size in WARMUP_BATCH_SIZES:
+            X = torch.rand(batch_size, len(FEATURE_NAMES))
+            # The first round builds the kernel solve caches; later rounds measure steady state
+            for _ in range(max(WARMUP_ROUNDS, 1)):
+                start = time.perf_counter()
+                with torch.no_grad(), gpytorch.settings.fast_pred_var():
+                    likelihood(model(X)).variance
+                latencies[batch_size] = (time.perf_counter() - start) * 1000
+        return latencies
+    
+    def _compute_model_version(self, model: gpytorch.models.GP, X_train: torch.Tensor, y_train: torch.Tensor) -> str:
+        """Digest the trained parameters and training data into a version id."""
+        digest = hashlib.sha256()
+        for name, tensor in sorted(model.state_dict().items()):
+            digest.update(name.encode("utf-8"))
+            digest.update(tensor.detach().cpu().contiguous().numpy().tobytes())
+        digest.update(X_train.detach().cpu().contiguous().numpy().tobytes())
+        digest.update(y_train.detach().cpu().contiguous().numpy().tobytes())
+        return digest.hexdigest()[:16]
         
     def _extract_features(self, features: Dict[str, Any]) -> torch.Tensor:
         """Extract and normalize features for the model."""
-        # Convert features to a tensor
-        feature_vector = []
-        
-        # Location-based features (simplified)
-        pickup = features.get("pickup_location", "")
-        dropoff = features.get("dropoff_location", "")
-        
-        # Simple feature extraction (in production, use proper geocoding)
-        pickup_hash = hash(pickup) % 1000 / 1000.0
-        dropoff_hash = hash(dropoff) % 1000 / 1000.0
-        
-        # Time-based features
-        eta = features.get("eta", 0) / 60.0  # Normalize to hours
-        time_of_day = features.get("time_of_day", 12) / 24.0  # Normalize to 0-1
-        day_of_week = features.get("day_of_week", 1) / 7.0  # Normalize to 0-1
-        
-        # Distance estimation (simplified)
-        distance = abs(pickup_hash - dropoff_hash) * 10  # Mock distance
-        
-        feature_vector = [
-            pickup_hash,
-            dropoff_hash,
-            eta,
-            time_of_day,
-            day_of_week,
-            distance
-        ]
-        
-        return torch.tensor(feature_vector, dtype=torch.float32).unsqueeze(0)
+        return self._extract_features_batch([features])
+    
+    def _extract_features_batch(self, features_list: List[Dict[str, Any]]) -> torch.Tensor:
+        """Extract and normalize features for a batch of orders as an [N, 6] tensor."""
+        return self._extract_features_columns(records_to_columns(features_list))
+    
+    def _extract_features_columns(self, columns: Dict[str, Any]) -> torch.Tensor:
+        """Extract and normalize features for a columnar batch of orders as an [N, 6] tensor."""
+        return torch.from_numpy(extract_feature_matrix(columns)).to(torch.float32)
     
     def _generate_mock_training_data(self, n_samples: int = 100) -> Tuple[torch.Tensor, torch.Tensor]:
         """Generate mock training data for the GP model."""
         # Generate random features
-        X = torch.randn(n_samples, 6)  # 6 features
+        X = torch.randn(n_samples, len(FEATURE_NAMES))
         
         # Generate mock G-values with some structure
         # Higher G-values for certain combinations
-        g_values = []
-        for i in range(n_samples):
-            # Base G-value influenced by features
-            base_g = 0.3 + 0.4 * torch.sigmoid(X[i, 0] + X[i, 1])  # Location influence
-            time_bonus = 0.1 * torch.sin(X[i, 2] * np.pi)  # Time influence
-            distance_penalty = -0.05 * X[i, 5]  # Distance penalty
-            
-            g_value = base_g + time_bonus + distance_penalty + 0.1 * torch.randn(1)
-            g_value = torch.clamp(g_value, 0.1, 1.0)  # Clamp between 0.1 and 1.0
-            g_values.append(g_value)
+        base_g = 0.3 + 0.4 * torch.sigmoid(X[:, 0] + X[:, 1])  # Location influence
+        time_bonus = 0.1 * torch.sin(X[:, 2] * np.pi)  # Time influence
+        distance_penalty = -0.05 * X[:, 5]  # Distance penalty
         
-        y = torch.cat(g_values)
+        y = base_g + time_bonus + distance_penalty + 0.1 * torch.randn(n_samples)
+        y = torch.clamp(y, 0.1, 1.0)  # Clamp between 0.1 and 1.0
         return X, y
     
-    def train_model(self):
-        """Train the Gaussian Process model with mock data."""
-        try:
-            # Generate training data
-            X_train, y_train = self._generate_mock_training_data(100)
-            
-            # Define the GP model
-            class ExactGPModel(gpytorch.models.ExactGP):
-                def __init__(self, train_x, train_y, likelihood):
-                    super(ExactGPModel, self).__init__(train_x, train_y, likelihood)
-                    self.mean_module = gpytorch.means.ConstantMean()
-                    self.covar_module = gpytorch.kernels.ScaleKernel(
-                        gpytorch.kernels.RBFKernel()
-                    )
-                
-                def forward(self, x):
-                    mean_x = self.mean_module(x)
-                    covar_x = self.covar_module(x)
-                    return gpytorch.distributions.MultivariateNormal(mean_x, covar_x)
-            
-            # Initialize likelihood and model
-            self.likelihood = gpytorch.likelihoods.GaussianLikelihood()
-            self.model = ExactGPModel(X_train, y_train, self.likelihood)
-            
-            # Set to training mode
-            self.model.train()
-            self.likelihood.train()
-            
-            # Use Adam optimizer
-            optimizer = torch.optim.Adam(self.model.parameters(), lr=0.1)
-            
-            # Loss function
-            mll = gpytorch.mlls.ExactMarginalLogLikelihood(self.likelihood, self.model)
-            
-            # Training loop
-            for i in range(50):  # Reduced iterations for faster startup
+    def prepare_training_data(
+        self,
+        columns: Dict[str, Any],
+        g_values: Any
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Build (X, y) training tensors from columnar raw order features and observed G-values."""
+        X = self._extract_features_columns(columns)
+        y = torch.as_tensor(np.asarray(g_values, dtype=np.float32)).reshape(-1)
+        if X.size(0) != y.size(0):
+            raise ValueError(f"Got {X.size(0)} feature rows but {y.size(0)} G-values")
+        return X, y
+    
+    def _fit_exact(
+        self,
+        X_train: torch.Tensor,
+        y_train: torch.Tensor,
+        progress_callback: Optional[Callable[[int, int, float], None]] = None
+    ) -> Tuple[gpytorch.models.GP, gpytorch.likelihoods.Likelihood]:
+        """Fit an exact GP on the full training set (O(N^3) time, O(N^2) memory)."""
+        # Initialize likelihood and model
+        likelihood = gpytorch.likelihoods.GaussianLikelihood()
+        model = ExactGPModel(X_train, y_train, likelihood)
+        
+        # Set to training mode
+        model.train()
+        likelihood.train()
+        
+        # Use Adam optimizer
+        optimizer = torch.optim.Adam(model.parameters(), lr=0.1)
+        
+        # Loss function
+        mll = gpytorch.mlls.ExactMarginalLogLikelihood(likelihood, model)
+        
+        # Training loop
+        for i in range(TRAINING_ITERATIONS):
+            optimizer.zero_grad()
+            output = model(X_train)
+            loss = -mll(output, y_train)
+            loss.backward()
+            optimizer.step()
+            if progress_callback:
+                progress_callback(i + 1, TRAINING_ITERATIONS, loss.item())
+        
+        return model, likelihood
+    
+    def _fit_sparse(
+        self,
+        X_train: torch.Tensor,
+        y_train: torch.Tensor,
+        progress_callback: Optional[Callable[[int, int, float], None]] = None
+    ) -> Tuple[gpytorch.models.GP, gpytorch.likelihoods.Likelihood]:
+        """Fit a sparse variational GP in minibatches (O(N M^2) time per epoch)."""
+        # Start the inducing points on a random subset of the training inputs
+        num_inducing = min(NUM_INDUCING_POINTS, X_train.size(0))
+        inducing_points = X_train[torch.randperm(X_train.size(0))[:num_inducing]].clone()
+        
+        likelihood = gpytorch.likelihoods.GaussianLikelihood()
+        model = SparseGPModel(inducing_points)
+        
+        model.train()
+        likelihood.train()
+        
+        optimizer = torch.optim.Adam(
+            [{"params": model.parameters()}, {"params": likelihood.parameters()}], lr=0.05
+        )
+        mll = gpytorch.mlls.VariationalELBO(likelihood, model, num_data=y_train.size(0))
+        
+        loader = torch.utils.data.DataLoader(
+            torch.utils.data.TensorDataset(X_train, y_train),
+            batch_size=SPARSE_BATCH_SIZE,
+            shuffle=True
+        )
+        total_steps = SPARSE_EPOCHS * len(loader)
+        step = 0
+        for _ in range(SPARSE_EPOCHS):
+            for x_batch, y_batch in loader:
                 optimizer.zero_grad()
-                output = self.model(X_train)
-                loss = -mll(output, y_train)
+                output = model(x_batch)
+                loss = -mll(output, y_batch)
                 loss.backward()
                 optimizer.step()
+                step += 1
+                if progress_callback:
+                    progress_callback(step, total_steps, loss.item())
+        
+        return model, likelihood
+    
+    def train(
+        self,
+        checkpoint_path: str = G_VALUE_MODEL_PATH,
+        progress_callback: Optional[Callable[[int, int, float], None]] = None,
+        model_type: str = G_VALUE_MODEL_TYPE,
+        X_train: Optional[torch.Tensor] = None,
+        y_train: Optional[torch.Tensor] = None
+    ) -> str:
+        """Train a new model and swap it in, returning its version.
+        
+        Uses mock data unless a training set is given. The current model keeps
+        serving predictions until training finishes. Raises if training fails,
+        leaving the current model in place.
+        """
+        if model_type not in MODEL_TYPES:
+            raise ValueError(f"Unknown model type {model_type!r}, expected one of {MODEL_TYPES}")
+        
+        # Generate training data
+        if X_train is None or y_train is None:
+            X_train, y_train = self._generate_mock_training_data(TRAINING_SAMPLES)
+        
+        if model_type == "sparse":
+            model, likelihood = self._fit_sparse(X_train, y_train, progress_callback)
+        else:
+            model, likelihood = self._fit_exact(X_train, y_train, progress_callback)
+        
+        version = self._compute_model_version(model, X_train, y_train)
+        self._swap_state(model, likelihood, version, model_type, X_train, y_train)
+        print(f"GP model trained successfully ({model_type}, version {version})")
+        
+        if G_VALUE_SAVE_CHECKPOINTS and checkpoint_path:
+            self.save_checkpoint(checkpoint_path)
+        return version
+    
+    def training_data(self) -> Tuple[Optional[torch.Tensor], Optional[torch.Tensor]]:
+        """Get the inputs and targets the current model is conditioned on."""
+        state = self._state
+        return (state.train_x, state.train_y) if state else (None, None)
+    
+    def features_to_tensor(self, features_list: List[Dict[str, Any]]) -> torch.Tensor:
+        """Convert raw order features into model inputs."""
+        return self._extract_features_batch(features_list)
+    
+    def update(
+        self,
+        X_new: torch.Tensor,
+        y_new: torch.Tensor,
+        checkpoint_path: str = G_VALUE_MODEL_PATH
+    ) -> Tuple[str, float]:
+        """Condition the current model on new observations without refitting hyperparameters.
+        
+        The exact model is updated with a fantasy model, which reuses the cached
+        kernel solve; the sparse model takes a few variational steps. Returns the
+        new version and the mean squared standardized residual of the new points
+        under the previous model, which is ~1 while the hyperparameters still fit.
+        """
+        state = self._state
+        if state is None:
+            raise RuntimeError("No trained model to update")
+        
+        with torch.no_grad(), gpytorch.settings.fast_pred_var():
+            observed_pred = state.likelihood(state.model(X_new))
+            residuals = (y_new - observed_pred.mean) ** 2 / observed_pred.variance.clamp_min(1e-6)
+            drift = residuals.mean().item()
+        
+        if state.model_type == "sparse":
+            model, likelihood = self._update_sparse(state, X_new, y_new)
+        else:
+            with torch.no_grad():
+                model = state.model.get_fantasy_model(X_new, y_new)
+            likelihood = model.likelihood
+        
+        train_x = torch.cat([state.train_x, X_new])
+        train_y = torch.cat([state.train_y, y_new])
+        version = self._compute_model_version(model, train_x, train_y)
+        self._swap_state(model, likelihood, version, state.model_type, train_x, train_y)
+        
+        if G_VALUE_SAVE_CHECKPOINTS and checkpoint_path:
+            self.save_checkpoint(checkpoint_path)
+        return version, drift
+    
+    def _update_sparse(
+        self,
+        state: ModelState,
+        X_new: torch.Tensor,
+        y_new: torch.Tensor
+    ) -> Tuple[gpytorch.models.GP, gpytorch.likelihoods.Likelihood]:
+        """Take a few variational steps on the new points plus a replay sample of old ones."""
+        model = copy.deepcopy(state.model)
+        likelihood = copy.deepcopy(state.likelihood)
+        model.train()
+        likelihood.train()
+        
+        num_data = state.train_x.size(0) + X_new.size(0)
+        mll = gpytorch.mlls.VariationalELBO(likelihood, model, num_data=num_data)
+        # Only the variational posterior moves; hyperparameters wait for a full refit
+        optimizer = torch.optim.Adam(model.variational_parameters(), lr=0.05)
+        
+        replay_size = max(SPARSE_BATCH_SIZE - X_new.size(0), 0)
+        for _ in range(ONLINE_SPARSE_STEPS):
+            replay = torch.randint(0, state.train_x.size(0), (min(replay_size, state.train_x.size(0)),))
+            x_batch = torch.cat([X_new, state.train_x[replay]])
+            y_batch = torch.cat([y_new, state.train_y[replay]])
+            optimizer.zero_grad()
+            loss = -mll(model(x_batch), y_batch)
+            loss.backward()
+            optimizer.step()
+        
+        return model, likelihood
+    
+    def train_model(self, checkpoint_path: str = G_VALUE_MODEL_PATH, model_type: str = G_VALUE_MODEL_TYPE) -> bool:
+        """Train the Gaussian Process model with mock data and checkpoint it."""
+        try:
+            self.train(checkpoint_path, model_type=model_type)
+            return True
+        except Exception as e:
+            print(f"Error training GP model: {e}")
+            return False
+    
+    def save_checkpoint(self, path: str = G_VALUE_MODEL_PATH) -> bool:
+        """Save the trained model, its training data and feature constants to disk."""
+        state = self._state
+        if state is None:
+            return False
+        try:
+            checksum = save_checkpoint(path, {
+                "model_version": state.version,
+                "model_type": state.model_type,
+                "model_state": state.model.state_dict(),
+                "likelihood_state": state.likelihood.state_dict(),
+                "train_x": state.train_x,
+                "train_y": state.train_y,
+                "feature_names": FEATURE_NAMES,
+                "feature_scales": FEATURE_SCALES,
+            })
+            print(f"GP model checkpoint saved to {path} (sha256 {checksum[:12]})")
+            return True
+        except Exception as e:
+            print(f"Error saving GP model checkpoint: {e}")
+            return False
+    
+    def load_checkpoint(self, path: str = G_VALUE_MODEL_PATH) -> bool:
+        """Load a saved model instead of retraining; returns False if none is usable."""
+        if not os.path.exists(path):
+            return False
+        try:
+            start_time = time.time()
+            checkpoint = load_checkpoint(path)
             
-            self.is_trained = True
-            print("GP model trained successfully")
+            # A model is only valid for the feature pipeline it was trained with
+            if checkpoint["feature_names"] != FEATURE_NAMES or checkpoint["feature_scales"] != FEATURE_SCALES:
+                print(f"Ignoring GP model checkpoint {path}: feature pipeline has changed")
+                return False
             
+            model_type = checkpoint.get("model_type", "exact")
+            likelihood = gpytorch.likelihoods.GaussianLikelihood()
+            if model_type == "sparse":
+                inducing_points = checkpoint["model_state"]["variational_strategy.inducing_points"]
+                model = SparseGPModel(torch.zeros_like(inducing_points))
+            else:
+                model = ExactGPModel(checkpoint["train_x"], checkpoint["train_y"], likelihood)
+            model.load_state_dict(checkpoint["model_state"])
+            likelihood.load_state_dict(checkpoint["likelihood_state"])
+            
+            self._swap_state(
+                model, likelihood, checkpoint["model_version"], model_type,
+                checkpoint["train_x"], checkpoint["train_y"]
+            )
+            print(
+                f"GP model loaded from {path} in {(time.time() - start_time) * 1000:.1f}ms "
+                f"({model_type}, version {checkpoint['model_version']})"
+            )
+            return True
         except Exception as e:
-            print(f"Error training GP model: {e}")
-            self.is_trained = False
+            print(f"Error loading GP model checkpoint: {e}")
+            return False
+    
+    def export_numpy(self, path: str = G_VALUE_ARTIFACT_PATH) -> bool:
+        """Export the trained model as a NumPy-only inference artifact (see NumpyGPPredictor)."""
+        state = self._state
+        if state is None:
+            return False
+        try:
+            meta, arrays = self._numpy_artifact(state)
+            save_artifact(path, meta, arrays)
+            print(f"NumPy inference artifact written to {path} (version {state.version})")
+            return True
+        except Exception as e:
+            print(f"Error exporting NumPy inference artifact: {e}")
+            return False
+    
+    def _numpy_artifact(self, state: ModelState) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        """Precompute the anchors, solve vector and variance matrix of the predictive distribution."""
+        model = state.model
+        kernel = model.covar_module
+        noise = state.likelihood.noise.item()
+        with torch.no_grad():
+            if state.model_type == "sparse":
+                # Whitened variational posterior: u = L v with v ~ N(m, S), L = chol(Kuu)
+                strategy = model.variational_strategy
+                anchors = strategy.inducing_points.double()
+                Kuu = kernel(anchors).to_dense().double()
+                Kuu = Kuu + 1e-6 * torch.eye(Kuu.size(0), dtype=torch.float64)
+                L = torch.linalg.cholesky(Kuu)
+                distribution = strategy._variational_distribution
+                m = distribution.variational_mean.double()
+                S_chol = distribution.chol_variational_covar.double().tril()
+                S = S_chol @ S_chol.T
+                L_inv = torch.linalg.solve_triangular(L, torch.eye(L.size(0), dtype=torch.float64), upper=False)
+                alpha = L_inv.T @ m
+                var_matrix = L_inv.T @ (S - torch.eye(S.size(0), dtype=torch.float64)) @ L_inv
+            else:
+                anchors = state.train_x.double()
+                K = kernel(anchors).to_dense().double()
+                K = K + noise * torch.eye(K.size(0), dtype=torch.float64)
+                L = torch.linalg.cholesky(K)
+                residual = (state.train_y.double() - model.mean_module.constant.double()).unsqueeze(-1)
+                alpha = torch.cholesky_solve(residual, L).squeeze(-1)
+                var_matrix = -torch.cholesky_inverse(L)
+        
+        meta = {
+            "model_version": state.version,
+            "model_type": state.model_type,
+            "constant_mean": model.mean_module.constant.item(),
+            "outputscale": kernel.outputscale.item(),
+            "lengthscale": kernel.base_kernel.lengthscale.detach().reshape(-1).tolist(),
+            "noise": noise,
+            "feature_names": FEATURE_NAMES,
+            "feature_scales": FEATURE_SCALES,
+        }
+        arrays = {
+            "anchors": anchors.numpy(),
+            "alpha": alpha.numpy(),
+            "var_matrix": var_matrix.numpy(),
+        }
+        return meta, arrays
     
     def predict(self, features: Dict[str, Any]) -> Tuple[float, float]:
         """Make G-value prediction."""
+        return self.predict_batch([features])[0]
+    
+    def predict_batch(self, features_list: List[Dict[str, Any]]) -> List[Tuple[float, float]]:
+        """Make G-value predictions for a batch of orders in a single forward pass."""
+        return self._predict_batch(features_list)[0]
+    
+    def predict_batch_versioned(self, features_list: List[Dict[str, Any]]) -> List[Tuple[float, float, Optional[str]]]:
+        """predict_batch(), each prediction tagged with the version of the model that made it (None for mock fallbacks)."""
+        predictions, version = self._predict_batch(features_list)
+        return [(g_mean, g_var, version) for g_mean, g_var in predictions]
+    
+    def _predict_batch(self, features_list: List[Dict[str, Any]]) -> Tuple[List[Tuple[float, float]], Optional[str]]:
+        if not features_list:
+            return [], None
+        
         try:
-            if not self.is_trained:
-                self.train_model()
-            
-            if not self.is_trained:
+            # Read the model once so a concurrent hot-swap cannot change it mid-prediction
+            state = self._state
+            if state is None:
                 # Fallback to mock prediction
-                return self._mock_prediction(features)
+                return [self._mock_prediction(features) for features in features_list], None
             
             # Extract features
-            X = self._extract_features(features)
-            
-            # Set to evaluation mode
-            self.model.eval()
-            self.likelihood.eval()
+            X = self._extract_features_batch(features_list)
             
             # Make prediction
             with torch.no_grad(), gpytorch.settings.fast_pred_var():
-                observed_pred = self.likelihood(self.model(X))
-                mean = observed_pred.mean.item()
-                variance = observed_pred.variance.item()
-            
-            # Ensure reasonable bounds
-            mean = max(0.1, min(1.0, mean))
-            variance = max(0.01, min(0.5, variance))
+                observed_pred = state.likelihood(state.model(X))
+                # Ensure reasonable bounds
+                means = observed_pred.mean.clamp(0.1, 1.0).tolist()
+                variances = observed_pred.variance.clamp(0.01, 0.5).tolist()
             
-            return mean, variance
+            return list(zip(means, variances)), state.version
             
         except Exception as e:
             print(f"Error in GP prediction: {e}")
-            return self._mock_prediction(features)
+            return [self._mock_prediction(features) for features in features_list], None
     
     def _mock_prediction(self, features: Dict[str, Any]) -> Tuple[float, float]:
         """Generate mock G-value prediction when model fails."""
@@ -155,7 +579,7 @@ class GValuePredictor:
         eta = features.get("eta", 15)
         
         # Generate deterministic but varied values
-        seed = hash(f"{pickup}{dropoff}{eta}") % 1000
+        seed = stable_hash(f"{pickup}{dropoff}{eta}")
         random.seed(seed)
         
         # Base G-value influenced by ETA (shorter ETA = higher G-value)
@@ -172,3 +596,25 @@ class GValuePredictor:
 
 # Global instance
 gp_predictor = GValuePredictor()
+
+if __name__ == "__main__":
+    # Train offline and write a checkpoint the service can load at startup
+    import argparse
+    parser = argparse.ArgumentParser(description="Train the G-value GP model and save a checkpoint")
+    parser.add_argument("--output", default=G_VALUE_MODEL_PATH, help="Checkpoint path")
+    parser.add_argument("--model-type", default=G_VALUE_MODEL_TYPE, choices=MODEL_TYPES, help="GP model type")
+    parser.add_argument(
+        "--export-numpy", nargs="?", const=G_VALUE_ARTIFACT_PATH, default=None, metavar="DIR",
+        help="Also write a NumPy-only inference artifact for lightweight replicas"
+    )
+    parser.add_argument(
+        "--from-checkpoint", action="store_true",
+        help="Export from the existing checkpoint at --output instead of training"
+    )
+    args = parser.parse_args()
+    if args.from_checkpoint:
+        trained = gp_predictor.load_checkpoint(args.output)
+    else:
+        trained = gp_predictor.train_model(checkpoint_path=args.output, model_type=args.model_type)
+    if trained and args.export_numpy:
+        gp_predictor.export_numpy(args.export_numpy)
@@ -0,0 +1,327 @@
+import asyncio
+import bisect
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from app.services.earnings_store import EarningsLedger
+from app.services.file_utils import write_atomic
+
+# Rows per sealed chunk of a worker's job history
+JOB_HISTORY_CHUNK_SIZE = int(os.getenv("JOB_HISTORY_CHUNK_SIZE", "4096"))
+# Directory to persist histories in (one subdirectory per worker); empty keeps them in memory only
+JOB_HISTORY_PATH = os.getenv("JOB_HISTORY_PATH", "")
+JOB_HISTORY_MMAP = os.getenv("JOB_HISTORY_MMAP", "true").lower() == "true"
+# Jobs fetched from the earnings ledger per round trip while syncing
+JOB_HISTORY_SYNC_BATCH = int(os.getenv("JOB_HISTORY_SYNC_BATCH", "5000"))
+
+HISTORY_COLUMNS = ("timestamps", "earnings", "g_values")
+HISTORY_META = "meta.json"
+HISTORY_VERSION_PREFIX = "v-"
+
+Segment = Tuple[np.ndarray, np.ndarray, np.ndarray]  # timestamps, earnings, g_values
+
+class JobHistory:
+    """Columnar, time-ordered history of one worker's completed jobs.
+
+    Completion timestamps (epoch seconds), earnings and g_values (NaN when
+    unknown) are float64 columns. Rows are appended into a preallocated tail
+    chunk that is sealed once full, so appends never copy the history and
+    sealed chunks (including one memory-mapped from disk) are never modified.
+    Window queries binary-search the chunks and reduce only the rows inside.
+    """
+
+    def __init__(self, chunk_size: int = JOB_HISTORY_CHUNK_SIZE):
+        self.chunk_size = max(chunk_size, 1)
+        self._chunks: List[Segment] = []
+        self._chunk_starts: List[float] = []
+        self._tail: Segment = self._new_tail()
+        self._tail_len = 0
+        self._rows = 0
+
+    def __len__(self) -> int:
+        return self._rows
+
+    @property
+    def last_timestamp(self) -> Optional[float]:
+        if self._tail_len:
+            return float(self._tail[0][self._tail_len - 1])
+        return float(self._chunks[-1][0][-1]) if self._chunks else None
+
+    def append(self, timestamps: Sequence[float], earnings: Sequence[float], g_values: Sequence[float]):
+        """Append jobs; rows older than the newest stored job trigger a full re-sort."""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        earnings = np.asarray(earnings, dtype=np.float64)
+        g_values = np.asarray(g_values, dtype=np.float64)
+        if not len(timestamps):
+            return
+        order = np.argsort(timestamps, kind="stable")
+        timestamps, earnings, g_values = timestamps[order], earnings[order], g_values[order]
+
+        last = self.last_timestamp
+        if last is not None and timestamps[0] < last:
+            self._rebuild([*self._segments_all(), (timestamps, earnings, g_values)])
+            return
+
+        written = 0
+        while written < len(timestamps):
+            n = min(self.chunk_size - self._tail_len, len(timestamps) - written)
+            for column, values in zip(self._tail, (timestamps, earnings, g_values)):
+                column[self._tail_len:self._tail_len + n] = values[written:written + n]
+            self._tail_len += n
+            self._rows += n
+            written += n
+            if self._tail_len == self.chunk_size:
+                self._seal_tail()
+
+    def columns(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        names: Sequence[str] = HISTORY_COLUMNS
+    ) -> Tuple[np.ndarray, ...]:
+        """Contiguous copies of the named columns for the rows completed in [start, end)."""
+        indexes = [HISTORY_COLUMNS.index(name) for name in names]
+        segments = list(self._window(start, end))
+        if not segments:
+            return tuple(np.empty(0, dtype=np.float64) for _ in indexes)
+        return tuple(np.concatenate([segment[i] for segment in segments]) for i in indexes)
+
+    def range_sum(self, start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, Any]:
+        """Job count and earnings total in [start, end), without copying the rows."""
+        jobs = 0
+        total = 0.0
+        for timestamps, earnings, _ in self._window(start, end):
+            jobs += len(timestamps)
+            total += float(earnings.sum())
+        return {"jobs": jobs, "earnings": round(total, 2)}
+
+    def percentiles(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        percentiles: Sequence[float] = (50, 90, 99)
+    ) -> Dict[str, Optional[float]]:
+        """Per-job earnings percentiles in [start, end) (None for an empty window)."""
+        earnings, = self.columns(start, end, ("earnings",))
+        if not len(earnings):
+            return {f"p{q:g}": None for q in percentiles}
+        values = np.percentile(earnings, percentiles)
+        return {f"p{q:g}": round(float(value), 2) for q, value in zip(percentiles, values)}
+
+    def earnings_by_g_value(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        bucket_width: float = 0.1
+    ) -> Dict[str, Any]:
+        """Job counts and earnings per g_value bucket in [start, end); jobs without a g_value are counted apart.
+
+        bucket_width must split [0, 1] into whole buckets (0.1, 0.05, 0.25, ...);
+        anything else raises ValueError rather than silently using another width.
+        """
+        n_buckets = int(round(1.0 / bucket_width)) if bucket_width > 0 else 0
+        if n_buckets < 1 or abs(n_buckets * bucket_width - 1.0) > 1e-9:
+            raise ValueError(f"bucket_width must divide 1 into whole buckets, got {bucket_width}")
+        earnings, g_values = self.columns(start, end, ("earnings", "g_values"))
+        known = ~np.isnan(g_values)
+        edges = np.linspace(0.0, 1.0, n_buckets + 1)
+        # Out-of-range g_values land in the first or last bucket
+        buckets = np.clip((g_values[known] * n_buckets).astype(np.int64), 0, n_buckets - 1)
+        jobs = np.bincount(buckets, minlength=n_buckets)
+        totals = np.bincount(buckets, weights=earnings[known], minlength=n_buckets)
+        return {
+            "buckets": [
+                {
+                    "g_value_min": round(float(low), 6),
+                    "g_value_max": round(float(high), 6),
+                    "jobs": int(count),
+                    "earnings": round(float(total), 2),
+                }
+                for low, high, count, total in zip(edges[:-1], edges[1:], jobs, totals)
+            ],
+            "unknown_g_value": {
+                "jobs": int((~known).sum()),
+                "earnings": round(float(earnings[~known].sum()), 2),
+            },
+        }
+
+    def save(self, path: str):
+        """Write the history as one .npy file per column in a new version directory, then point meta.json at it.
+
+        Saved columns may be memory-mapped by a loaded history, and mapped
+        files cannot be replaced on Windows, so column files are never
+        overwritten. Versions no longer pointed to are removed once nothing
+        holds them open.
+        """
+        os.makedirs(path, exist_ok=True)
+        version_path = tempfile.mkdtemp(dir=path, prefix=HISTORY_VERSION_PREFIX)
+        for name, column in zip(HISTORY_COLUMNS, self.columns()):
+            write_atomic(os.path.join(version_path, f"{name}.npy"), lambda f: np.save(f, column))
+        version = os.path.basename(version_path)
+        write_atomic(
+            os.path.join(path, HISTORY_META),
+            lambda f: f.write(json.dumps({"rows": self._rows, "version": version}).encode("utf-8"))
+        )
+        _remove_old_versions(path, version)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True, chunk_size: int = JOB_HISTORY_CHUNK_SIZE) -> "JobHistory":
+        """Load a saved history as one sealed chunk, memory-mapped read-only unless mmap is False."""
+        with open(os.path.join(path, HISTORY_META)) as f:
+            meta = json.load(f)
+        rows = meta["rows"]
+        # Histories saved before versioning keep their columns next to meta.json
+        version_path = os.path.join(path, meta["version"]) if "version" in meta else path
+        columns = tuple(
+            np.load(os.path.join(version_path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+            for name in HISTORY_COLUMNS
+        )
+        # Columns newer than meta.json (an interrupted save) are cut back to the recorded rows
+        columns = tuple(column[:rows] for column in columns)
+        if any(len(column) != rows for column in columns):
+            raise ValueError(f"Job history at {path} is incomplete")
+        history = cls(chunk_size)
+        if rows:
+            history._chunks.append(columns)
+            history._chunk_starts.append(float(columns[0][0]))
+            history._rows = rows
+        return history
+
+    def _new_tail(self) -> Segment:
+        return tuple(np.empty(self.chunk_size, dtype=np.float64) for _ in HISTORY_COLUMNS)
+
+    def _seal_tail(self):
+        chunk = tuple(column[:self._tail_len] for column in self._tail)
+        self._chunks.append(chunk)
+        self._chunk_starts.append(float(chunk[0][0]))
+        self._tail = self._new_tail()
+        self._tail_len = 0
+
+    def _segments_all(self) -> Iterator[Segment]:
+        yield from self._chunks
+        if self._tail_len:
+            yield tuple(column[:self._tail_len] for column in self._tail)
+
+    def _rebuild(self, segments: List[Segment]):
+        timestamps, earnings, g_values = (np.concatenate(parts) for parts in zip(*segments))
+        self._chunks, self._chunk_starts = [], []
+        self._tail, self._tail_len, self._rows = self._new_tail(), 0, 0
+        self.append(timestamps, earnings, g_values)
+
+    def _window(self, start: Optional[float], end: Optional[float]) -> Iterator[Segment]:
+        """Slices (views) of every chunk holding rows in [start, end)."""
+        first = max(bisect.bisect_right(self._chunk_starts, start) - 1, 0) if start is not None else 0
+        for segment in list(self._segments_all())[first:]:
+            timestamps = segment[0]
+            if end is not None and timestamps[0] >= end:
+                break
+            lo = int(np.searchsorted(timestamps, start, side="left")) if start is not None else 0
+            hi = int(np.searchsorted(timestamps, end, side="left")) if end is not None else len(timestamps)
+            if hi > lo:
+                yield tuple(column[lo:hi] for column in segment)
+
+def _remove_old_versions(path: str, keep: str):
+    """Delete saved versions other than keep, leaving any still open (mapped on Windows) for a later save."""
+    for entry in os.listdir(path):
+        entry_path = os.path.join(path, entry)
+        try:
+            if entry.startswith(HISTORY_VERSION_PREFIX) and entry != keep:
+                shutil.rmtree(entry_path)
+            elif entry in {f"{name}.npy" for name in HISTORY_COLUMNS}:
+                os.remove(entry_path)
+        except OSError as e:
+            print(f"Could not remove old job history files {entry_path}: {e}")
+
+class JobHistoryStore:
+    """Per-worker job histories kept in step with the Redis earnings ledger.
+
+    A history is built from the ledger on first use (or loaded from
+    JOB_HISTORY_PATH) and afterwards only the jobs recorded since are fetched.
+    If the ledger gained jobs older than the newest one held here (a late
+    completion from another replica) the history is rebuilt.
+    """
+
+    def __init__(self, path: str = JOB_HISTORY_PATH, mmap: bool = JOB_HISTORY_MMAP):
+        self.path = path
+        self.mmap = mmap
+        self._histories: Dict[str, JobHistory] = {}
+        self._saved_rows: Dict[str, int] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def get(self, worker_id: str) -> JobHistory:
+        """The worker's history, synced with the ledger.
+
+        If the ledger cannot be read the history held locally is returned, or
+        the error raised when none is held.
+        """
+        lock = self._locks.setdefault(worker_id, asyncio.Lock())
+        async with lock:
+            history = self._histories.get(worker_id)
+            if history is None:
+                history = self._load(worker_id)
+                self._histories[worker_id] = history
+            try:
+                history = await self._sync(worker_id, history)
+            except Exception as e:
+                if not len(history):
+                    # Nothing held locally: let the caller decide rather than report no jobs
+                    raise
+                # Serve what is held locally while Redis is unavailable
+                print(f"Error syncing job history for {worker_id}: {e}")
+            self._maybe_save(worker_id, history)
+            return history
+
+    def flush(self):
+        """Persist every history that changed since it was last saved."""
+        for worker_id, history in self._histories.items():
+            self._maybe_save(worker_id, history, force=True)
+
+    async def _sync(self, worker_id: str, history: JobHistory) -> JobHistory:
+        total = await EarningsLedger.count_jobs(worker_id)
+        held = len(history)
+        if total == held:
+            return history
+        if held and (total < held or await EarningsLedger.completed_at_rank(worker_id, held - 1) != history.last_timestamp):
+            # Jobs were inserted before the newest one held (or removed): start over
+            history = JobHistory(history.chunk_size)
+            self._histories[worker_id] = history
+            self._saved_rows[worker_id] = 0
+            held = 0
+        for start in range(held, total, JOB_HISTORY_SYNC_BATCH):
+            jobs = await EarningsLedger.jobs_by_rank(worker_id, start, min(start + JOB_HISTORY_SYNC_BATCH, total) - 1)
+            history.append(
+                [job["completed_at_ts"] for job in jobs],
+                [job["earnings"] for job in jobs],
+                [np.nan if job.get("g_value") is None else job["g_value"] for job in jobs]
+            )
+        return history
+
+    def _history_path(self, worker_id: str) -> str:
+        return os.path.join(self.path, worker_id.replace(os.sep, "_"))
+
+    def _load(self, worker_id: str) -> JobHistory:
+        if self.path and os.path.exists(os.path.join(self._history_path(worker_id), HISTORY_META)):
+            try:
+                history = JobHistory.load(self._history_path(worker_id), mmap=self.mmap)
+                self._saved_rows[worker_id] = len(history)
+                return history
+            except Exception as e:
+                print(f"Error loading job history for {worker_id}, rebuilding it: {e}")
+        return JobHistory()
+
+    def _maybe_save(self, worker_id: str, history: JobHistory, force: bool = False):
+        # Rewriting the files is O(history), so wait for a chunk's worth of new jobs
+        unsaved = len(history) - self._saved_rows.get(worker_id, 0)
+        if not self.path or unsaved == 0 or (unsaved < history.chunk_size and not force):
+            return
+        try:
+            history.save(self._history_path(worker_id))
+            self._saved_rows[worker_id] = len(history)
+        except Exception as e:
+            print(f"Error saving job history for {worker_id}: {e}")
+
+# Global instance
+job_history_store = JobHistoryStore()
@@ -0,0 +1,39 @@
+import hashlib
+import io
+import os
+from typing import Any, Dict
+import torch
+from app.services.file_utils import write_atomic
+
+# Checkpoint files start with this magic line followed by the payload's SHA-256
+CHECKPOINT_MAGIC = b"GVALUE-CKPT-1"
+
+def save_checkpoint(path: str, payload: Dict[str, Any]) -> str:
+    """Atomically write a checksummed checkpoint and return its SHA-256."""
+    buffer = io.BytesIO()
+    torch.save(payload, buffer)
+    data = buffer.getvalue()
+    checksum = hashlib.sha256(data).hexdigest()
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # Write to a temporary file first so readers never see a partial checkpoint
+    write_atomic(
+        path,
+        lambda f: f.write(CHECKPOINT_MAGIC + b" " + checksum.encode("ascii") + b"\n" + data),
+        prefix=".ckpt-"
+    )
+    return checksum
+
+def load_checkpoint(path: str) -> Dict[str, Any]:
+    """Read a checkpoint, raising ValueError if it is malformed or fails its checksum."""
+    with open(path, "rb") as f:
+        header = f.readline().rstrip(b"\n")
+        data = f.read()
+
+    magic, _, checksum = header.partition(b" ")
+    if magic != CHECKPOINT_MAGIC:
+        raise ValueError(f"{path} is not a G-value checkpoint")
+    if hashlib.sha256(data).hexdigest().encode("ascii") != checksum:
+        raise ValueError(f"Checksum mismatch for checkpoint {path}")
+
+    return torch.load(io.BytesIO(data), weights_only=True)
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from app.services.features import FEATURE_NAMES, FEATURE_SCALES, extract_feature_matrix, records_to_columns
+from app.services.file_utils import write_atomic
+
+# Artifact layout: one .npy file per array plus meta.json, written last
+ARTIFACT_FORMAT = "gvalue-numpy-1"
+ARTIFACT_ARRAYS = ("anchors", "alpha", "var_matrix")
+ARTIFACT_META = "meta.json"
+
+# Same output bounds as GValuePredictor.predict_batch
+G_MEAN_BOUNDS = (0.1, 1.0)
+G_VAR_BOUNDS = (0.01, 0.5)
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def save_artifact(path: str, meta: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+    """Write an inference artifact directory.
+
+    Every array file is replaced atomically and meta.json, which records their
+    checksums, is replaced last, so a loader sees either the old or the new
+    artifact and can detect a mix of the two.
+    """
+    os.makedirs(path, exist_ok=True)
+    checksums = {}
+    for name in ARTIFACT_ARRAYS:
+        array_path = os.path.join(path, f"{name}.npy")
+        write_atomic(array_path, lambda f: np.save(f, np.ascontiguousarray(arrays[name], dtype=np.float64)))
+        checksums[name] = _file_sha256(array_path)
+    meta = {**meta, "format": ARTIFACT_FORMAT, "checksums": checksums}
+    write_atomic(
+        os.path.join(path, ARTIFACT_META),
+        lambda f: f.write(json.dumps(meta, indent=2, sort_keys=True).encode("utf-8"))
+    )
+
+class NumpyGPPredictor:
+    """Torch-free G-value predictor evaluated from an exported inference artifact.
+
+    A trained GP's predictive distribution reduces to
+        mean(x) = c + k(x) @ alpha
+        var(x)  = outputscale + sum((k(x) @ var_matrix) * k(x)) + noise
+    where k(x) is the scaled RBF kernel between x and the anchor points (the
+    training inputs of an exact GP, or the inducing points of a sparse one).
+    """
+
+    def __init__(self, meta: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+        self.meta = meta
+        self.anchors = arrays["anchors"]
+        self.alpha = arrays["alpha"]
+        self.var_matrix = arrays["var_matrix"]
+        self.model_version: str = meta["model_version"]
+        self.model_type: str = meta["model_type"]
+        self.constant_mean = float(meta["constant_mean"])
+        self.outputscale = float(meta["outputscale"])
+        self.noise = float(meta["noise"])
+        self.lengthscale = np.asarray(meta["lengthscale"], dtype=np.float64).reshape(-1)
+        # Anchors are pre-scaled once; queries are scaled per call
+        self._scaled_anchors = self.anchors / self.lengthscale
+        self._anchor_sq_norms = np.einsum("ij,ij->i", self._scaled_anchors, self._scaled_anchors)
+        self.warmup_latency_ms: Dict[int, float] = {}
+
+    @property
+    def is_trained(self) -> bool:
+        return True
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True, verify: bool = True) -> "NumpyGPPredictor":
+        """Load an artifact directory, memory-mapping its arrays by default."""
+        with open(os.path.join(path, ARTIFACT_META), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != ARTIFACT_FORMAT:
+            raise ValueError(f"Unsupported artifact format in {path}: {meta.get('format')}")
+        # A model is only valid for the feature pipeline it was trained with
+        if meta["feature_names"] != FEATURE_NAMES or meta["feature_scales"] != FEATURE_SCALES:
+            raise ValueError(f"Artifact {path} was exported for a different feature pipeline")
+
+        arrays = {}
+        for name in ARTIFACT_ARRAYS:
+            array_path = os.path.join(path, f"{name}.npy")
+            if verify and _file_sha256(array_path) != meta["checksums"][name]:
+                raise ValueError(f"Checksum mismatch for {array_path}")
+            arrays[name] = np.load(array_path, mmap_mode="r" if mmap else None)
+        return cls(meta, arrays)
+
+    def _kernel(self, X: np.ndarray) -> np.ndarray:
+        """Scaled RBF kernel between query rows and the anchor points."""
+        scaled = X / self.lengthscale
+        sq_dist = (
+            np.einsum("ij,ij->i", scaled, scaled)[:, None]
+            + self._anchor_sq_norms[None, :]
+            - 2.0 * scaled @ self._scaled_anchors.T
+        )
+        return self.outputscale * np.exp(-0.5 * np.maximum(sq_dist, 0.0))
+
+    def predict_matrix(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Predictive mean and variance (including noise) for an [N, 6] feature matrix."""
+        K = self._kernel(np.asarray(X, dtype=np.float64))
+        means = self.constant_mean + K @ self.alpha
+        variances = self.outputscale + np.einsum("ij,ij->i", K @ self.var_matrix, K) + self.noise
+        return means, np.maximum(variances, 0.0)
+
+    def predict(self, features: Dict[str, Any]) -> Tuple[float, float]:
+        """Make G-value prediction."""
+        return self.predict_batch([features])[0]
+
+    def predict_batch(self, features_list: List[Dict[str, Any]]) -> List[Tuple[float, float]]:
+        """Make G-value predictions for a batch of orders."""
+        if not features_list:
+            return []
+        means, variances = self.predict_matrix(extract_feature_matrix(records_to_columns(features_list)))
+        means = np.clip(means, *G_MEAN_BOUNDS).tolist()
+        variances = np.clip(variances, *G_VAR_BOUNDS).tolist()
+        return list(zip(means, variances))
+
+    def warmup(self, batch_sizes: List[int], rounds: int = 3) -> Dict[int, float]:
+        """Run predictions at the served batch sizes, returning the settled latency of each in ms."""
+        rng = np.random.default_rng()
+        latencies = {}
+        for batch_size in batch_sizes:
+            X = rng.random((batch_size, len(FEATURE_NAMES)))
+            for _ in range(max(rounds, 1)):
+                start = time.perf_counter()
+                self.predict_matrix(X)
+                latencies[batch_size] = (time.perf_counter() - start) * 1000
+        self.warmup_latency_ms = latencies
+        return latencies
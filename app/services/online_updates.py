@@ -0,0 +1,159 @@
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from app.services.features import records_to_columns
+from app.services.gp_model import GValuePredictor, gp_predictor
+from app.services.training import TrainingJob, TrainingManager, training_manager
+
+# Online update configuration
+G_VALUE_UPDATE_BATCH_SIZE = int(os.getenv("G_VALUE_UPDATE_BATCH_SIZE", "8"))
+G_VALUE_UPDATE_INTERVAL = float(os.getenv("G_VALUE_UPDATE_INTERVAL", "2.0"))  # seconds
+# Observations held while they cannot be applied (no model yet, failed updates); oldest dropped first
+G_VALUE_UPDATE_MAX_PENDING = int(os.getenv("G_VALUE_UPDATE_MAX_PENDING", "10000"))
+# Mean squared standardized residual above which hyperparameters are considered stale
+G_VALUE_DRIFT_THRESHOLD = float(os.getenv("G_VALUE_DRIFT_THRESHOLD", "4.0"))
+G_VALUE_DRIFT_MIN_OBSERVATIONS = int(os.getenv("G_VALUE_DRIFT_MIN_OBSERVATIONS", "32"))
+
+class OnlineUpdater:
+    """Buffers observed G-values and folds them into the model in small batches.
+
+    A batch is applied when it reaches the batch size or when the flush interval
+    elapses, whichever comes first. Each batch conditions the current model
+    instead of retraining it. A full refit is only scheduled once the new data
+    stops fitting the current hyperparameters.
+    """
+
+    def __init__(self, predictor: GValuePredictor, manager: TrainingManager):
+        self.predictor = predictor
+        self.manager = manager
+        self._buffer: List[Tuple[Dict[str, Any], float]] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._on_model_updated: Optional[Callable[[], Awaitable[None]]] = None
+        # Running drift statistics since the last full refit
+        self._drift_sum = 0.0
+        self._drift_count = 0
+        self.updates_applied = 0
+        self.observations_applied = 0
+        self.observations_dropped = 0
+        self.refits_triggered = 0
+        self.last_update_ms: Optional[float] = None
+
+    async def start(self, on_model_updated: Optional[Callable[[], Awaitable[None]]] = None):
+        """Start the background flush loop."""
+        self._on_model_updated = on_model_updated
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop, applying anything still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def add(self, observations: List[Tuple[Dict[str, Any], float]]) -> int:
+        """Buffer (features, g_value) observations, returning how many are pending."""
+        self._buffer.extend(observations)
+        self._trim_buffer()
+        if len(self._buffer) >= G_VALUE_UPDATE_BATCH_SIZE:
+            self._wakeup.set()
+        return len(self._buffer)
+
+    async def flush(self):
+        """Apply every buffered observation to the model now."""
+        if not self._buffer or not self.predictor.is_trained:
+            return
+        batch, self._buffer = self._buffer, []
+
+        try:
+            X_new, y_new = self.predictor.prepare_training_data(
+                records_to_columns(features for features, _ in batch), [g_value for _, g_value in batch]
+            )
+        except Exception as e:
+            # Malformed observations would fail the same way again
+            print(f"Dropping {len(batch)} observations that could not be encoded: {e}")
+            self.observations_dropped += len(batch)
+            return
+
+        start_time = time.perf_counter()
+        try:
+            # Runs on the training thread, so it never races a full retrain
+            version, drift = await asyncio.wrap_future(self.manager.submit_update(X_new, y_new))
+        except Exception as e:
+            print(f"Error applying online update, keeping {len(batch)} observations for the next flush: {e}")
+            # Ahead of anything buffered meanwhile, so observations stay in arrival order
+            self._buffer = batch + self._buffer
+            self._trim_buffer()
+            return
+        self.last_update_ms = (time.perf_counter() - start_time) * 1000
+        self.updates_applied += 1
+        self.observations_applied += len(batch)
+        print(f"Applied {len(batch)} observations in {self.last_update_ms:.1f}ms (version {version}, drift {drift:.2f})")
+
+        if self._on_model_updated:
+            await self._on_model_updated()
+
+        self._drift_sum += drift * len(batch)
+        self._drift_count += len(batch)
+        if self._drift_count >= G_VALUE_DRIFT_MIN_OBSERVATIONS and self.drift_score > G_VALUE_DRIFT_THRESHOLD:
+            self._schedule_refit()
+
+    @property
+    def drift_score(self) -> float:
+        """Mean squared standardized residual of observations since the last refit."""
+        return self._drift_sum / self._drift_count if self._drift_count else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return online update counters."""
+        return {
+            "pending_observations": len(self._buffer),
+            "updates_applied": self.updates_applied,
+            "observations_applied": self.observations_applied,
+            "observations_dropped": self.observations_dropped,
+            "last_update_ms": self.last_update_ms,
+            "drift_score": self.drift_score,
+            "drift_threshold": G_VALUE_DRIFT_THRESHOLD,
+            "refits_triggered": self.refits_triggered,
+        }
+
+    def _trim_buffer(self):
+        """Drop the oldest observations beyond G_VALUE_UPDATE_MAX_PENDING."""
+        excess = len(self._buffer) - G_VALUE_UPDATE_MAX_PENDING
+        if excess > 0:
+            print(f"Online update buffer full, dropping {excess} oldest observations")
+            del self._buffer[:excess]
+            self.observations_dropped += excess
+
+    def _schedule_refit(self):
+        """Refit hyperparameters on everything observed so far."""
+        loop = asyncio.get_running_loop()
+        on_model_updated = self._on_model_updated
+
+        def on_complete(job: TrainingJob):
+            if job.status == "succeeded" and on_model_updated:
+                asyncio.run_coroutine_threadsafe(on_model_updated(), loop)
+
+        job, started = self.manager.start(on_complete=on_complete, source="current")
+        if started:
+            print(f"Hyperparameter drift {self.drift_score:.2f} exceeds {G_VALUE_DRIFT_THRESHOLD}, refitting (job {job.id})")
+            self.refits_triggered += 1
+            self._drift_sum = 0.0
+            self._drift_count = 0
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=G_VALUE_UPDATE_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+# Global instance
+online_updater = OnlineUpdater(gp_predictor, training_manager)
@@ -0,0 +1,174 @@
+import asyncio
+import json
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import redis.asyncio as aioredis
+from app.services.redis_client import (
+    REDIS_CONNECT_TIMEOUT, REDIS_DB, REDIS_HOST, REDIS_PORT, AsyncRedisService, CacheKeys
+)
+
+# Events buffered per feed subscriber before it is considered too slow and dropped
+ORDER_FEED_QUEUE_SIZE = int(os.getenv("ORDER_FEED_QUEUE_SIZE", "256"))
+# Seconds to wait after a model update for further updates before re-scoring feeds once
+ORDER_FEED_RESCORE_DEBOUNCE = float(os.getenv("ORDER_FEED_RESCORE_DEBOUNCE", "1.0"))
+
+# Scores order ids ({id: {"g_mean", "g_var"}}) after a model update
+Rescorer = Callable[[List[str]], Awaitable[Dict[str, Dict[str, float]]]]
+
+class OrderEventBus:
+    """Fans order and model events out to every feed connection on every backend replica.
+
+    Each process holds one Redis subscription for the order events and model
+    update channels and copies incoming events into a bounded queue per
+    connected subscriber. A subscriber whose queue overflows is disconnected
+    (it receives None) and is expected to reconnect and resync.
+
+    Model updates are debounced and re-scored once per process: the orders
+    watched by any subscriber are scored together by the rescorer and every
+    subscriber receives the same model_updated event carrying the new scores.
+    """
+
+    def __init__(self):
+        # Subscriber queue -> the order ids it watches (a live mapping owned by the subscriber)
+        self._subscribers: Dict[asyncio.Queue, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._connected = False
+        self._rescorer: Optional[Rescorer] = None
+        self._rescore_task: Optional[asyncio.Task] = None
+        self._pending_model_version: Optional[str] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    async def start(self):
+        """Start relaying events published by any replica."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        """Stop relaying and disconnect local subscribers."""
+        if self._rescore_task is not None:
+            self._rescore_task.cancel()
+            self._rescore_task = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for queue in list(self._subscribers):
+            self._close(queue)
+
+    def set_rescorer(self, rescorer: Rescorer):
+        """Set how watched orders are scored after a model update."""
+        self._rescorer = rescorer
+
+    def subscribe(self, watched: Optional[Dict[str, Any]] = None) -> asyncio.Queue:
+        """Register a subscriber; events arrive on the returned queue, None means disconnected.
+
+        watched is keyed by the order ids whose scores the subscriber wants
+        after a model update; it is read (not copied) on every re-score.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=ORDER_FEED_QUEUE_SIZE)
+        self._subscribers[queue] = watched if watched is not None else {}
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.pop(queue, None)
+
+    async def publish_order_added(self, order: Dict[str, Any]):
+        """Announce a new available order."""
+        await self._publish({"type": "order_added", "order": order})
+
+    async def publish_order_removed(self, order_id: str, status: str, worker_id: Optional[str]):
+        """Announce that an order is no longer available (accepted or completed)."""
+        await self._publish({"type": "order_removed", "order_id": order_id, "status": status, "worker_id": worker_id})
+
+    async def _publish(self, event: Dict[str, Any]):
+        # Without a working subscription, deliver to this replica's subscribers directly
+        if not self._connected or not await AsyncRedisService.publish(CacheKeys.get_order_events_channel(), event):
+            self._dispatch(event)
+
+    def _dispatch(self, event: Dict[str, Any]):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                print("Order feed subscriber is too slow, disconnecting it")
+                self._close(queue)
+
+    def _model_updated(self, model_version: Optional[str]):
+        # Burst of updates: only the latest version is scored, once, after the burst settles
+        self._pending_model_version = model_version
+        if self._rescore_task is None:
+            self._rescore_task = asyncio.create_task(self._rescore())
+
+    async def _rescore(self):
+        try:
+            while True:
+                await asyncio.sleep(ORDER_FEED_RESCORE_DEBOUNCE)
+                model_version, self._pending_model_version = self._pending_model_version, None
+                order_ids = sorted({order_id for watched in self._subscribers.values() for order_id in watched})
+                scores: Dict[str, Dict[str, float]] = {}
+                if order_ids and self._rescorer is not None:
+                    try:
+                        scores = await self._rescorer(order_ids)
+                    except Exception as e:
+                        print(f"Error re-scoring order feeds: {e}")
+                self._dispatch({"type": "model_updated", "model_version": model_version, "scores": scores})
+                if self._pending_model_version is None:
+                    break
+        finally:
+            self._rescore_task = None
+
+    def _close(self, queue: asyncio.Queue):
+        self._subscribers.pop(queue, None)
+        # Make room for the disconnect marker
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    async def _listen(self):
+        """Relay events from Redis pub/sub until cancelled."""
+        # Pub/sub blocks on reads, so it gets its own connection without a socket timeout
+        subscriber = aioredis.Redis(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            db=REDIS_DB,
+            socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+            decode_responses=True
+        )
+        model_channel = CacheKeys.get_model_updates_channel()
+        try:
+            while True:
+                pubsub = subscriber.pubsub(ignore_subscribe_messages=True)
+                try:
+                    await pubsub.subscribe(CacheKeys.get_order_events_channel(), model_channel)
+                    self._connected = True
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        event = json.loads(message["data"])
+                        if message["channel"] == model_channel:
+                            self._model_updated(event.get("model_version"))
+                        else:
+                            self._dispatch(event)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"Order event listener error: {e}")
+                    self._connected = False
+                    # Events may have been missed while disconnected; make feeds resync
+                    for queue in list(self._subscribers):
+                        self._close(queue)
+                    await asyncio.sleep(1.0)
+                finally:
+                    self._connected = False
+                    await pubsub.aclose()
+        finally:
+            await subscriber.aclose()
+
+# Global instance
+order_events = OrderEventBus()
@@ -0,0 +1,667 @@
+import math
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from redis.exceptions import WatchError
+from app.services.redis_client import (
+    REDIS_INVALIDATION_CHANNEL, AsyncRedisService, CacheKeys, prefix_invalidation_message,
+    queue_prefix_invalidation
+)
+
+# Spatial index configuration
+ORDER_GRID_CELL_KM = float(os.getenv("ORDER_GRID_CELL_KM", "1.0"))
+ORDER_SEARCH_RADIUS_KM = float(os.getenv("ORDER_SEARCH_RADIUS_KM", "5.0"))
+
+# "redis" shares orders between backend replicas; "memory" keeps them in this process;
+# "auto" uses Redis unless it is unreachable at startup, then memory
+ORDER_STORE_BACKEND = os.getenv("ORDER_STORE_BACKEND", "auto").lower()
+ORDERS_SEEDED_KEY = "orders:seeded"
+
+# Outcomes of claiming an order
+CLAIMED = "claimed"
+ALREADY_TAKEN = "already_taken"
+NOT_FOUND = "not_found"
+# Outcomes of completing an order (plus NOT_FOUND)
+COMPLETED = "completed"
+NOT_ACCEPTED = "not_accepted"
+NOT_OWNER = "not_owner"
+
+# Claims an available order for a worker in one server-side step: checks the
+# status, moves the order between indexes, bumps the order set version and
+# announces the L1 invalidation. Returns {outcome, hash fields...}. Claiming an
+# order the worker already holds succeeds again without changes, so a claim
+# whose reply was lost can safely be retried.
+CLAIM_ORDER_SCRIPT = """
+local order_key, available_key, accepted_key, worker_key, geo_key, version_key = unpack(KEYS)
+local order_id, worker_id, channel, invalidation = unpack(ARGV)
+local status = redis.call('HGET', order_key, 'status')
+if not status then
+    return {'not_found'}
+end
+if status == 'accepted' and redis.call('HGET', order_key, 'worker_id') == worker_id then
+    return {'claimed', unpack(redis.call('HGETALL', order_key))}
+end
+if status ~= 'available' then
+    return {'already_taken', unpack(redis.call('HGETALL', order_key))}
+end
+redis.call('HSET', order_key, 'status', 'accepted', 'worker_id', worker_id)
+redis.call('SREM', available_key, order_id)
+redis.call('SADD', accepted_key, order_id)
+redis.call('SADD', worker_key, order_id)
+redis.call('ZREM', geo_key, order_id)
+redis.call('INCR', version_key)
+if invalidation ~= '' then
+    redis.call('PUBLISH', channel, invalidation)
+end
+return {'claimed', unpack(redis.call('HGETALL', order_key))}
+"""
+
+# Completes an accepted order for the worker holding it, in one server-side
+# step like CLAIM_ORDER_SCRIPT. Returns {outcome, hash fields...}.
+COMPLETE_ORDER_SCRIPT = """
+local order_key, accepted_key, completed_key, version_key = unpack(KEYS)
+local order_id, worker_id, channel, invalidation = unpack(ARGV)
+local status = redis.call('HGET', order_key, 'status')
+if not status then
+    return {'not_found'}
+end
+if status ~= 'accepted' then
+    return {'not_accepted', unpack(redis.call('HGETALL', order_key))}
+end
+if redis.call('HGET', order_key, 'worker_id') ~= worker_id then
+    return {'not_owner', unpack(redis.call('HGETALL', order_key))}
+end
+redis.call('HSET', order_key, 'status', 'completed')
+redis.call('SREM', accepted_key, order_id)
+redis.call('SADD', completed_key, order_id)
+redis.call('INCR', version_key)
+if invalidation ~= '' then
+    redis.call('PUBLISH', channel, invalidation)
+end
+return {'completed', unpack(redis.call('HGETALL', order_key))}
+"""
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = 111.32
+# Redis geo indexes only cover the Web Mercator latitude range
+GEO_MAX_LAT = 85.05112878
+
+def validate_location(lat: float, lng: float, max_lat: float = 90.0):
+    """Raise ValueError unless (lat, lng) is a coordinate within +-max_lat and +-180."""
+    if not (-max_lat <= lat <= max_lat and -180.0 <= lng <= 180.0):
+        raise ValueError(f"Location out of range: ({lat}, {lng})")
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in km."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+class OrderRecord:
+    """Compact order record; __slots__ keeps 100k+ live orders cheap to hold."""
+
+    __slots__ = ("id", "pickup", "dropoff", "eta", "pickup_lat", "pickup_lng", "status", "worker_id")
+
+    def __init__(
+        self,
+        id: str,
+        pickup: str,
+        dropoff: str,
+        eta: int,
+        pickup_lat: Optional[float] = None,
+        pickup_lng: Optional[float] = None,
+        status: str = "available",
+        worker_id: Optional[str] = None
+    ):
+        self.id = id
+        self.pickup = pickup
+        self.dropoff = dropoff
+        self.eta = eta
+        self.pickup_lat = pickup_lat
+        self.pickup_lng = pickup_lng
+        self.status = status
+        self.worker_id = worker_id
+
+    @property
+    def is_searchable(self) -> bool:
+        """Whether the order belongs in the spatial index of available orders."""
+        return self.status == "available" and self.pickup_lat is not None and self.pickup_lng is not None
+
+    @classmethod
+    def from_dict(cls, order: Dict[str, Any]) -> "OrderRecord":
+        return cls(**{name: order[name] for name in cls.__slots__ if name in order})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_hash(cls, order_id: str, fields: Dict[str, str]) -> "OrderRecord":
+        """Decode an order stored as a Redis hash (empty strings are missing values)."""
+        return cls(
+            id=order_id,
+            pickup=fields.get("pickup", ""),
+            dropoff=fields.get("dropoff", ""),
+            eta=int(fields.get("eta") or 0),
+            pickup_lat=float(fields["pickup_lat"]) if fields.get("pickup_lat") else None,
+            pickup_lng=float(fields["pickup_lng"]) if fields.get("pickup_lng") else None,
+            status=fields.get("status", "available"),
+            worker_id=fields.get("worker_id") or None
+        )
+
+    def to_hash(self) -> Dict[str, Any]:
+        """Encode as Redis hash fields."""
+        return {
+            name: "" if getattr(self, name) is None else getattr(self, name)
+            for name in self.__slots__ if name != "id"
+        }
+
+class GridIndex:
+    """Uniform lat/lng grid mapping cells to the ids of points inside them.
+
+    Cells are cell_km tall and the same number of degrees wide, so they get
+    narrower towards the poles; radius queries widen their longitude span to
+    compensate and then filter candidates by exact distance.
+    """
+
+    def __init__(self, cell_km: float = ORDER_GRID_CELL_KM):
+        self.cell_deg = cell_km / KM_PER_DEGREE_LAT
+        self._cells: Dict[Tuple[int, int], Set[str]] = {}
+        self._points: Dict[str, Tuple[float, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        """Grid cell containing a point."""
+        return math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg)
+
+    def insert(self, point_id: str, lat: float, lng: float):
+        """Add or move a point."""
+        validate_location(lat, lng)
+        self.remove(point_id)
+        self._points[point_id] = (lat, lng)
+        self._cells.setdefault(self.cell(lat, lng), set()).add(point_id)
+
+    def remove(self, point_id: str) -> bool:
+        """Drop a point, returning whether it was indexed."""
+        point = self._points.pop(point_id, None)
+        if point is None:
+            return False
+        key = self.cell(*point)
+        members = self._cells.get(key)
+        if members is not None:
+            members.discard(point_id)
+            if not members:
+                del self._cells[key]
+        return True
+
+    def within(self, lat: float, lng: float, radius_km: float) -> List[Tuple[str, float]]:
+        """(id, distance_km) of every point within radius_km, nearest first."""
+        lat_span = radius_km / KM_PER_DEGREE_LAT
+        # Degrees of longitude shrink with latitude; clamp near the poles
+        lng_span = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 1e-6))
+        min_i, min_j = self.cell(lat - lat_span, lng - lng_span)
+        max_i, max_j = self.cell(lat + lat_span, lng + lng_span)
+
+        matches = []
+        if (max_i - min_i + 1) * (max_j - min_j + 1) > len(self._cells):
+            # The query covers more cells than are occupied: walk the occupied ones instead
+            candidates = (
+                members for (i, j), members in self._cells.items()
+                if min_i <= i <= max_i and min_j <= j <= max_j
+            )
+        else:
+            candidates = (
+                self._cells[(i, j)]
+                for i in range(min_i, max_i + 1)
+                for j in range(min_j, max_j + 1)
+                if (i, j) in self._cells
+            )
+        for members in candidates:
+            for point_id in members:
+                point_lat, point_lng = self._points[point_id]
+                distance = haversine_km(lat, lng, point_lat, point_lng)
+                if distance <= radius_km:
+                    matches.append((point_id, distance))
+        matches.sort(key=lambda match: match[1])
+        return matches
+
+class OrderStore:
+    """In-memory orders with O(1) lookup by id, status and worker indexes, and a spatial index."""
+
+    def __init__(self, cell_km: float = ORDER_GRID_CELL_KM):
+        self._orders: Dict[str, OrderRecord] = {}
+        self._by_status: Dict[str, Set[str]] = {}
+        self._by_worker: Dict[str, Set[str]] = {}
+        self._available = GridIndex(cell_km)
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def seed(self, orders: Iterable[Dict[str, Any]]):
+        """Load initial orders."""
+        for order in orders:
+            self.add(order)
+
+    def add(self, order: Dict[str, Any]) -> Dict[str, Any]:
+        """Create or replace an order."""
+        record = OrderRecord.from_dict(order)
+        if record.is_searchable:
+            # Reject before touching any index so a bad order is never half-stored
+            validate_location(record.pickup_lat, record.pickup_lng)
+        with self._lock:
+            previous = self._orders.get(record.id)
+            if previous is not None:
+                self._unindex(previous)
+            self._orders[record.id] = record
+            self._index(record)
+            self._version += 1
+        return record.to_dict()
+
+    def version(self) -> int:
+        """Counter bumped on every change to the order set."""
+        return self._version
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """Get an order by id."""
+        record = self._orders.get(order_id)
+        return record.to_dict() if record else None
+
+    def update_status(self, order_id: str, status: str, worker_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Move an order to a new status; returns the updated order, or None if it does not exist."""
+        with self._lock:
+            record = self._orders.get(order_id)
+            if record is None:
+                return None
+            self._unindex(record)
+            record.status = status
+            record.worker_id = worker_id
+            self._index(record)
+            self._version += 1
+            return record.to_dict()
+
+    def claim(self, order_id: str, worker_id: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Accept an available order for a worker; returns the outcome and the order as it now stands."""
+        with self._lock:
+            record = self._orders.get(order_id)
+            if record is None:
+                return NOT_FOUND, None
+            if record.status == "accepted" and record.worker_id == worker_id:
+                return CLAIMED, record.to_dict()
+            if record.status != "available":
+                return ALREADY_TAKEN, record.to_dict()
+            self._unindex(record)
+            record.status = "accepted"
+            record.worker_id = worker_id
+            self._index(record)
+            self._version += 1
+            return CLAIMED, record.to_dict()
+
+    def complete(self, order_id: str, worker_id: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Complete an order the worker has accepted; returns the outcome and the order as it now stands."""
+        with self._lock:
+            record = self._orders.get(order_id)
+            if record is None:
+                return NOT_FOUND, None
+            if record.status != "accepted":
+                return NOT_ACCEPTED, record.to_dict()
+            if record.worker_id != worker_id:
+                return NOT_OWNER, record.to_dict()
+            self._unindex(record)
+            record.status = "completed"
+            self._index(record)
+            self._version += 1
+            return COMPLETED, record.to_dict()
+
+    def get_many(self, order_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get orders by id, in order, skipping unknown ids."""
+        with self._lock:
+            return [self._orders[order_id].to_dict() for order_id in order_ids if order_id in self._orders]
+
+    def ids_by_status(self, status: str) -> List[str]:
+        """Ids of the orders in a status, sorted."""
+        with self._lock:
+            return sorted(self._by_status.get(status, ()))
+
+    def by_status(self, status: str) -> List[Dict[str, Any]]:
+        """Orders in a status."""
+        with self._lock:
+            return [self._orders[order_id].to_dict() for order_id in self._by_status.get(status, ())]
+
+    def by_worker(self, worker_id: str) -> List[Dict[str, Any]]:
+        """Orders assigned to a worker."""
+        with self._lock:
+            return [self._orders[order_id].to_dict() for order_id in self._by_worker.get(worker_id, ())]
+
+    def available(self) -> List[Dict[str, Any]]:
+        """All available orders."""
+        return self.by_status("available")
+
+    def available_near_ids(self, lat: float, lng: float, radius_km: float = ORDER_SEARCH_RADIUS_KM) -> List[Tuple[str, float]]:
+        """(id, distance_km) of available orders with a pickup within radius_km, nearest first."""
+        with self._lock:
+            return self._available.within(lat, lng, radius_km)
+
+    def available_near(self, lat: float, lng: float, radius_km: float = ORDER_SEARCH_RADIUS_KM) -> List[Dict[str, Any]]:
+        """Available orders with a pickup within radius_km, nearest first, with their distance_km."""
+        with self._lock:
+            matches = self._available.within(lat, lng, radius_km)
+            return [
+                {**self._orders[order_id].to_dict(), "distance_km": round(distance, 3)}
+                for order_id, distance in matches
+            ]
+
+    def _index(self, record: OrderRecord):
+        self._by_status.setdefault(record.status, set()).add(record.id)
+        if record.worker_id:
+            self._by_worker.setdefault(record.worker_id, set()).add(record.id)
+        # Only available orders with a known pickup location are searchable
+        if record.is_searchable:
+            self._available.insert(record.id, record.pickup_lat, record.pickup_lng)
+
+    def _unindex(self, record: OrderRecord):
+        for index, key in ((self._by_status, record.status), (self._by_worker, record.worker_id)):
+            members = index.get(key)
+            if members is not None:
+                members.discard(record.id)
+                if not members:
+                    del index[key]
+        self._available.remove(record.id)
+
+class RedisOrderStore:
+    """Orders shared by all backend replicas.
+
+    Each order is a hash at order:{id}; set indexes hold the ids per status
+    and per assigned worker, and a geo index holds the pickup locations of
+    available orders. Status changes move an order between indexes in one
+    MULTI/EXEC transaction, which also bumps the orders:version counter that
+    order listing cache keys are tagged with.
+    """
+
+    @staticmethod
+    async def seed(orders: Iterable[Dict[str, Any]]) -> bool:
+        """Load initial orders unless another replica already has; returns whether this call seeded them."""
+        if not await AsyncRedisService.set_raw(ORDERS_SEEDED_KEY, "1", only_if_absent=True):
+            return False
+        pipeline = AsyncRedisService.pipeline(transaction=True)
+        for order in orders:
+            RedisOrderStore._queue_add(pipeline, OrderRecord.from_dict(order))
+        RedisOrderStore._queue_version_bump(pipeline)
+        await pipeline.execute()
+        return True
+
+    @staticmethod
+    async def add(order: Dict[str, Any]) -> Dict[str, Any]:
+        """Create an order."""
+        record = OrderRecord.from_dict(order)
+        pipeline = AsyncRedisService.pipeline(transaction=True)
+        RedisOrderStore._queue_add(pipeline, record)
+        RedisOrderStore._queue_version_bump(pipeline)
+        await pipeline.execute()
+        return record.to_dict()
+
+    @staticmethod
+    async def get(order_id: str) -> Optional[Dict[str, Any]]:
+        """Get an order by id."""
+        fields = await AsyncRedisService.hgetall(CacheKeys.get_order_key(order_id))
+        return OrderRecord.from_hash(order_id, fields).to_dict() if fields else None
+
+    @staticmethod
+    async def update_status(order_id: str, status: str, worker_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Move an order to a new status; returns the updated order, or None if it does not exist."""
+        key = CacheKeys.get_order_key(order_id)
+        async with AsyncRedisService.pipeline(transaction=True) as pipeline:
+            while True:
+                try:
+                    # Retry if the order changes between reading its indexes and moving it
+                    await pipeline.watch(key)
+                    fields = await pipeline.hgetall(key)
+                    if not fields:
+                        return None
+                    record = OrderRecord.from_hash(order_id, fields)
+                    pipeline.multi()
+                    pipeline.hset(key, mapping={"status": status, "worker_id": worker_id or ""})
+                    pipeline.srem(CacheKeys.get_order_status_key(record.status), order_id)
+                    pipeline.sadd(CacheKeys.get_order_status_key(status), order_id)
+                    if record.worker_id:
+                        pipeline.srem(CacheKeys.get_worker_orders_key(record.worker_id), order_id)
+                    if worker_id:
+                        pipeline.sadd(CacheKeys.get_worker_orders_key(worker_id), order_id)
+                    record.status = status
+                    record.worker_id = worker_id
+                    RedisOrderStore._queue_geo(pipeline, record)
+                    RedisOrderStore._queue_version_bump(pipeline)
+                    await pipeline.execute()
+                    return record.to_dict()
+                except WatchError:
+                    continue
+
+    @staticmethod
+    async def claim(order_id: str, worker_id: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Accept an available order for a worker in one atomic round trip; returns the outcome and the order.
+
+        Errors propagate: a timed out claim may have committed, so callers must
+        report failure (and may retry, which is idempotent) rather than guess.
+        """
+        result = await _claim_order_script(
+            keys=[
+                CacheKeys.get_order_key(order_id),
+                CacheKeys.get_order_status_key("available"),
+                CacheKeys.get_order_status_key("accepted"),
+                CacheKeys.get_worker_orders_key(worker_id),
+                CacheKeys.get_available_orders_geo_key(),
+                CacheKeys.get_orders_version_key(),
+            ],
+            args=[
+                order_id,
+                worker_id,
+                REDIS_INVALIDATION_CHANNEL,
+                prefix_invalidation_message([CacheKeys.get_orders_cache_prefix()]) or "",
+            ]
+        )
+        return RedisOrderStore._script_outcome(order_id, result)
+
+    @staticmethod
+    async def complete(order_id: str, worker_id: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Complete an order the worker has accepted in one atomic round trip; returns the outcome and the order."""
+        result = await _complete_order_script(
+            keys=[
+                CacheKeys.get_order_key(order_id),
+                CacheKeys.get_order_status_key("accepted"),
+                CacheKeys.get_order_status_key("completed"),
+                CacheKeys.get_orders_version_key(),
+            ],
+            args=[
+                order_id,
+                worker_id,
+                REDIS_INVALIDATION_CHANNEL,
+                prefix_invalidation_message([CacheKeys.get_orders_cache_prefix()]) or "",
+            ]
+        )
+        return RedisOrderStore._script_outcome(order_id, result)
+
+    @staticmethod
+    async def version() -> int:
+        """Counter bumped on every change to the order set."""
+        return int(await AsyncRedisService.get_raw(CacheKeys.get_orders_version_key()) or 0)
+
+    @staticmethod
+    async def ids_by_status(status: str) -> List[str]:
+        """Ids of the orders in a status, sorted."""
+        return sorted(await AsyncRedisService.smembers(CacheKeys.get_order_status_key(status)))
+
+    @staticmethod
+    async def by_status(status: str) -> List[Dict[str, Any]]:
+        """Orders in a status."""
+        return await RedisOrderStore.get_many(await RedisOrderStore.ids_by_status(status))
+
+    @staticmethod
+    async def by_worker(worker_id: str) -> List[Dict[str, Any]]:
+        """Orders assigned to a worker."""
+        order_ids = await AsyncRedisService.smembers(CacheKeys.get_worker_orders_key(worker_id))
+        return await RedisOrderStore.get_many(sorted(order_ids))
+
+    @staticmethod
+    async def available_near_ids(lat: float, lng: float, radius_km: float = ORDER_SEARCH_RADIUS_KM) -> List[Tuple[str, float]]:
+        """(id, distance_km) of available orders with a pickup within radius_km, nearest first."""
+        return await AsyncRedisService.geosearch_within(CacheKeys.get_available_orders_geo_key(), lat, lng, radius_km)
+
+    @staticmethod
+    async def available_near(lat: float, lng: float, radius_km: float = ORDER_SEARCH_RADIUS_KM) -> List[Dict[str, Any]]:
+        """Available orders with a pickup within radius_km, nearest first, with their distance_km."""
+        matches = await RedisOrderStore.available_near_ids(lat, lng, radius_km)
+        orders = await RedisOrderStore.get_many([order_id for order_id, _ in matches])
+        distances = {order_id: distance for order_id, distance in matches}
+        # An order claimed between the two reads is no longer available
+        return [
+            {**order, "distance_km": round(distances[order["id"]], 3)}
+            for order in orders if order["status"] == "available"
+        ]
+
+    @staticmethod
+    async def get_many(order_ids: List[str]) -> List[Dict[str, Any]]:
+        """Fetch orders in one pipelined round trip, skipping any that were deleted."""
+        if not order_ids:
+            return []
+        pipeline = AsyncRedisService.pipeline(transaction=False)
+        for order_id in order_ids:
+            pipeline.hgetall(CacheKeys.get_order_key(order_id))
+        results = await pipeline.execute()
+        return [
+            OrderRecord.from_hash(order_id, fields).to_dict()
+            for order_id, fields in zip(order_ids, results) if fields
+        ]
+
+    @staticmethod
+    def _script_outcome(order_id: str, result: List[str]) -> Tuple[str, Optional[Dict[str, Any]]]:
+        # Order scripts reply {outcome, hash fields...}
+        outcome, fields = result[0], result[1:]
+        if outcome == NOT_FOUND:
+            return NOT_FOUND, None
+        return outcome, OrderRecord.from_hash(order_id, dict(zip(fields[::2], fields[1::2]))).to_dict()
+
+    @staticmethod
+    def _queue_add(pipeline, record: OrderRecord):
+        # GEOADD errors inside MULTI/EXEC do not roll back the rest, so check before queuing anything
+        if record.is_searchable:
+            validate_location(record.pickup_lat, record.pickup_lng, GEO_MAX_LAT)
+        pipeline.hset(CacheKeys.get_order_key(record.id), mapping=record.to_hash())
+        pipeline.sadd(CacheKeys.get_order_status_key(record.status), record.id)
+        if record.worker_id:
+            pipeline.sadd(CacheKeys.get_worker_orders_key(record.worker_id), record.id)
+        RedisOrderStore._queue_geo(pipeline, record)
+
+    @staticmethod
+    def _queue_version_bump(pipeline):
+        # Listings cached under the old version become unreachable; in-process copies are evicted
+        pipeline.incr(CacheKeys.get_orders_version_key())
+        queue_prefix_invalidation(pipeline, [CacheKeys.get_orders_cache_prefix()])
+
+    @staticmethod
+    def _queue_geo(pipeline, record: OrderRecord):
+        geo_key = CacheKeys.get_available_orders_geo_key()
+        if record.is_searchable:
+            pipeline.geoadd(geo_key, (record.pickup_lng, record.pickup_lat, record.id))
+        else:
+            pipeline.zrem(geo_key, record.id)
+
+# Loaded into Redis on first use and then run by SHA
+_claim_order_script = AsyncRedisService.register_script(CLAIM_ORDER_SCRIPT)
+_complete_order_script = AsyncRedisService.register_script(COMPLETE_ORDER_SCRIPT)
+
+class OrderStoreUnavailable(Exception):
+    """The shared order store could not be reached."""
+
+class OrderRepository:
+    """Async access to orders: Redis when configured, this process's in-memory store otherwise.
+
+    The store is chosen once, when the orders are seeded at startup: the
+    "auto" backend keeps orders in memory if Redis cannot be reached then.
+    After that every call goes to the chosen store only. While Redis is
+    unreachable reads and writes raise OrderStoreUnavailable rather than
+    answering from this process's memory, which no other replica sees and
+    which would list orders already claimed elsewhere.
+    """
+
+    def __init__(self, backend: str = ORDER_STORE_BACKEND):
+        self.backend = backend
+        self.use_redis = backend in ("redis", "auto")
+        self.local = OrderStore()
+
+    async def seed(self, orders: List[Dict[str, Any]]):
+        """Load initial orders into the store, once for Redis; picks the store for the "auto" backend."""
+        if self.use_redis:
+            try:
+                await self._call("seed", orders)
+                return
+            except OrderStoreUnavailable as e:
+                if self.backend != "auto":
+                    print(f"Orders not seeded into Redis: {e}")
+                    return
+                print(f"Redis unreachable at startup, keeping orders in memory: {e}")
+                self.use_redis = False
+        self.local.seed(orders)
+
+    async def add(self, order: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._call("add", order)
+
+    async def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        return await self._call("get", order_id)
+
+    async def version(self) -> int:
+        return await self._call("version")
+
+    async def update_status(self, order_id: str, status: str, worker_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        return await self._call("update_status", order_id, status, worker_id)
+
+    async def claim(self, order_id: str, worker_id: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        return await self._call("claim", order_id, worker_id)
+
+    async def complete(self, order_id: str, worker_id: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        return await self._call("complete", order_id, worker_id)
+
+    async def get_many(self, order_ids: List[str]) -> List[Dict[str, Any]]:
+        return await self._call("get_many", order_ids)
+
+    async def ids_by_status(self, status: str) -> List[str]:
+        return await self._call("ids_by_status", status)
+
+    async def by_status(self, status: str) -> List[Dict[str, Any]]:
+        return await self._call("by_status", status)
+
+    async def by_worker(self, worker_id: str) -> List[Dict[str, Any]]:
+        return await self._call("by_worker", worker_id)
+
+    async def available(self) -> List[Dict[str, Any]]:
+        return await self.by_status("available")
+
+    async def available_near_ids(self, lat: float, lng: float, radius_km: float = ORDER_SEARCH_RADIUS_KM) -> List[Tuple[str, float]]:
+        return await self._call("available_near_ids", lat, lng, radius_km)
+
+    async def available_near(self, lat: float, lng: float, radius_km: float = ORDER_SEARCH_RADIUS_KM) -> List[Dict[str, Any]]:
+        return await self._call("available_near", lat, lng, radius_km)
+
+    @staticmethod
+    def area_key(lat: float, lng: float, radius_km: float) -> str:
+        """Search area identifier, with the location rounded to about 100 m."""
+        return f"{lat:.3f}:{lng:.3f}:{radius_km:g}"
+
+    async def _call(self, method: str, *args):
+        """Run a call against the configured store only."""
+        if not self.use_redis:
+            return getattr(self.local, method)(*args)
+        try:
+            return await getattr(RedisOrderStore, method)(*args)
+        except ValueError:
+            raise
+        except Exception as e:
+            # A write may or may not have been applied (e.g. a timed out reply), never guess
+            print(f"Redis order store error ({method}): {e}")
+            raise OrderStoreUnavailable(f"Order store unavailable for {method}") from e
+
+# Global instance
+order_repository = OrderRepository()
@@ -1,12 +1,27 @@
 import redis
+import redis.asyncio as aioredis
+import asyncio
 import json
-from typing import Optional, Any
+import uuid
+from typing import Optional, Any, Dict, List, Set, Tuple
+from app.services.local_cache import LocalCache
 import os
 
 # Redis configuration
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_DB = int(os.getenv("REDIS_DB", "0"))
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "1.0"))  # seconds to wait for a free connection
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.5"))  # seconds
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", "0.5"))  # seconds
+
+# In-process L1 cache configuration
+REDIS_L1_ENABLED = os.getenv("REDIS_L1_ENABLED", "false").lower() == "true"
+REDIS_L1_MAX_ENTRIES = int(os.getenv("REDIS_L1_MAX_ENTRIES", "10000"))
+REDIS_L1_MAX_BYTES = int(os.getenv("REDIS_L1_MAX_BYTES", str(64 * 1024 * 1024)))
+REDIS_L1_TTL = float(os.getenv("REDIS_L1_TTL", "30"))  # seconds, never longer than the Redis TTL
+REDIS_INVALIDATION_CHANNEL = os.getenv("REDIS_INVALIDATION_CHANNEL", "cache:invalidate")
 
 # Create Redis client
 redis_client = redis.Redis(
@@ -16,44 +31,501 @@ redis_client = redis.Redis(
     decode_responses=True
 )
 
-class RedisService:
+# Create async Redis client backed by an explicitly sized, shared pool
+async_redis_pool = aioredis.BlockingConnectionPool(
+    host=REDIS_HOST,
+    port=REDIS_PORT,
+    db=REDIS_DB,
+    max_connections=REDIS_MAX_CONNECTIONS,
+    timeout=REDIS_POOL_TIMEOUT,
+    socket_timeout=REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+    decode_responses=True
+)
+async_redis_client = aioredis.Redis(connection_pool=async_redis_pool)
+
+# Optional L1 cache in front of Redis, kept coherent across processes via pub/sub
+local_cache: Optional[LocalCache] = (
+    LocalCache(max_entries=REDIS_L1_MAX_ENTRIES, max_bytes=REDIS_L1_MAX_BYTES)
+    if REDIS_L1_ENABLED else None
+)
+PROCESS_ID = uuid.uuid4().hex
+_invalidation_task: Optional[asyncio.Task] = None
+
+def _serialize(value: Any) -> Any:
+    """Serialize a value for storage in Redis."""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+def _deserialize(value: Optional[str]) -> Optional[Any]:
+    """Deserialize a value read from Redis."""
+    if value is None:
+        return None
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return value
+
+def _l1_store(key: str, raw: Optional[Any], ttl_ms: int):
+    """Fill the L1 cache from Redis, never outliving the remaining Redis TTL."""
+    if local_cache is None or raw is None or ttl_ms == -2:
+        return
+    ttl = REDIS_L1_TTL if ttl_ms == -1 else min(REDIS_L1_TTL, ttl_ms / 1000)
+    local_cache.set(key, raw, ttl)
+
+def _invalidation_message(keys: List[str], prefixes: Optional[List[str]] = None) -> str:
+    """Build the pub/sub payload telling other processes to drop keys (and keys under prefixes)."""
+    message: Dict[str, Any] = {"origin": PROCESS_ID, "keys": keys}
+    if prefixes:
+        message["prefixes"] = prefixes
+    return json.dumps(message)
+
+def _apply_invalidation(data: str):
+    """Drop keys named in a pub/sub invalidation from the L1 cache."""
+    if local_cache is None:
+        return
+    message = json.loads(data)
+    if message.get("origin") == PROCESS_ID:
+        return
+    for key in message.get("keys", []):
+        local_cache.delete(key)
+    for prefix in message.get("prefixes", []):
+        local_cache.delete_prefix(prefix)
+
+def prefix_invalidation_message(prefixes: List[str]) -> Optional[str]:
+    """Drop L1 entries under prefixes here; returns the message evicting them elsewhere (None without an L1 cache)."""
+    if local_cache is None:
+        return None
+    for prefix in prefixes:
+        local_cache.delete_prefix(prefix)
+    return _invalidation_message([], prefixes)
+
+def queue_prefix_invalidation(pipeline, prefixes: List[str]):
+    """Drop L1 entries under prefixes here and, once the pipeline runs, in every other process."""
+    message = prefix_invalidation_message(prefixes)
+    if message is not None:
+        pipeline.publish(REDIS_INVALIDATION_CHANNEL, message)
+
+class CacheKeys:
+    @staticmethod
+    def get_g_value_cache_key(feature_digest: str, model_version: str) -> str:
+        """Get the cache key for a G-value prediction, addressed by features and model."""
+        return f"g_value:{model_version}:{feature_digest}"
+
+    @staticmethod
+    def get_model_version_key() -> str:
+        """Get the key under which the G-value service publishes its model version."""
+        return "g_value:model_version"
+
+    @staticmethod
+    def get_model_work_queue_key() -> str:
+        """Get the key of the list of observations and training requests for the model-owning worker."""
+        return "g_value:model_work"
+
+    @staticmethod
+    def get_orders_version_key() -> str:
+        """Get the key of the counter bumped on every order state change."""
+        return "orders:version"
+
+    @staticmethod
+    def get_orders_cache_prefix() -> str:
+        """Get the prefix shared by every cached order listing."""
+        return "orders:list:"
+
+    @staticmethod
+    def get_orders_cache_key(worker_id: str, version: int) -> str:
+        """Get the cache key for orders, valid only for one version of the order set."""
+        return f"{CacheKeys.get_orders_cache_prefix()}{version}:{worker_id}"
+
+    @staticmethod
+    def get_order_key(order_id: str) -> str:
+        """Get the key of the hash holding one order."""
+        return f"order:{order_id}"
+
+    @staticmethod
+    def get_order_status_key(status: str) -> str:
+        """Get the key of the set of order ids in a status."""
+        return f"orders:status:{status}"
+
+    @staticmethod
+    def get_worker_orders_key(worker_id: str) -> str:
+        """Get the key of the set of order ids assigned to a worker."""
+        return f"orders:worker:{worker_id}"
+
+    @staticmethod
+    def get_available_orders_geo_key() -> str:
+        """Get the key of the geo index over available orders' pickup locations."""
+        return "orders:geo:available"
+
+    @staticmethod
+    def get_order_events_channel() -> str:
+        """Get the pub/sub channel carrying order additions and removals."""
+        return "orders:events"
+
+    @staticmethod
+    def get_model_updates_channel() -> str:
+        """Get the pub/sub channel on which the G-value service announces new model versions."""
+        return "g_value:model_updates"
+
+    @staticmethod
+    def get_revoked_token_key(token_digest: str) -> str:
+        """Get the key marking a revoked access token."""
+        return f"auth:revoked:{token_digest}"
+
+    @staticmethod
+    def get_earnings_cache_key(worker_id: str) -> str:
+        """Get the cache key for earnings."""
+        return f"earnings:{worker_id}"
+
+    @staticmethod
+    def get_earnings_totals_key(worker_id: str) -> str:
+        """Get the key of the hash holding a worker's running earnings totals."""
+        return f"earnings:{worker_id}:totals"
+
+    @staticmethod
+    def get_earnings_daily_key(worker_id: str) -> str:
+        """Get the key of the hash of a worker's earnings per day."""
+        return f"earnings:{worker_id}:daily"
+
+    @staticmethod
+    def get_earnings_jobs_key(worker_id: str) -> str:
+        """Get the key of the sorted set of a worker's completed job ids, scored by completion time."""
+        return f"earnings:{worker_id}:jobs"
+
+    @staticmethod
+    def get_earnings_job_details_key(worker_id: str) -> str:
+        """Get the key of the hash of a worker's completed job details."""
+        return f"earnings:{worker_id}:job_details"
+
+    @staticmethod
+    def get_earnings_seeded_key(worker_id: str) -> str:
+        """Get the key marking that a worker's initial jobs were recorded."""
+        return f"earnings:{worker_id}:seeded"
+
+class RedisService(CacheKeys):
+    """Synchronous Redis cache, for scripts and other non-async callers."""
+
     @staticmethod
     def set(key: str, value: Any, ttl: int = 300) -> bool:
         """Set a value in Redis with optional TTL."""
+        return RedisService.set_many({key: value}, ttl=ttl)
+
+    @staticmethod
+    def get(key: str) -> Optional[Any]:
+        """Get a value from Redis."""
+        return RedisService.get_many([key])[0]
+
+    @staticmethod
+    def delete(key: str) -> bool:
+        """Delete a value from Redis."""
+        return RedisService.delete_many([key]) > 0
+
+    @staticmethod
+    def get_many(keys: List[str]) -> List[Optional[Any]]:
+        """Get many values from Redis in one round trip, in key order."""
+        if not keys:
+            return []
+        raw_values = [local_cache.get(key) if local_cache else None for key in keys]
+        missing = [i for i, raw in enumerate(raw_values) if raw is None]
+        if missing:
+            missing_keys = [keys[i] for i in missing]
+            try:
+                pipeline = redis_client.pipeline(transaction=False)
+                pipeline.mget(missing_keys)
+                if local_cache is not None:
+                    for key in missing_keys:
+                        pipeline.pttl(key)
+                fetched, *ttls = pipeline.execute()
+            except Exception as e:
+                print(f"Redis get error: {e}")
+                fetched, ttls = [None] * len(missing), []
+            for n, (i, raw) in enumerate(zip(missing, fetched)):
+                raw_values[i] = raw
+                if ttls:
+                    _l1_store(keys[i], raw, ttls[n])
+        return [_deserialize(raw) for raw in raw_values]
+
+    @staticmethod
+    def set_many(items: Dict[str, Any], ttl: int = 300, ttls: Optional[Dict[str, int]] = None) -> bool:
+        """Set many values in one pipelined round trip, with optional per-key TTLs."""
+        if not items:
+            return True
+        serialized = {key: _serialize(value) for key, value in items.items()}
         try:
-            if isinstance(value, (dict, list)):
-                value = json.dumps(value)
-            return redis_client.setex(key, ttl, value)
+            pipeline = redis_client.pipeline(transaction=False)
+            for key, value in serialized.items():
+                pipeline.setex(key, (ttls or {}).get(key, ttl), value)
+            if local_cache is not None:
+                pipeline.publish(REDIS_INVALIDATION_CHANNEL, _invalidation_message(list(serialized)))
+            results = pipeline.execute()
         except Exception as e:
             print(f"Redis set error: {e}")
             return False
+        if local_cache is not None:
+            for key, value in serialized.items():
+                local_cache.set(key, value, min(REDIS_L1_TTL, (ttls or {}).get(key, ttl)))
+        return all(results[:len(serialized)])
 
     @staticmethod
-    def get(key: str) -> Optional[Any]:
-        """Get a value from Redis."""
+    def delete_many(keys: List[str]) -> int:
+        """Delete many values in one pipelined round trip, returning how many existed."""
+        if not keys:
+            return 0
+        if local_cache is not None:
+            for key in keys:
+                local_cache.delete(key)
         try:
-            value = redis_client.get(key)
-            if value is None:
-                return None
+            pipeline = redis_client.pipeline(transaction=False)
+            for key in keys:
+                pipeline.delete(key)
+            if local_cache is not None:
+                pipeline.publish(REDIS_INVALIDATION_CHANNEL, _invalidation_message(keys))
+            return sum(pipeline.execute()[:len(keys)])
+        except Exception as e:
+            print(f"Redis delete error: {e}")
+            return 0
+
+class AsyncRedisService(CacheKeys):
+    """Async Redis cache for use from async handlers."""
+
+    @staticmethod
+    async def set(key: str, value: Any, ttl: int = 300) -> bool:
+        """Set a value in Redis with optional TTL."""
+        return await AsyncRedisService.set_many({key: value}, ttl=ttl)
+
+    @staticmethod
+    async def get(key: str) -> Optional[Any]:
+        """Get a value from Redis."""
+        return (await AsyncRedisService.get_many([key]))[0]
+
+    @staticmethod
+    async def delete(key: str) -> bool:
+        """Delete a value from Redis."""
+        return await AsyncRedisService.delete_many([key]) > 0
+
+    @staticmethod
+    async def get_many(keys: List[str]) -> List[Optional[Any]]:
+        """Get many values from Redis in one round trip, in key order."""
+        if not keys:
+            return []
+        raw_values = [local_cache.get(key) if local_cache else None for key in keys]
+        missing = [i for i, raw in enumerate(raw_values) if raw is None]
+        if missing:
+            missing_keys = [keys[i] for i in missing]
             try:
-                return json.loads(value)
-            except json.JSONDecodeError:
-                return value
+                pipeline = async_redis_client.pipeline(transaction=False)
+                pipeline.mget(missing_keys)
+                if local_cache is not None:
+                    for key in missing_keys:
+                        pipeline.pttl(key)
+                fetched, *ttls = await pipeline.execute()
+            except Exception as e:
+                print(f"Redis get error: {e}")
+                fetched, ttls = [None] * len(missing), []
+            for n, (i, raw) in enumerate(zip(missing, fetched)):
+                raw_values[i] = raw
+                if ttls:
+                    _l1_store(keys[i], raw, ttls[n])
+        return [_deserialize(raw) for raw in raw_values]
+
+    @staticmethod
+    async def set_many(items: Dict[str, Any], ttl: int = 300, ttls: Optional[Dict[str, int]] = None) -> bool:
+        """Set many values in one pipelined round trip, with optional per-key TTLs."""
+        if not items:
+            return True
+        serialized = {key: _serialize(value) for key, value in items.items()}
+        try:
+            pipeline = async_redis_client.pipeline(transaction=False)
+            for key, value in serialized.items():
+                pipeline.setex(key, (ttls or {}).get(key, ttl), value)
+            if local_cache is not None:
+                pipeline.publish(REDIS_INVALIDATION_CHANNEL, _invalidation_message(list(serialized)))
+            results = await pipeline.execute()
         except Exception as e:
-            print(f"Redis get error: {e}")
-            return None
+            print(f"Redis set error: {e}")
+            return False
+        if local_cache is not None:
+            for key, value in serialized.items():
+                local_cache.set(key, value, min(REDIS_L1_TTL, (ttls or {}).get(key, ttl)))
+        return all(results[:len(serialized)])
 
     @staticmethod
-    def get_g_value_cache_key(worker_id: str, order_id: str) -> str:
-        """Get the cache key for G-value predictions."""
-        return f"g_value:{worker_id}:{order_id}"
-    
+    async def delete_many(keys: List[str]) -> int:
+        """Delete many values in one pipelined round trip, returning how many existed."""
+        if not keys:
+            return 0
+        if local_cache is not None:
+            for key in keys:
+                local_cache.delete(key)
+        try:
+            pipeline = async_redis_client.pipeline(transaction=False)
+            for key in keys:
+                pipeline.delete(key)
+            if local_cache is not None:
+                pipeline.publish(REDIS_INVALIDATION_CHANNEL, _invalidation_message(keys))
+            return sum((await pipeline.execute())[:len(keys)])
+        except Exception as e:
+            print(f"Redis delete error: {e}")
+            return 0
+
+    # Raw data structure access for stores kept in Redis. Unlike the cache methods these
+    # bypass the L1 cache, return Redis' own strings and raise on Redis errors, so
+    # callers decide whether to fall back or fail.
+
     @staticmethod
-    def get_orders_cache_key(worker_id: str) -> str:
-        """Get the cache key for orders."""
-        return f"orders:{worker_id}"
-    
+    def pipeline(transaction: bool = True):
+        """Start a pipeline (MULTI/EXEC when transaction) on the shared pool."""
+        return async_redis_client.pipeline(transaction=transaction)
+
     @staticmethod
-    def get_earnings_cache_key(worker_id: str) -> str:
-        """Get the cache key for earnings."""
-        return f"earnings:{worker_id}"
\ No newline at end of file
+    def register_script(script: str):
+        """Register a Lua script; it is loaded on first use and then run by SHA."""
+        return async_redis_client.register_script(script)
+
+    @staticmethod
+    async def get_raw(key: str) -> Optional[str]:
+        """Get a string value straight from Redis."""
+        return await async_redis_client.get(key)
+
+    @staticmethod
+    async def set_raw(key: str, value: str, ttl: Optional[int] = None, only_if_absent: bool = False) -> bool:
+        """Set a string value, optionally with a TTL and only if the key does not exist; returns whether it was set."""
+        return bool(await async_redis_client.set(key, value, ex=ttl, nx=only_if_absent))
+
+    @staticmethod
+    async def exists(key: str) -> bool:
+        """Whether a key exists."""
+        return await async_redis_client.exists(key) > 0
+
+    @staticmethod
+    async def hgetall(key: str) -> Dict[str, str]:
+        """Get every field of a hash."""
+        return await async_redis_client.hgetall(key)
+
+    @staticmethod
+    async def hmget(key: str, fields: List[str]) -> List[Optional[str]]:
+        """Get hash fields, in order."""
+        return await async_redis_client.hmget(key, fields)
+
+    @staticmethod
+    async def smembers(key: str) -> Set[str]:
+        """Get the members of a set."""
+        return await async_redis_client.smembers(key)
+
+    @staticmethod
+    async def zcard(key: str) -> int:
+        """Number of members of a sorted set."""
+        return await async_redis_client.zcard(key)
+
+    @staticmethod
+    async def zrange_with_scores(key: str, start: int, stop: int) -> List[Tuple[str, float]]:
+        """(member, score) pairs ranked start..stop (inclusive), lowest score first."""
+        return await async_redis_client.zrange(key, start, stop, withscores=True)
+
+    @staticmethod
+    async def zrevrangebyscore_with_scores(
+        key: str, max_score: Any, min_score: Any, offset: int, count: int
+    ) -> List[Tuple[str, float]]:
+        """Up to count (member, score) pairs scored within [min_score, max_score], highest first, skipping offset."""
+        return await async_redis_client.zrevrangebyscore(
+            key, max_score, min_score, start=offset, num=count, withscores=True
+        )
+
+    @staticmethod
+    async def geosearch_within(key: str, lat: float, lng: float, radius_km: float) -> List[Tuple[str, float]]:
+        """(member, distance_km) of geo members within radius_km of a point, nearest first."""
+        matches = await async_redis_client.geosearch(
+            key, longitude=lng, latitude=lat, radius=radius_km, unit="km", sort="ASC", withdist=True
+        )
+        return [(member, float(distance)) for member, distance in matches]
+
+    @staticmethod
+    async def push(key: str, values: List[Any]) -> bool:
+        """Append values to the list at key."""
+        if not values:
+            return True
+        try:
+            await async_redis_client.rpush(key, *[_serialize(value) for value in values])
+            return True
+        except Exception as e:
+            print(f"Redis push error: {e}")
+            return False
+
+    @staticmethod
+    async def pop_many(key: str, count: int) -> List[Any]:
+        """Remove and return up to count values from the head of the list at key."""
+        try:
+            raw_values = await async_redis_client.lpop(key, count)
+        except Exception as e:
+            print(f"Redis pop error: {e}")
+            return []
+        return [_deserialize(raw) for raw in raw_values or []]
+
+    @staticmethod
+    def get_cache_stats() -> Dict[str, Any]:
+        """Get L1 cache counters."""
+        if local_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **local_cache.stats()}
+
+    @staticmethod
+    async def publish(channel: str, message: Any) -> bool:
+        """Publish a message on a pub/sub channel."""
+        try:
+            await async_redis_client.publish(channel, _serialize(message))
+            return True
+        except Exception as e:
+            print(f"Redis publish error: {e}")
+            return False
+
+    @staticmethod
+    async def start_invalidation_listener():
+        """Subscribe to cross-process L1 invalidations (no-op without an L1 cache)."""
+        global _invalidation_task
+        if local_cache is not None and _invalidation_task is None:
+            _invalidation_task = asyncio.create_task(AsyncRedisService._listen_for_invalidations())
+
+    @staticmethod
+    async def _listen_for_invalidations():
+        """Apply invalidations published by other processes until cancelled."""
+        # Pub/sub blocks on reads, so it gets its own connection without a socket timeout
+        subscriber = aioredis.Redis(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            db=REDIS_DB,
+            socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+            decode_responses=True
+        )
+        try:
+            while True:
+                pubsub = subscriber.pubsub(ignore_subscribe_messages=True)
+                try:
+                    await pubsub.subscribe(REDIS_INVALIDATION_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            _apply_invalidation(message["data"])
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"Redis invalidation listener error: {e}")
+                    # Invalidations may have been missed while disconnected
+                    local_cache.clear()
+                    await asyncio.sleep(1.0)
+                finally:
+                    await pubsub.aclose()
+        finally:
+            await subscriber.aclose()
+
+    @staticmethod
+    async def close():
+        """Stop the invalidation listener and close all pooled connections."""
+        global _invalidation_task
+        if _invalidation_task is not None:
+            _invalidation_task.cancel()
+            try:
+                await _invalidation_task
+            except asyncio.CancelledError:
+                pass
+            _invalidation_task = None
+        await async_redis_pool.disconnect()
@@ -0,0 +1,128 @@
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+import torch
+from app.services.gp_model import G_VALUE_MODEL_TYPE, GValuePredictor, gp_predictor
+
+# Where a training job gets its data: "current" retrains on the data the serving model is
+# conditioned on (including online updates), "mock" on a freshly generated mock training set
+TRAINING_SOURCES = ("current", "mock")
+
+class TrainingJob:
+    """Progress and outcome of one background training run."""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:12]
+        self.status = "queued"
+        self.iteration = 0
+        self.total_iterations = 0
+        self.loss: Optional[float] = None
+        self.model_version: Optional[str] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def update(self, iteration: int, total_iterations: int, loss: float):
+        """Record optimizer progress (called from the training thread)."""
+        self.iteration = iteration
+        self.total_iterations = total_iterations
+        self.loss = loss
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the job status as a dict."""
+        end = self.finished_at or time.time()
+        return {
+            "id": self.id,
+            "status": self.status,
+            "iteration": self.iteration,
+            "total_iterations": self.total_iterations,
+            "progress": self.iteration / self.total_iterations if self.total_iterations else 0.0,
+            "loss": self.loss,
+            "model_version": self.model_version,
+            "error": self.error,
+            "duration_seconds": (end - self.started_at) if self.started_at else None,
+        }
+
+class TrainingManager:
+    """Runs model training and online updates on one background thread, one job at a time."""
+
+    def __init__(self, predictor: GValuePredictor):
+        self.predictor = predictor
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gp-training")
+        self._lock = threading.Lock()
+        self._job: Optional[TrainingJob] = None
+
+    def start(
+        self,
+        on_complete: Optional[Callable[[TrainingJob], None]] = None,
+        source: str = "current"
+    ) -> Tuple[TrainingJob, bool]:
+        """Start a training job, or return the running one if training is already in progress.
+
+        source is one of TRAINING_SOURCES; "current" falls back to mock data
+        while no model is trained yet. Returns the job and whether a new job
+        was started.
+        """
+        if source not in TRAINING_SOURCES:
+            raise ValueError(f"Unknown training source {source!r}, expected one of {TRAINING_SOURCES}")
+        with self._lock:
+            if self._job is not None and self._job.is_active:
+                return self._job, False
+            job = TrainingJob()
+            self._job = job
+        self._executor.submit(self._run, job, on_complete, source)
+        return job, True
+
+    def submit_update(self, X_new: torch.Tensor, y_new: torch.Tensor) -> Future:
+        """Queue an online update; it runs after any training job already queued."""
+        return self._executor.submit(self.predictor.update, X_new, y_new)
+
+    def submit_reload(self) -> Future:
+        """Queue a reload of the saved checkpoint, serialized with training and updates."""
+        return self._executor.submit(self.predictor.load_checkpoint)
+    
+    def status(self) -> Optional[Dict[str, Any]]:
+        """Get the status of the current or most recent job."""
+        job = self._job
+        return job.to_dict() if job else None
+
+    def _run(self, job: TrainingJob, on_complete: Optional[Callable[[TrainingJob], None]], source: str):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            # Read the data when the job runs so updates queued before it are included;
+            # train() generates mock data when none is given
+            X_train, y_train = self.predictor.training_data() if source == "current" else (None, None)
+            job.model_version = self.predictor.train(
+                progress_callback=job.update,
+                model_type=(self.predictor.model_type if source == "current" else None) or G_VALUE_MODEL_TYPE,
+                X_train=X_train,
+                y_train=y_train
+            )
+            job.status = "succeeded"
+        except Exception as e:
+            print(f"Error training GP model: {e}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+
+        if on_complete:
+            try:
+                on_complete(job)
+            except Exception as e:
+                print(f"Error in training completion callback: {e}")
+
+    def shutdown(self):
+        """Stop accepting jobs; a running job is left to finish in the background."""
+        self._executor.shutdown(wait=False)
+
+# Global instance
+training_manager = TrainingManager(gp_predictor)
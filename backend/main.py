@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 import sys
@@ -5,12 +6,32 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from app.routers import auth, orders, earnings
 from app.models.schemas import HealthResponse
+from app.services.auth import get_token_cache_stats
+from app.services.g_value_client import GValueClient
+from app.services.job_history import job_history_store
+from app.services.order_events import order_events
+from app.services.order_store import order_repository
+from app.services.redis_client import AsyncRedisService
 import uvicorn
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared clients on startup and close them on shutdown."""
+    await GValueClient.startup()
+    await AsyncRedisService.start_invalidation_listener()
+    await order_repository.seed(orders.MOCK_ORDERS)
+    await order_events.start()
+    yield
+    await order_events.stop()
+    job_history_store.flush()
+    await GValueClient.shutdown()
+    await AsyncRedisService.close()
+
 app = FastAPI(
     title="CN Project Backend API",
     description="Backend API for CN Project worker platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -37,5 +58,14 @@ async def health_check():
     """Health check endpoint."""
     return HealthResponse(status="healthy", service="backend-api")
 
+@app.get("/metrics")
+async def metrics():
+    """Runtime metrics for connection pools and caches."""
+    return {
+        "g_value_pool": GValueClient.get_pool_metrics(),
+        "cache": AsyncRedisService.get_cache_stats(),
+        "auth_token_cache": get_token_cache_stats()
+    }
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark the G-value feature pipeline.
+
+Compares per-row feature extraction against the columnar pipeline and
+measures mock training-set generation, reporting rows per second.
+
+Usage:
+    python benchmark_feature_pipeline.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import torch
+
+from app.services.features import extract_feature_matrix, extract_feature_vector
+from app.services.gp_model import GValuePredictor
+
+def make_columns(n_rows: int, n_locations: int, rng: np.random.Generator):
+    """Random columnar order features drawn from a fixed vocabulary of addresses."""
+    vocabulary = np.array([f"{i} Main St, District {i % 50}" for i in range(n_locations)], dtype=object)
+    return {
+        "pickup_location": vocabulary[rng.integers(0, n_locations, n_rows)],
+        "dropoff_location": vocabulary[rng.integers(0, n_locations, n_rows)],
+        "eta": rng.integers(5, 60, n_rows),
+        "time_of_day": rng.integers(0, 24, n_rows),
+        "day_of_week": rng.integers(0, 7, n_rows),
+    }
+
+def per_row(columns) -> torch.Tensor:
+    """Baseline: one feature dict and one extract_feature_vector() call per order."""
+    names = list(columns)
+    rows = [
+        extract_feature_vector(dict(zip(names, values)))
+        for values in zip(*(columns[name].tolist() for name in names))
+    ]
+    return torch.tensor(rows, dtype=torch.float32)
+
+def columnar(columns) -> torch.Tensor:
+    return torch.from_numpy(extract_feature_matrix(columns)).to(torch.float32)
+
+def rows_per_second(fn, n_rows: int, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return n_rows / best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the G-value feature pipeline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000], help="Rows per batch")
+    parser.add_argument("--locations", type=int, default=5000, help="Distinct pickup/dropoff addresses")
+    parser.add_argument("--max-per-row", type=int, default=100000, help="Largest batch to run the per-row baseline on")
+    parser.add_argument("--rounds", type=int, default=3, help="Timed rounds per measurement (best is reported)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    predictor = GValuePredictor()
+
+    print("G-Value Feature Pipeline Benchmark (rows/s)")
+    print("=" * 72)
+    print(f"{'rows':>10}{'per-row extract':>20}{'columnar extract':>20}{'mock training set':>22}")
+    print("-" * 72)
+    for n_rows in args.sizes:
+        columns = make_columns(n_rows, args.locations, rng)
+        if n_rows <= args.max_per_row:
+            assert torch.equal(per_row(columns), columnar(columns))
+            baseline = f"{rows_per_second(lambda: per_row(columns), n_rows, args.rounds):>20,.0f}"
+        else:
+            baseline = f"{'skipped':>20}"
+        vectorized = rows_per_second(lambda: columnar(columns), n_rows, args.rounds)
+        generated = rows_per_second(lambda: predictor._generate_mock_training_data(n_rows), n_rows, args.rounds)
+        print(f"{n_rows:>10}{baseline}{vectorized:>20,.0f}{generated:>22,.0f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
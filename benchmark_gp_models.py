@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark the exact and sparse variational G-value GP models.
+
+Compares accuracy on held-out data, training time and predict latency as the
+training set grows.
+
+Usage:
+    python benchmark_gp_models.py --sizes 500 2000 5000
+"""
+
+import argparse
+import math
+import statistics
+import sys
+import time
+
+import gpytorch
+import torch
+
+from app.services.gp_model import GValuePredictor
+
+def time_predictions(predictor: GValuePredictor, X: torch.Tensor, batch_size: int, rounds: int) -> float:
+    """Median latency in ms of one forward pass over batch_size rows."""
+    state = predictor._state
+    latencies = []
+    for i in range(rounds):
+        start = (i * batch_size) % max(X.size(0) - batch_size, 1)
+        batch = X[start:start + batch_size]
+        t0 = time.perf_counter()
+        with torch.no_grad(), gpytorch.settings.fast_pred_var():
+            state.likelihood(state.model(batch)).variance
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(latencies)
+
+def evaluate(predictor: GValuePredictor, X_test: torch.Tensor, y_test: torch.Tensor):
+    """Return RMSE and mean negative log predictive density on the test set."""
+    state = predictor._state
+    with torch.no_grad(), gpytorch.settings.fast_pred_var():
+        pred = state.likelihood(state.model(X_test))
+        mean, var = pred.mean, pred.variance.clamp_min(1e-9)
+    rmse = torch.sqrt(((mean - y_test) ** 2).mean()).item()
+    nlpd = (0.5 * torch.log(2 * math.pi * var) + 0.5 * (y_test - mean) ** 2 / var).mean().item()
+    return rmse, nlpd
+
+def run(model_type: str, n_train: int, X_test: torch.Tensor, y_test: torch.Tensor, rounds: int):
+    predictor = GValuePredictor()
+    X_train, y_train = predictor._generate_mock_training_data(n_train)
+
+    start = time.perf_counter()
+    predictor.train(checkpoint_path=None, model_type=model_type, X_train=X_train, y_train=y_train)
+    train_seconds = time.perf_counter() - start
+
+    rmse, nlpd = evaluate(predictor, X_test, y_test)
+    return {
+        "model": model_type,
+        "n_train": n_train,
+        "train_s": train_seconds,
+        "rmse": rmse,
+        "nlpd": nlpd,
+        "predict_1_ms": time_predictions(predictor, X_test, 1, rounds),
+        "predict_32_ms": time_predictions(predictor, X_test, 32, rounds),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark exact vs sparse G-value GP models")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2000, 5000], help="Training set sizes")
+    parser.add_argument("--models", nargs="+", default=["exact", "sparse"], help="Model types to compare")
+    parser.add_argument("--test-size", type=int, default=1000, help="Held-out test set size")
+    parser.add_argument("--rounds", type=int, default=50, help="Timed prediction rounds per batch size")
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    X_test, y_test = GValuePredictor()._generate_mock_training_data(args.test_size)
+
+    print("G-Value GP Model Benchmark")
+    print("=" * 88)
+    header = f"{'model':<8}{'n_train':>9}{'train (s)':>12}{'rmse':>10}{'nlpd':>10}{'predict@1 (ms)':>18}{'predict@32 (ms)':>19}"
+    print(header)
+    print("-" * 88)
+    for n_train in args.sizes:
+        for model_type in args.models:
+            result = run(model_type, n_train, X_test, y_test, args.rounds)
+            print(
+                f"{result['model']:<8}{result['n_train']:>9}{result['train_s']:>12.2f}"
+                f"{result['rmse']:>10.4f}{result['nlpd']:>10.3f}"
+                f"{result['predict_1_ms']:>18.2f}{result['predict_32_ms']:>19.2f}"
+            )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
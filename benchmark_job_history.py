@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark earnings analytics over a worker's job history.
+
+Builds a synthetic multi-year history, then times window sums, percentiles
+and g_value bucket queries on the columnar JobHistory (in memory and
+memory-mapped from disk) against the same queries over a list of job dicts.
+
+Usage:
+    python benchmark_job_history.py --years 1 5 20 --jobs-per-day 40
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from app.services.job_history import JobHistory
+
+def make_history(n_jobs: int, years: float, rng: np.random.Generator):
+    end = time.time()
+    timestamps = np.sort(rng.uniform(end - years * 365 * 86400, end, n_jobs))
+    earnings = np.round(rng.uniform(10, 60, n_jobs), 2)
+    g_values = rng.uniform(0.1, 1.0, n_jobs)
+    g_values[rng.random(n_jobs) < 0.05] = np.nan
+    return timestamps, earnings, g_values
+
+def dict_queries(jobs, start: datetime, end: datetime):
+    """Baseline: the same analytics as Python loops over job dicts."""
+    window = [job for job in jobs if start <= job["completed_at"] < end]
+    total = sum(job["earnings"] for job in window)
+    values = sorted(job["earnings"] for job in window)
+    percentiles = [values[int(q / 100 * (len(values) - 1))] for q in (50, 90, 99)] if values else []
+    buckets = {}
+    for job in window:
+        if job["g_value"] is not None:
+            bucket = min(int(job["g_value"] * 10), 9)
+            buckets[bucket] = buckets.get(bucket, 0.0) + job["earnings"]
+    return total, percentiles, buckets
+
+def columnar_queries(history: JobHistory, start: float, end: float):
+    return (
+        history.range_sum(start, end),
+        history.percentiles(start, end),
+        history.earnings_by_g_value(start, end),
+    )
+
+def best_ms(fn, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark earnings analytics over job history")
+    parser.add_argument("--years", type=float, nargs="+", default=[1, 5, 20], help="Years of history")
+    parser.add_argument("--jobs-per-day", type=int, default=40)
+    parser.add_argument("--max-dicts", type=int, default=300000, help="Largest history to run the dict baseline on")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed rounds per measurement (best is reported)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print("Earnings Analytics Benchmark (ms per window: sum + percentiles + g_value buckets)")
+    print("=" * 92)
+    print(f"{'years':>6}{'jobs':>11}{'window':>10}{'dicts':>12}{'columnar':>12}{'mmap':>12}{'append/s':>14}{'load ms':>12}")
+    print("-" * 92)
+    for years in args.years:
+        n_jobs = int(years * 365 * args.jobs_per_day)
+        timestamps, earnings, g_values = make_history(n_jobs, years, rng)
+
+        # Append in completion-sized batches, as syncing from the ledger does
+        history = JobHistory()
+        started = time.perf_counter()
+        for start in range(0, n_jobs, 5000):
+            history.append(timestamps[start:start + 5000], earnings[start:start + 5000], g_values[start:start + 5000])
+        append_rate = n_jobs / (time.perf_counter() - started)
+
+        with tempfile.TemporaryDirectory() as path:
+            history.save(path)
+            started = time.perf_counter()
+            mapped = JobHistory.load(path, mmap=True)
+            load_ms = (time.perf_counter() - started) * 1000
+
+            jobs = None
+            if n_jobs <= args.max_dicts:
+                jobs = [
+                    {
+                        "completed_at": datetime.fromtimestamp(ts),
+                        "earnings": float(amount),
+                        "g_value": None if np.isnan(g) else float(g),
+                    }
+                    for ts, amount, g in zip(timestamps.tolist(), earnings.tolist(), g_values.tolist())
+                ]
+
+            for label, days in (("30d", 30), ("all", None)):
+                end = float(timestamps[-1]) + 1
+                start = end - days * 86400 if days else float(timestamps[0])
+                summary = columnar_queries(history, start, end)
+                assert summary == columnar_queries(mapped, start, end)
+                if jobs is not None:
+                    window = (datetime.fromtimestamp(start), datetime.fromtimestamp(end))
+                    total = dict_queries(jobs, *window)[0]
+                    assert abs(total - summary[0]["earnings"]) < 0.01 * max(1, summary[0]["jobs"])
+                    baseline = f"{best_ms(lambda: dict_queries(jobs, *window), args.rounds):>12.2f}"
+                else:
+                    baseline = f"{'skipped':>12}"
+                columnar = best_ms(lambda: columnar_queries(history, start, end), args.rounds)
+                mmapped = best_ms(lambda: columnar_queries(mapped, start, end), args.rounds)
+                print(
+                    f"{years:>6g}{n_jobs:>11,}{label:>10}{baseline}{columnar:>12.2f}{mmapped:>12.2f}"
+                    f"{append_rate:>14,.0f}{load_ms:>12.2f}"
+                )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Load test for order claiming.
+
+Seeds a pool of throwaway orders in Redis, lets hundreds of concurrent
+claimers race for them and checks that every order ended up with exactly one
+worker. `--mode naive` runs the old read-then-write accept for comparison.
+
+Run with (Redis must be reachable, see REDIS_HOST/REDIS_PORT):
+    python load_test_order_claims.py --orders 2000 --claimers 500
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from collections import Counter
+
+from app.services.order_store import (
+    ALREADY_TAKEN, CLAIM_ORDER_SCRIPT, CLAIMED, NOT_FOUND, OrderRecord, RedisOrderStore
+)
+from app.services.redis_client import CacheKeys, async_redis_client, async_redis_pool
+
+ORDER_PREFIX = "loadtest-"
+
+async def naive_claim(order_id: str, worker_id: str):
+    """Read the status, then write it: the check and the update can interleave with other claimers."""
+    order = await RedisOrderStore.get(order_id)
+    if order is None:
+        return NOT_FOUND, None
+    if order["status"] != "available":
+        return ALREADY_TAKEN, order
+    return CLAIMED, await RedisOrderStore.update_status(order_id, "accepted", worker_id)
+
+async def seed_orders(count: int, worker_ids: list) -> list:
+    order_ids = [f"{ORDER_PREFIX}{i}" for i in range(count)]
+    # Clear leftovers of an interrupted run, including the claimers' worker indexes
+    await cleanup(order_ids, worker_ids)
+    pipeline = async_redis_client.pipeline(transaction=False)
+    for i, order_id in enumerate(order_ids):
+        RedisOrderStore._queue_add(pipeline, OrderRecord(
+            id=order_id,
+            pickup=f"{i} Load St",
+            dropoff=f"{i} Test Ave",
+            eta=10 + i % 30,
+            pickup_lat=37.7 + (i % 100) * 0.001,
+            pickup_lng=-122.4 - (i // 100 % 100) * 0.001
+        ))
+    await pipeline.execute()
+    return order_ids
+
+async def cleanup(order_ids: list, worker_ids: list):
+    pipeline = async_redis_client.pipeline(transaction=False)
+    for order_id in order_ids:
+        pipeline.delete(CacheKeys.get_order_key(order_id))
+    for status in ("available", "accepted", "completed"):
+        if order_ids:
+            pipeline.srem(CacheKeys.get_order_status_key(status), *order_ids)
+    if order_ids:
+        pipeline.zrem(CacheKeys.get_available_orders_geo_key(), *order_ids)
+    for worker_id in worker_ids:
+        pipeline.delete(CacheKeys.get_worker_orders_key(worker_id))
+    await pipeline.execute()
+
+async def run(args) -> bool:
+    claim = RedisOrderStore.claim if args.mode == "atomic" else naive_claim
+    worker_ids = [f"{ORDER_PREFIX}worker-{i}" for i in range(args.claimers)]
+    order_ids = await seed_orders(args.orders, worker_ids)
+    # Load the claim script up front so no measured claim pays for SCRIPT LOAD
+    await async_redis_client.script_load(CLAIM_ORDER_SCRIPT)
+    wins: Counter = Counter()
+    winners = {}
+    outcomes: Counter = Counter()
+    latencies = []
+    rng = random.Random(args.seed)
+
+    async def claimer(worker_id: str):
+        # Every claimer goes after the same hot orders in a different order
+        targets = rng.sample(order_ids, min(args.attempts, len(order_ids)))
+        for order_id in targets:
+            start = time.perf_counter()
+            outcome, order = await claim(order_id, worker_id)
+            latencies.append(time.perf_counter() - start)
+            outcomes[outcome] += 1
+            if outcome == CLAIMED:
+                wins[order_id] += 1
+                winners.setdefault(order_id, []).append(worker_id)
+
+    print(f"Mode {args.mode}: {args.claimers} claimers racing for {args.orders} orders, {args.attempts} attempts each")
+    start = time.perf_counter()
+    await asyncio.gather(*(claimer(worker_id) for worker_id in worker_ids))
+    elapsed = time.perf_counter() - start
+
+    # Cross-check the claims against what Redis ended up storing
+    stored = {order["id"]: order for order in await RedisOrderStore.get_many(order_ids)}
+    double_assigned = [order_id for order_id, count in wins.items() if count > 1]
+    mismatched = [
+        order_id for order_id, workers in winners.items()
+        if len(workers) == 1 and stored[order_id]["worker_id"] != workers[0]
+    ]
+    pipeline = async_redis_client.pipeline(transaction=False)
+    for worker_id in worker_ids:
+        pipeline.scard(CacheKeys.get_worker_orders_key(worker_id))
+    assigned = sum(await pipeline.execute())
+    claimed_orders = sum(1 for order in stored.values() if order["status"] == "accepted")
+
+    latencies.sort()
+    attempts = len(latencies)
+    print(f"  {attempts} claim attempts in {elapsed:.2f}s: {attempts / elapsed:,.0f} claims/s")
+    print(f"  latency p50 {latencies[attempts // 2] * 1000:.2f} ms, p99 {latencies[int(attempts * 0.99)] * 1000:.2f} ms")
+    print(f"  outcomes: {dict(outcomes)}")
+    print(f"  orders accepted: {claimed_orders}, successful claims: {outcomes[CLAIMED]}, worker index entries: {assigned}")
+    print(f"  double-assigned orders: {len(double_assigned)}, stored worker mismatches: {len(mismatched)}")
+
+    await cleanup(order_ids, worker_ids)
+    return not double_assigned and not mismatched and claimed_orders == outcomes[CLAIMED] == assigned
+
+def main():
+    parser = argparse.ArgumentParser(description="Race concurrent claimers for the same orders")
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--claimers", type=int, default=500)
+    parser.add_argument("--attempts", type=int, default=20, help="Claim attempts per claimer")
+    parser.add_argument("--mode", choices=["atomic", "naive"], default="atomic")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    async def run_and_close():
+        try:
+            return await run(args)
+        finally:
+            await async_redis_pool.disconnect()
+
+    ok = asyncio.run(run_and_close())
+    print("PASS: every order has exactly one worker" if ok else "FAIL: orders were double-assigned")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+import os
+import sys
+
+import fakeredis
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.routers import auth as auth_router, earnings as earnings_router, orders as orders_router
+from app.services import auth, earnings_store, order_store, redis_client
+from app.services.job_history import JobHistoryStore
+from app.services.g_value_client import GValueClient
+
+@pytest.fixture
+def redis_server():
+    """In-process Redis (with Lua) standing in for the shared server."""
+    return fakeredis.FakeServer()
+
+@pytest.fixture
+def redis(redis_server):
+    """Synchronous client on the fake server, for arranging and checking state."""
+    return fakeredis.FakeRedis(server=redis_server, decode_responses=True)
+
+@pytest.fixture
+def repository(monkeypatch, redis_server):
+    """A Redis-backed order repository whose Redis is the fake server."""
+    fake = fakeredis.FakeAsyncRedis(server=redis_server, decode_responses=True)
+    monkeypatch.setattr(redis_client, "async_redis_client", fake)
+    monkeypatch.setattr(redis_client, "local_cache", None)
+    # Scripts are bound to a client when registered
+    monkeypatch.setattr(order_store, "_claim_order_script", fake.register_script(order_store.CLAIM_ORDER_SCRIPT))
+    monkeypatch.setattr(order_store, "_complete_order_script", fake.register_script(order_store.COMPLETE_ORDER_SCRIPT))
+    monkeypatch.setattr(earnings_store, "_record_job_script", fake.register_script(earnings_store.RECORD_JOB_SCRIPT))
+    repository = order_store.OrderRepository(backend="redis")
+    monkeypatch.setattr(orders_router, "order_repository", repository)
+    monkeypatch.setattr(auth, "_revoked_here", {})
+    monkeypatch.setattr(earnings_router, "_seeded_workers", set())
+    monkeypatch.setattr(earnings_router, "job_history_store", JobHistoryStore(path=""))
+    return repository
+
+@pytest.fixture
+def observations(monkeypatch):
+    """Observations sent to the G-value service instead of a real one."""
+    sent = []
+
+    async def record_observations(batch):
+        sent.extend(batch)
+        return True
+
+    monkeypatch.setattr(GValueClient, "record_observations", record_observations)
+    return sent
+
+@pytest.fixture
+def client(repository, observations):
+    app = FastAPI()
+    app.include_router(auth_router.router, prefix="/api")
+    app.include_router(orders_router.router, prefix="/api")
+    app.include_router(earnings_router.router, prefix="/api")
+    with TestClient(app) as client:
+        yield client
+
+def login(client: TestClient, email: str) -> dict:
+    """Log in and return the Authorization header and the worker id."""
+    data = client.post("/api/auth/login", json={"email": email, "password": "x"}).json()["data"]
+    return {"Authorization": f"Bearer {data['token']}"}, data["user"]["id"]
+
+def add_order(redis, order_id: str, status: str = "available", worker_id: str = ""):
+    """Store an order hash with its status index, as RedisOrderStore does."""
+    redis.hset(f"order:{order_id}", mapping={
+        "pickup": "1 Main St", "dropoff": "2 Oak Ave", "eta": 10,
+        "pickup_lat": "", "pickup_lng": "", "status": status, "worker_id": worker_id
+    })
+    redis.sadd(f"orders:status:{status}", order_id)
+    if worker_id:
+        redis.sadd(f"orders:worker:{worker_id}", order_id)
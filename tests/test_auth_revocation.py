@@ -0,0 +1,51 @@
+import pytest
+from redis.exceptions import ConnectionError
+
+from app.routers import auth as auth_router
+from app.services import auth
+from app.services.redis_client import AsyncRedisService
+from tests.conftest import login
+
+@pytest.fixture
+def revocation_check(monkeypatch):
+    monkeypatch.setattr(auth, "AUTH_REVOCATION_CHECK", True)
+    monkeypatch.setattr(auth_router, "AUTH_REVOCATION_CHECK", True)
+
+def test_logout_is_rejected_when_revocation_is_disabled(client, monkeypatch):
+    monkeypatch.setattr(auth, "AUTH_REVOCATION_CHECK", False)
+    monkeypatch.setattr(auth_router, "AUTH_REVOCATION_CHECK", False)
+    headers, _ = login(client, "first@example.com")
+
+    assert client.post("/api/auth/logout", headers=headers).status_code == 501
+    assert client.get("/api/orders/", headers=headers).status_code == 200
+
+def test_logged_out_token_is_rejected(client, redis, revocation_check):
+    headers, _ = login(client, "first@example.com")
+    token = headers["Authorization"].split()[1]
+    # Verify once so the payload is cached
+    assert client.get("/api/orders/", headers=headers).status_code == 200
+
+    assert client.post("/api/auth/logout", headers=headers).status_code == 200
+
+    assert client.get("/api/orders/", headers=headers).status_code == 401
+    assert redis.exists(f"auth:revoked:{auth.token_digest(token)}")
+
+def test_token_revoked_in_redis_is_rejected(client, redis, revocation_check):
+    headers, _ = login(client, "first@example.com")
+    token = headers["Authorization"].split()[1]
+    # Revoked through another replica
+    redis.set(f"auth:revoked:{auth.token_digest(token)}", "1", ex=60)
+
+    assert client.get("/api/orders/", headers=headers).status_code == 401
+
+def test_logout_is_enforced_locally_when_redis_is_down(client, revocation_check, monkeypatch):
+    headers, _ = login(client, "first@example.com")
+
+    async def unavailable(*args, **kwargs):
+        raise ConnectionError("Redis is down")
+
+    monkeypatch.setattr(AsyncRedisService, "set_raw", unavailable)
+    monkeypatch.setattr(AsyncRedisService, "exists", unavailable)
+
+    assert client.post("/api/auth/logout", headers=headers).status_code == 503
+    assert client.get("/api/orders/", headers=headers).status_code == 401
@@ -0,0 +1,66 @@
+from app.routers import earnings as earnings_router
+from app.services.earnings_store import EarningsLedger
+from tests.conftest import login
+
+def mock_totals():
+    return sum(job["earnings"] for job in earnings_router.MOCK_COMPLETED_JOBS), len(earnings_router.MOCK_COMPLETED_JOBS)
+
+def test_ledger_is_seeded_once_per_worker(client, monkeypatch):
+    headers, worker_id = login(client, "first@example.com")
+    seeded = []
+    seed = EarningsLedger.seed
+
+    async def counting_seed(worker, jobs):
+        seeded.append(worker)
+        return await seed(worker, jobs)
+
+    monkeypatch.setattr(EarningsLedger, "seed", counting_seed)
+    for _ in range(3):
+        assert client.get("/api/earnings/", headers=headers).status_code == 200
+    assert client.get("/api/earnings/analytics", headers=headers).status_code == 200
+
+    assert seeded == [worker_id]
+
+def test_earnings_come_from_the_ledger(client):
+    headers, _ = login(client, "first@example.com")
+    total, count = mock_totals()
+
+    response = client.get("/api/earnings/", headers=headers, params={"limit": 2})
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["total_earnings"] == total
+    assert data["completed_jobs_count"] == count
+    assert [job["id"] for job in data["completed_jobs"]] == ["comp-1", "comp-2"]
+    assert response.json()["message"] == "Earnings retrieved successfully"
+
+def test_earnings_fall_back_to_mock_data_without_redis(client, redis_server):
+    headers, _ = login(client, "first@example.com")
+    redis_server.connected = False
+    total, count = mock_totals()
+
+    response = client.get("/api/earnings/", headers=headers, params={"limit": 2})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["message"] == "Earnings retrieved from mock data"
+    assert body["data"]["total_earnings"] == total
+    assert body["data"]["completed_jobs_count"] == count
+    assert [job["id"] for job in body["data"]["completed_jobs"]] == ["comp-1", "comp-2"]
+
+    rest = client.get("/api/earnings/jobs", headers=headers, params={"cursor": body["next_cursor"], "limit": 10})
+    assert rest.status_code == 200
+    assert [job["id"] for job in rest.json()["data"]] == ["comp-3", "comp-4", "comp-5"]
+    assert rest.json()["next_cursor"] is None
+
+def test_analytics_fall_back_to_mock_data_without_redis(client, redis_server):
+    headers, _ = login(client, "first@example.com")
+    redis_server.connected = False
+    total, count = mock_totals()
+
+    response = client.get("/api/earnings/analytics", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["message"] == "Earnings analytics computed from mock data"
+    assert response.json()["data"]["jobs"] == count
+    assert response.json()["data"]["earnings"] == round(total, 2)
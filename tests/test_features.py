@@ -0,0 +1,33 @@
+import numpy as np
+
+from app.services.features import (
+    FEATURE_NAMES, extract_feature_matrix, extract_feature_vector, features_digest, records_to_columns, stable_hash
+)
+
+ORDERS = [
+    {"pickup_location": "123 Main St, Downtown", "dropoff_location": "456 Oak Ave, Uptown", "eta": 15, "time_of_day": 8, "day_of_week": 2},
+    {"pickup_location": "789 Pine St, Midtown", "dropoff_location": "123 Main St, Downtown", "eta": 42},
+    {"eta": 30},
+    {},
+]
+
+def test_vector_matches_the_matrix_row():
+    matrix = extract_feature_matrix(records_to_columns(ORDERS))
+
+    assert matrix.shape == (len(ORDERS), len(FEATURE_NAMES))
+    for order, row in zip(ORDERS, matrix):
+        assert extract_feature_vector(order) == row.tolist()
+
+def test_vector_encoding():
+    pickup = stable_hash("123 Main St, Downtown") / 1000
+    dropoff = stable_hash("456 Oak Ave, Uptown") / 1000
+
+    vector = extract_feature_vector(ORDERS[0])
+
+    np.testing.assert_allclose(vector, [pickup, dropoff, 15 / 60, 8 / 24, 2 / 7, abs(pickup - dropoff) * 10])
+
+def test_digests_are_stable():
+    # Predictions are cached under these digests in Redis, so they must not drift
+    assert features_digest(ORDERS[0]) == "99716c0eb097f7327b4c80ac2f65a23f"
+    assert features_digest(ORDERS[2]) == "18cae16efbb8df987efc4028771f625c"
+    assert features_digest(ORDERS[3]) == "432eb48b7fdcfd07f1276bf9232f7757"
@@ -0,0 +1,40 @@
+import json
+import os
+
+import numpy as np
+
+from app.services.job_history import HISTORY_META, JobHistory
+
+def history_of(timestamps):
+    history = JobHistory(chunk_size=4)
+    history.append(timestamps, [10.0] * len(timestamps), [0.5] * len(timestamps))
+    return history
+
+def test_save_while_the_previous_save_is_mapped(tmp_path):
+    path = str(tmp_path / "worker-1")
+    history_of([1.0, 2.0, 3.0]).save(path)
+    mapped = JobHistory.load(path, mmap=True)
+
+    mapped.append([4.0, 5.0], [20.0, 20.0], [np.nan, 0.9])
+    mapped.save(path)
+
+    reloaded = JobHistory.load(path, mmap=False)
+    assert len(reloaded) == 5
+    assert reloaded.range_sum() == {"jobs": 5, "earnings": 70.0}
+    # Only the version meta.json points to is left
+    with open(os.path.join(path, HISTORY_META)) as f:
+        version = json.load(f)["version"]
+    assert sorted(os.listdir(path)) == sorted([HISTORY_META, version])
+
+def test_loads_histories_saved_without_versions(tmp_path):
+    path = tmp_path / "worker-1"
+    path.mkdir()
+    for name, column in zip(("timestamps", "earnings", "g_values"), history_of([1.0, 2.0]).columns()):
+        np.save(path / f"{name}.npy", column)
+    (path / HISTORY_META).write_text(json.dumps({"rows": 2}))
+
+    history = JobHistory.load(str(path))
+    history.save(str(path))
+
+    assert len(JobHistory.load(str(path))) == 2
+    assert not (path / "timestamps.npy").exists()
@@ -0,0 +1,67 @@
+import asyncio
+from concurrent.futures import Future
+
+from app.services import online_updates
+from app.services.online_updates import OnlineUpdater
+
+class Predictor:
+    is_trained = True
+
+    def prepare_training_data(self, columns, g_values):
+        return columns, g_values
+
+class Manager:
+    """Applies updates, or fails them while fail is set."""
+
+    def __init__(self):
+        self.fail = False
+        self.applied = []
+
+    def submit_update(self, X_new, y_new):
+        future = Future()
+        if self.fail:
+            future.set_exception(RuntimeError("training thread busy"))
+        else:
+            self.applied.append(list(y_new))
+            future.set_result((1, 0.0))
+        return future
+
+def observations(*g_values):
+    return [({"eta": 10}, g_value) for g_value in g_values]
+
+def test_failed_update_is_retried_in_order():
+    manager = Manager()
+    updater = OnlineUpdater(Predictor(), manager)
+    manager.fail = True
+    updater.add(observations(0.1, 0.2))
+
+    asyncio.run(updater.flush())
+    updater.add(observations(0.3))
+    manager.fail = False
+    asyncio.run(updater.flush())
+
+    assert manager.applied == [[0.1, 0.2, 0.3]]
+    assert updater.stats()["pending_observations"] == 0
+
+def test_pending_observations_are_capped(monkeypatch):
+    monkeypatch.setattr(online_updates, "G_VALUE_UPDATE_MAX_PENDING", 3)
+    predictor = Predictor()
+    predictor.is_trained = False
+    manager = Manager()
+    updater = OnlineUpdater(predictor, manager)
+
+    # No model yet: nothing is applied and only the newest observations are kept
+    updater.add(observations(0.1, 0.2))
+    updater.add(observations(0.3, 0.4))
+    asyncio.run(updater.flush())
+    assert updater.stats()["pending_observations"] == 3
+
+    predictor.is_trained = True
+    manager.fail = True
+    asyncio.run(updater.flush())
+    updater.add(observations(0.5))
+    manager.fail = False
+    asyncio.run(updater.flush())
+
+    assert manager.applied == [[0.3, 0.4, 0.5]]
+    assert updater.stats()["observations_dropped"] == 2
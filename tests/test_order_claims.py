@@ -0,0 +1,91 @@
+import asyncio
+
+from redis.exceptions import ConnectionError
+
+from app.services import order_store
+from tests.conftest import add_order, login
+
+def test_only_one_worker_claims_an_order(client, redis):
+    add_order(redis, "o1")
+    first, first_id = login(client, "first@example.com")
+    second, _ = login(client, "second@example.com")
+
+    assert client.post("/api/orders/accept/o1", headers=first).status_code == 200
+    response = client.post("/api/orders/accept/o1", headers=second)
+
+    assert response.status_code == 409
+    assert redis.hget("order:o1", "worker_id") == first_id
+    assert redis.smembers("orders:status:accepted") == {"o1"}
+    assert not redis.sismember("orders:status:available", "o1")
+
+def test_winner_can_retry_a_claim(client, redis):
+    add_order(redis, "o1")
+    headers, worker_id = login(client, "first@example.com")
+
+    assert client.post("/api/orders/accept/o1", headers=headers).status_code == 200
+    version = redis.get("orders:version")
+    response = client.post("/api/orders/accept/o1", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["data"]["worker_id"] == worker_id
+    # The retry changed nothing
+    assert redis.get("orders:version") == version
+
+def test_claim_of_unknown_order_is_404(client):
+    headers, _ = login(client, "first@example.com")
+    assert client.post("/api/orders/accept/missing", headers=headers).status_code == 404
+
+def test_claim_fails_closed_when_redis_is_down(client, redis, repository, monkeypatch):
+    add_order(redis, "o1")
+    repository.local.add({"id": "o1", "pickup": "1 Main St", "dropoff": "2 Oak Ave", "eta": 10})
+    headers, _ = login(client, "first@example.com")
+
+    async def unavailable(*args, **kwargs):
+        raise ConnectionError("Redis is down")
+
+    monkeypatch.setattr(order_store, "_claim_order_script", unavailable)
+    response = client.post("/api/orders/accept/o1", headers=headers)
+
+    assert response.status_code == 503
+    # Neither store granted the claim
+    assert repository.local.get("o1")["status"] == "available"
+    assert redis.hget("order:o1", "status") == "available"
+
+def test_listing_fails_closed_when_redis_is_down(client, redis, redis_server, repository):
+    add_order(redis, "o1")
+    repository.local.add({"id": "o1", "pickup": "1 Main St", "dropoff": "2 Oak Ave", "eta": 10})
+    headers, _ = login(client, "first@example.com")
+    redis_server.connected = False
+
+    # The local copy is not served: it would not show claims made on other replicas
+    assert client.get("/api/orders/", headers=headers).status_code == 503
+
+def test_auto_backend_uses_memory_when_redis_is_down_at_startup(repository, redis_server):
+    orders = [{"id": "o1", "pickup": "1 Main St", "dropoff": "2 Oak Ave", "eta": 10}]
+    redis_server.connected = False
+    auto = order_store.OrderRepository(backend="auto")
+
+    asyncio.run(auto.seed(orders))
+
+    assert not auto.use_redis
+    assert asyncio.run(auto.claim("o1", "w1"))[0] == order_store.CLAIMED
+
+def test_auto_backend_uses_redis_when_reachable_at_startup(repository, redis):
+    orders = [{"id": "o1", "pickup": "1 Main St", "dropoff": "2 Oak Ave", "eta": 10}]
+    auto = order_store.OrderRepository(backend="auto")
+
+    asyncio.run(auto.seed(orders))
+
+    assert auto.use_redis
+    assert redis.hget("order:o1", "status") == "available"
+    assert len(auto.local.by_status("available")) == 0
+
+def test_memory_store_claims_once():
+    store = order_store.OrderStore()
+    store.add({"id": "o1", "pickup": "1 Main St", "dropoff": "2 Oak Ave", "eta": 10})
+
+    assert store.claim("missing", "w1")[0] == order_store.NOT_FOUND
+    assert store.claim("o1", "w1")[0] == order_store.CLAIMED
+    assert store.claim("o1", "w1")[0] == order_store.CLAIMED
+    assert store.claim("o1", "w2")[0] == order_store.ALREADY_TAKEN
+    assert store.get("o1")["worker_id"] == "w1"
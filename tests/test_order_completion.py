@@ -0,0 +1,53 @@
+from app.services import order_store
+from tests.conftest import add_order, login
+
+def test_owner_completes_an_accepted_order_once(client, redis, observations):
+    add_order(redis, "o1")
+    headers, worker_id = login(client, "first@example.com")
+    client.post("/api/orders/accept/o1", headers=headers)
+
+    response = client.post("/api/orders/complete/o1", headers=headers, json={"g_value": 0.8})
+    repeat = client.post("/api/orders/complete/o1", headers=headers, json={"g_value": 0.8})
+
+    assert response.status_code == 200
+    assert repeat.status_code == 409
+    assert redis.hget("order:o1", "status") == "completed"
+    assert redis.smembers("orders:status:completed") == {"o1"}
+    assert not redis.sismember("orders:status:accepted", "o1")
+    # Earnings and the model observation are recorded once
+    assert redis.zcard(f"earnings:{worker_id}:jobs") == 1
+    assert len(observations) == 1
+
+def test_other_worker_cannot_complete_an_order(client, redis, observations):
+    add_order(redis, "o1")
+    owner, _ = login(client, "first@example.com")
+    other, other_id = login(client, "second@example.com")
+    client.post("/api/orders/accept/o1", headers=owner)
+
+    response = client.post("/api/orders/complete/o1", headers=other, json={"g_value": 0.8})
+
+    assert response.status_code == 403
+    assert redis.hget("order:o1", "status") == "accepted"
+    assert redis.zcard(f"earnings:{other_id}:jobs") == 0
+    assert observations == []
+
+def test_available_order_cannot_be_completed(client, redis):
+    add_order(redis, "o1")
+    headers, worker_id = login(client, "first@example.com")
+
+    response = client.post("/api/orders/complete/o1", headers=headers)
+
+    assert response.status_code == 409
+    assert redis.hget("order:o1", "status") == "available"
+    assert redis.zcard(f"earnings:{worker_id}:jobs") == 0
+
+def test_memory_store_guards_completion():
+    store = order_store.OrderStore()
+    store.add({"id": "o1", "pickup": "1 Main St", "dropoff": "2 Oak Ave", "eta": 10})
+
+    assert store.complete("o1", "w1")[0] == order_store.NOT_ACCEPTED
+    store.claim("o1", "w1")
+    assert store.complete("o1", "w2")[0] == order_store.NOT_OWNER
+    assert store.complete("o1", "w1")[0] == order_store.COMPLETED
+    assert store.complete("o1", "w1")[0] == order_store.NOT_ACCEPTED
+    assert store.ids_by_status("completed") == ["o1"]
@@ -0,0 +1,45 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.services.features import features_digest
+from app.services.gp_model import GValuePredictor
+
+FEATURES = {"pickup_location": "1 Main St", "dropoff_location": "2 Oak Ave", "eta": 10}
+REQUEST = {"worker_id": "w1", "order_id": "o1", "features": FEATURES}
+
+@pytest.fixture
+def g_value_client(repository):
+    # Without the lifespan no model is trained and the batcher evaluates directly
+    return TestClient(main.app)
+
+def swapped_in(monkeypatch, version):
+    """Make predictions come from a model with the given version, swapped in after the cache lookup."""
+    def predict_batch(self, features_list):
+        return [(0.5, 0.1)] * len(features_list), version
+
+    monkeypatch.setattr(GValuePredictor, "_predict_batch", predict_batch)
+
+def test_prediction_is_cached_under_the_version_that_made_it(g_value_client, redis, monkeypatch):
+    swapped_in(monkeypatch, "v2")
+
+    response = g_value_client.post("/predict", json=REQUEST)
+
+    assert response.json()["model_version"] == "v2"
+    assert redis.keys("g_value:*") == [f"g_value:v2:{features_digest(FEATURES)}"]
+
+def test_batch_predictions_are_cached_under_the_version_that_made_them(g_value_client, redis, monkeypatch):
+    swapped_in(monkeypatch, "v2")
+
+    response = g_value_client.post("/predict/batch", json={"requests": [REQUEST]})
+
+    assert response.json()["predictions"][0]["model_version"] == "v2"
+    assert redis.keys("g_value:*") == [f"g_value:v2:{features_digest(FEATURES)}"]
+
+def test_mock_fallbacks_are_not_cached(g_value_client, redis):
+    single = g_value_client.post("/predict", json=REQUEST)
+    batch = g_value_client.post("/predict/batch", json={"requests": [REQUEST]})
+
+    assert single.json()["model_version"] == "mock"
+    assert batch.json()["predictions"][0]["model_version"] == "mock"
+    assert redis.keys("g_value:*") == []
@@ -0,0 +1,107 @@
+import random
+
+import pytest
+
+from app.services import order_store
+from app.services.order_store import GridIndex, OrderStore, haversine_km
+from tests.conftest import login
+
+def brute_force(points, lat, lng, radius_km):
+    matches = [
+        (point_id, haversine_km(lat, lng, point_lat, point_lng))
+        for point_id, (point_lat, point_lng) in points.items()
+    ]
+    return sorted((match for match in matches if match[1] <= radius_km), key=lambda match: match[1])
+
+@pytest.mark.parametrize("cell_km", [0.5, 1.0, 5.0])
+@pytest.mark.parametrize("radius_km", [0.3, 2.0, 25.0])
+def test_radius_query_matches_brute_force(cell_km, radius_km):
+    rng = random.Random(7)
+    index = GridIndex(cell_km)
+    points = {}
+    for n in range(500):
+        # Spread around a city and across the equator and prime meridian
+        lat, lng = (37.7 + rng.uniform(-0.2, 0.2), -122.4 + rng.uniform(-0.2, 0.2)) if n % 2 else (
+            rng.uniform(-0.3, 0.3), rng.uniform(-0.3, 0.3)
+        )
+        points[f"p{n}"] = (lat, lng)
+        index.insert(f"p{n}", lat, lng)
+
+    for lat, lng in ((37.7, -122.4), (0.0, 0.0), (0.05, -0.05)):
+        found = index.within(lat, lng, radius_km)
+        expected = brute_force(points, lat, lng, radius_km)
+        assert [point_id for point_id, _ in found] == [point_id for point_id, _ in expected]
+        assert [distance for _, distance in found] == pytest.approx([distance for _, distance in expected])
+
+def test_points_on_either_side_of_a_cell_edge_are_found():
+    index = GridIndex(1.0)
+    edge = 10 * index.cell_deg
+    index.insert("below", edge - 1e-9, 0.0)
+    index.insert("above", edge + 1e-9, 0.0)
+    index.insert("west", edge, -1e-9)
+
+    assert index.cell(edge - 1e-9, 0.0) != index.cell(edge + 1e-9, 0.0)
+    assert index.cell(0.0, -1e-9) == (0, -1)
+    assert {point_id for point_id, _ in index.within(edge, 0.0, 0.01)} == {"below", "above", "west"}
+
+def test_query_circle_crossing_cells_finds_points_near_the_far_edge():
+    index = GridIndex(1.0)
+    # 0.9 km north of the query point, in the next cell up
+    index.insert("near", 0.9 / order_store.KM_PER_DEGREE_LAT, 0.0)
+    index.insert("far", 1.1 / order_store.KM_PER_DEGREE_LAT, 0.0)
+
+    assert [point_id for point_id, _ in index.within(0.0, 0.0, 1.0)] == ["near"]
+
+def test_insert_moves_and_remove_drops_points():
+    index = GridIndex(1.0)
+    index.insert("p", 37.70, -122.40)
+    index.insert("p", 37.80, -122.40)
+
+    assert len(index) == 1
+    assert index.within(37.70, -122.40, 1.0) == []
+    assert [point_id for point_id, _ in index.within(37.80, -122.40, 1.0)] == ["p"]
+    assert index.remove("p") is True
+    assert index.remove("p") is False
+    assert index.within(37.80, -122.40, 1.0) == []
+    assert index._cells == {}
+
+@pytest.mark.parametrize("lat, lng", [(95.0, 0.0), (-90.5, 0.0), (0.0, 181.0), (float("nan"), 0.0)])
+def test_out_of_range_points_are_rejected(lat, lng):
+    index = GridIndex(1.0)
+    with pytest.raises(ValueError):
+        index.insert("p", lat, lng)
+    assert len(index) == 0
+
+def test_claimed_orders_leave_the_memory_index():
+    store = OrderStore(cell_km=1.0)
+    store.add({"id": "o1", "pickup": "a", "dropoff": "b", "eta": 5, "pickup_lat": 37.77, "pickup_lng": -122.41})
+    store.add({"id": "o2", "pickup": "a", "dropoff": "b", "eta": 5, "pickup_lat": 37.771, "pickup_lng": -122.41})
+
+    store.claim("o1", "w1")
+
+    assert [order["id"] for order in store.available_near(37.77, -122.41, 1.0)] == ["o2"]
+
+def test_claimed_orders_leave_the_redis_geo_index(client, redis):
+    headers, _ = login(client, "first@example.com")
+    created = [
+        client.post("/api/orders/", headers=headers, json={
+            "pickup": "a", "dropoff": "b", "eta": 5, "pickup_lat": 37.77 + n * 0.001, "pickup_lng": -122.41
+        }).json()["data"]["id"]
+        for n in range(2)
+    ]
+
+    client.post(f"/api/orders/accept/{created[0]}", headers=headers)
+
+    assert redis.zrange("orders:geo:available", 0, -1) == [created[1]]
+
+def test_order_outside_the_geo_range_is_rejected_before_anything_is_stored(client, redis):
+    headers, _ = login(client, "first@example.com")
+
+    for lat in (95, 89):
+        response = client.post("/api/orders/", headers=headers, json={
+            "pickup": "a", "dropoff": "b", "eta": 5, "pickup_lat": lat, "pickup_lng": 0
+        })
+        assert response.status_code == 422
+
+    assert redis.keys("order:*") == []
+    assert redis.zcard("orders:geo:available") == 0